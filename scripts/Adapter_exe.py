@@ -7,15 +7,18 @@ launch_tmdb_fixed.py - Исправленный запускатель для TM
 import sys
 import os
 import re
-import pymysql
 print("🔧 Инициализация TMDB адаптера v2...")
 
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
-from mysql_connector import MySQLConnector
+from mysql_connector import (MySQLConnector, MySQLQueryError, DEFAULT_COUNT_BOUND,
+                             KEYWORD_PAGE_SQL, KEYWORD_COUNT_SQL, KEYWORD_BOUNDED_COUNT_SQL)
+from tracing import span
+from profiling import PROFILE_MODES
 
 # Сохраняем оригиналы
 _original_init = MySQLConnector.__init__
 _original_select = MySQLConnector.select
+_original_select_chunks = MySQLConnector.select_chunks
 _original_test = MySQLConnector.test_connection
 
 class TMDBAdapterV2:
@@ -69,8 +72,9 @@ class TMDBAdapterV2:
         
         # 7. Обработка release_year
         if 'YEAR(m.release_date) as release_year' not in sql and 'YEAR(release_date) as release_year' not in sql:
+            # Псевдоним "AS release_year" сохраняем: по нему строка получает ключ release_year
             sql = re.sub(r'(\w+)\.release_year', r'YEAR(\1.release_date)', sql)
-            sql = re.sub(r'\brelease_year\b', 'YEAR(release_date)', sql)
+            sql = re.sub(r'(?<![Aa][Ss] )\brelease_year\b', 'YEAR(release_date)', sql)
         
         # 8. ВАЖНО: Исправляем имена актеров во ВСЕХ частях запроса
         # Сначала CONCAT
@@ -92,52 +96,83 @@ class TMDBAdapterV2:
             
         return sql
     
+    # Переименование колонок TMDB -> Sakila
+    COLUMN_MAP = {
+        'tmdb_id': 'film_id',
+        'overview': 'description',
+        'runtime': 'length',
+        'vote_average': 'rating',
+        'genre_id': 'category_id',
+        'person_id': 'actor_id',
+    }
+    
+    @staticmethod
+    def rating_from_vote(value):
+        """vote_average -> рейтинг в стиле Sakila"""
+        if value is None:
+            return 'NR'
+        elif value >= 8:
+            return 'G'
+        elif value >= 7:
+            return 'PG'
+        elif value >= 6:
+            return 'PG-13'
+        elif value >= 5:
+            return 'R'
+        else:
+            return 'NC-17'
+    
+    @staticmethod
+    def adapt_row(row):
+        """Адаптация одной строки результата"""
+        new_row = {}
+        for key, value in row.items():
+            if key == 'overview':
+                new_row['description'] = value or ''
+            elif key == 'vote_average':
+                new_row['rating'] = TMDBAdapterV2.rating_from_vote(value)
+            else:
+                new_row[TMDBAdapterV2.COLUMN_MAP.get(key, key)] = value
+        return new_row
+    
+    @staticmethod
+    def adapt_columns(columns):
+        """Адаптация имён колонок (для строк-кортежей)"""
+        return [TMDBAdapterV2.COLUMN_MAP.get(c, c) for c in columns]
+    
+    @staticmethod
+    def adapt_tuples(columns, rows):
+        """Адаптация строк-кортежей по исходным именам колонок TMDB"""
+        fixes = []
+        for i, name in enumerate(columns):
+            if name == 'overview':
+                fixes.append((i, lambda v: v or ''))
+            elif name == 'vote_average':
+                fixes.append((i, TMDBAdapterV2.rating_from_vote))
+        if not fixes:
+            return rows
+        adapted = []
+        for row in rows:
+            row = list(row)
+            for i, fix in fixes:
+                row[i] = fix(row[i])
+            adapted.append(tuple(row))
+        return adapted
+    
     @staticmethod
     def adapt_results(results):
         """Адаптация результатов"""
         if not results:
             return results
             
-        adapted = []
-        for row in results:
-            new_row = {}
-            for key, value in row.items():
-                if key == 'tmdb_id':
-                    new_row['film_id'] = value
-                elif key == 'overview':
-                    new_row['description'] = value or ''
-                elif key == 'runtime':
-                    new_row['length'] = value
-                elif key == 'vote_average':
-                    if value is None:
-                        new_row['rating'] = 'NR'
-                    elif value >= 8:
-                        new_row['rating'] = 'G'
-                    elif value >= 7:
-                        new_row['rating'] = 'PG'
-                    elif value >= 6:
-                        new_row['rating'] = 'PG-13'
-                    elif value >= 5:
-                        new_row['rating'] = 'R'
-                    else:
-                        new_row['rating'] = 'NC-17'
-                elif key == 'genre_id':
-                    new_row['category_id'] = value
-                elif key == 'person_id':
-                    new_row['actor_id'] = value
-                else:
-                    new_row[key] = value
-                    
-            adapted.append(new_row)
-            
-        return adapted
+        return [TMDBAdapterV2.adapt_row(row) for row in results]
 
 # Патчим методы
-def patched_init(self):
-    _original_init(self)
+def patched_init(self, *args, **kwargs):
+    _original_init(self, *args, **kwargs)
     print("✅ TMDB адаптер v2 активирован")
 
-def patched_select(self, sql, params=None, args=None):
+def _final_sql(sql):
     adapted_sql = TMDBAdapterV2.adapt_sql(sql)
     
     # Финальная проверка на проблемы
@@ -145,10 +180,16 @@ def patched_select(self, sql, params=None, args=None):
         print("⚠️  Финальная коррекция YEAR...")
         adapted_sql = adapted_sql.replace('f.YEAR(', 'YEAR(f.')
         adapted_sql = adapted_sql.replace('.YEAR(', 'YEAR(')
+    return adapted_sql
+
+def patched_select(self, sql, params=None, args=None):
+    with span("adapt_sql"):
+        adapted_sql = _final_sql(sql)
     
     try:
         results = _original_select(self, adapted_sql, params, args)
-        return TMDBAdapterV2.adapt_results(results)
+        with span("adapt_results"):
+            return TMDBAdapterV2.adapt_results(results)
     except Exception as e:
         print(f"\n❌ Ошибка SQL: {e}")
         print(f"📝 Проблемный запрос:\n{adapted_sql}\n")
@@ -157,13 +198,82 @@ def patched_select(self, sql, params=None, args=None):
             print("⚠️  Обнаружена необработанная таблица 'film'")
         raise
 
-def patched_test(self):
-    result = _original_test(self)
+def patched_select_chunks(self, sql, params=None, args=None, batch_size=None,
+                          as_tuples=False, on_columns=None):
+    with span("adapt_sql"):
+        adapted_sql = _final_sql(sql)
+    source_columns = []
+    
+    def _columns(names):
+        source_columns.extend(names)
+        if on_columns is not None:
+            on_columns(TMDBAdapterV2.adapt_columns(names))
+    
+    try:
+        for chunk in _original_select_chunks(self, adapted_sql, params, args, batch_size,
+                                             as_tuples, _columns):
+            with span("adapt_results", rows=len(chunk)):
+                if as_tuples:
+                    chunk = TMDBAdapterV2.adapt_tuples(source_columns, chunk)
+                else:
+                    chunk = [TMDBAdapterV2.adapt_row(row) for row in chunk]
+            yield chunk
+    except Exception as e:
+        print(f"\n❌ Ошибка SQL: {e}")
+        print(f"📝 Проблемный запрос:\n{adapted_sql}\n")
+        raise
+
+def patched_test(self, *args, **kwargs):
+    result = _original_test(self, *args, **kwargs)
     if result:
         print("✅ Подключение к TMDB успешно")
     return result
 
-# Методы для жанров и годов
+# Поиск по жанру и годам напрямую по схеме TMDB
+TMDB_GENRE_YEAR_COUNT_SQL = """
+    SELECT COUNT(DISTINCT m.tmdb_id) as total
+    FROM movies m
+    JOIN movie_genres mg ON m.tmdb_id = mg.tmdb_id
+    JOIN genres g ON mg.genre_id = g.genre_id
+    WHERE g.name = %s 
+    AND YEAR(m.release_date) BETWEEN %s AND %s
+"""
+TMDB_GENRE_YEAR_BOUNDED_COUNT_SQL = """
+    SELECT COUNT(*) as total
+    FROM (
+        SELECT DISTINCT m.tmdb_id
+        FROM movies m
+        JOIN movie_genres mg ON m.tmdb_id = mg.tmdb_id
+        JOIN genres g ON mg.genre_id = g.genre_id
+        WHERE g.name = %s 
+        AND YEAR(m.release_date) BETWEEN %s AND %s
+        LIMIT %s
+    ) t
+"""
+TMDB_GENRE_YEAR_PAGE_SQL = """
+    SELECT DISTINCT
+        m.tmdb_id as film_id,
+        m.title,
+        YEAR(m.release_date) as release_year,
+        m.runtime as length,
+        m.vote_average,
+        m.overview as description,
+        GROUP_CONCAT(DISTINCT g2.name ORDER BY g2.name SEPARATOR ', ') as genres
+    FROM movies m
+    JOIN movie_genres mg ON m.tmdb_id = mg.tmdb_id
+    JOIN genres g ON mg.genre_id = g.genre_id
+    LEFT JOIN movie_genres mg2 ON m.tmdb_id = mg2.tmdb_id
+    LEFT JOIN genres g2 ON mg2.genre_id = g2.genre_id
+    WHERE g.name = %s 
+    AND YEAR(m.release_date) BETWEEN %s AND %s
+    GROUP BY m.tmdb_id, m.title, release_year, m.runtime, m.vote_average, m.overview
+    ORDER BY release_year DESC, m.title
+    LIMIT %s OFFSET %s
+"""
+
+# Методы для жанров и годов. Ошибки MySQL не глотаем, а поднимаем как MySQLQueryError
+# (как исходные методы): по ним local_replica переключается на реплику, а вызывающий
+# код и так обрабатывает исключения
 def patched_get_genres(self):
     try:
         sql = """
@@ -174,9 +284,9 @@ def patched_get_genres(self):
             ORDER BY g.name
         """
         results = self.select(sql)
-        return results if results else get_default_genres()
-    except:
-        return get_default_genres()
+    except Exception as e:
+        raise MySQLQueryError(f"Ошибка получения списка жанров: {e}") from e
+    return results if results else get_default_genres()
 
 def get_default_genres():
     return [
@@ -206,10 +316,10 @@ def patched_get_years(self):
             WHERE release_date IS NOT NULL
         """
         results = self.select(sql)
-        if results and results[0]['min_year']:
-            return results[0]['min_year'], results[0]['max_year']
-    except:
-        pass
+    except Exception as e:
+        raise MySQLQueryError(f"Ошибка получения диапазона годов: {e}") from e
+    if results and results[0]['min_year']:
+        return results[0]['min_year'], results[0]['max_year']
     return 1900, 2025
 
 # Специальный патч для методов которые не используют select
@@ -218,69 +328,43 @@ def patched_get_years(self):
 # 1. ИСПРАВЛЕНИЕ ПРОБЛЕМЫ С ЖАНРАМИ
 # Замените функцию patched_search_by_genre_and_years на эту:
 
-def patched_search_by_genre_and_years(self, genre, start_year, end_year, offset=0, limit=10):
+def patched_search_by_genre_and_years(self, genre, start_year, end_year, offset=0, limit=10,
+                                      count_mode="exact", count_bound=DEFAULT_COUNT_BOUND):
     """Исправленная версия поиска по жанрам - БЕЗ адаптера"""
     try:
-        # Прямые SQL запросы к TMDB структуре
-        with self.get_connection() as conn:
-            with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-                # Считаем количество
-                count_sql = """
-                    SELECT COUNT(DISTINCT m.tmdb_id) as total
-                    FROM movies m
-                    JOIN movie_genres mg ON m.tmdb_id = mg.tmdb_id
-                    JOIN genres g ON mg.genre_id = g.genre_id
-                    WHERE g.name = %s 
-                    AND YEAR(m.release_date) BETWEEN %s AND %s
-                """
-                cursor.execute(count_sql, (genre, start_year, end_year))
-                total_count = cursor.fetchone()['total']
-                
-                # Получаем фильмы
-                search_sql = """
-                    SELECT DISTINCT
-                        m.tmdb_id as film_id,
-                        m.title,
-                        YEAR(m.release_date) as release_year,
-                        m.runtime as length,
-                        m.vote_average,
-                        m.overview as description,
-                        GROUP_CONCAT(DISTINCT g2.name ORDER BY g2.name SEPARATOR ', ') as genres
-                    FROM movies m
-                    JOIN movie_genres mg ON m.tmdb_id = mg.tmdb_id
-                    JOIN genres g ON mg.genre_id = g.genre_id
-                    LEFT JOIN movie_genres mg2 ON m.tmdb_id = mg2.tmdb_id
-                    LEFT JOIN genres g2 ON mg2.genre_id = g2.genre_id
-                    WHERE g.name = %s 
-                    AND YEAR(m.release_date) BETWEEN %s AND %s
-                    GROUP BY m.tmdb_id, m.title, release_year, m.runtime, m.vote_average, m.overview
-                    ORDER BY release_year DESC, m.title
-                    LIMIT %s OFFSET %s
-                """
-                cursor.execute(search_sql, (genre, start_year, end_year, limit, offset))
-                films = cursor.fetchall()
-                
-                # Конвертируем рейтинги
-                for film in films:
-                    vote_avg = film.pop('vote_average', None)
-                    if vote_avg is None:
-                        film['rating'] = 'NR'
-                    elif vote_avg >= 8:
-                        film['rating'] = 'G'
-                    elif vote_avg >= 7:
-                        film['rating'] = 'PG'
-                    elif vote_avg >= 6:
-                        film['rating'] = 'PG-13'
-                    elif vote_avg >= 5:
-                        film['rating'] = 'R'
-                    else:
-                        film['rating'] = 'NC-17'
-                
-                return films, total_count
+        # Прямые SQL запросы к TMDB структуре; COUNT — параллельно со страницей
+        films, total_count = self._search_page(
+            TMDB_GENRE_YEAR_PAGE_SQL, (genre, start_year, end_year, limit, offset),
+            TMDB_GENRE_YEAR_COUNT_SQL, TMDB_GENRE_YEAR_BOUNDED_COUNT_SQL,
+            (genre, start_year, end_year), count_mode, count_bound)
+        
+        # Конвертируем рейтинги
+        for film in films:
+            film['rating'] = TMDBAdapterV2.rating_from_vote(film.pop('vote_average', None))
+        
+        return films, total_count
                 
+    except ValueError:
+        raise
     except Exception as e:
         print(f"❌ Ошибка в search_by_genre_and_years: {e}")
-        return [], 0
+        raise MySQLQueryError(f"Ошибка выполнения запроса: {e}") from e
+
+
+def patched_search_by_keyword(self, keyword, offset=0, limit=10,
+                              count_mode="exact", count_bound=DEFAULT_COUNT_BOUND):
+    """Поиск по слову: общий SQL через адаптер (_search_page идёт мимо patched_select)"""
+    pattern = f'%{keyword}%'
+    try:
+        films, total_count = self._search_page(
+            _final_sql(KEYWORD_PAGE_SQL), (pattern, limit, offset),
+            _final_sql(KEYWORD_COUNT_SQL), _final_sql(KEYWORD_BOUNDED_COUNT_SQL), (pattern,),
+            count_mode, count_bound)
+    except ValueError:
+        raise
+    except Exception as e:
+        raise MySQLQueryError(f"Ошибка выполнения запроса: {e}") from e
+    return TMDBAdapterV2.adapt_results(list(films)), total_count
 
 
 # 2. ПРОВЕРКА TMDB API для постеров
@@ -326,9 +410,8 @@ def test_tmdb_api():
     except Exception as e:
         print(f"❌ Ошибка проверки API: {e}")
 
-# Вызываем проверку API
-print("\n🔍 Проверка TMDB API для постеров...")
-test_tmdb_api()
+# Проверка TMDB API больше не выполняется здесь синхронно: MainWindow запускает
+# её в фоне вместе с MySQL/MongoDB (health_checks) и показывает итог в статус-баре.
 
 # 3. ПАТЧ ДЛЯ ИСПРАВЛЕНИЯ TMDB_API_KEY
 # Добавьте после импорта main_gui3 но ПЕРЕД main_gui3.main():
@@ -356,31 +439,47 @@ def patch_tmdb_api():
     except Exception as e:
         print(f"⚠️  Не удалось загрузить API ключ: {e}")
 
-# Применяем патч для search_by_genre_and_years
-MySQLConnector.search_by_genre_and_years = patched_search_by_genre_and_years
-
 # ВАЖНО: Добавьте эти строки в самый конец файла launch_tmdb_fixed.py
 # ПОСЛЕ строки "import main_gui3" но ПЕРЕД "main_gui3.main()":
 #
 # patch_tmdb_api()
 # main_gui3.main()
 
-# Применяем все патчи
-MySQLConnector.__init__ = patched_init
-MySQLConnector.select = patched_select
-MySQLConnector.test_connection = patched_test
-MySQLConnector.get_available_genres = patched_get_genres
-MySQLConnector.get_year_range = patched_get_years
-MySQLConnector.search_by_genre_and_years = patched_search_by_genre_and_years
+def install():
+    """Применяет все патчи к MySQLConnector (импорт модуля сам по себе ничего не меняет)"""
+    MySQLConnector.__init__ = patched_init
+    MySQLConnector.select = patched_select
+    MySQLConnector.select_chunks = patched_select_chunks
+    MySQLConnector.test_connection = patched_test
+    MySQLConnector.get_available_genres = patched_get_genres
+    MySQLConnector.get_year_range = patched_get_years
+    MySQLConnector.search_by_genre_and_years = patched_search_by_genre_and_years
+    MySQLConnector.search_by_keyword = patched_search_by_keyword
+    # Асинхронный слой (async_data) — те же преобразования SQL и строк
+    from async_data import AsyncMySQLConnector
+    AsyncMySQLConnector.sql_adapter = staticmethod(_final_sql)
+    AsyncMySQLConnector.rows_adapter = staticmethod(TMDBAdapterV2.adapt_results)
+    # Жанр/годы — тем же SQL под схему TMDB, что и синхронный patched_search_by_genre_and_years
+    AsyncMySQLConnector.genre_year_sql = (TMDB_GENRE_YEAR_PAGE_SQL, TMDB_GENRE_YEAR_COUNT_SQL,
+                                          TMDB_GENRE_YEAR_BOUNDED_COUNT_SQL)
+    print("✅ TMDB адаптер v2 установлен")
 
-print("✅ TMDB адаптер v2 установлен")
-print("🚀 Запускаем приложение...\n")
 
-try:
-    import main_gui3
-    main_gui3.main()
-except Exception as e:
-    print(f"\n❌ Критическая ошибка: {e}")
-    import traceback
-    traceback.print_exc()
-    input("\nНажмите Enter для выхода...")
\ No newline at end of file
+if __name__ == "__main__":
+    install()
+    print("🚀 Запускаем приложение...\n")
+    
+    try:
+        import argparse
+        parser = argparse.ArgumentParser(description="TMDB adapter launcher")
+        parser.add_argument("--profile", nargs="?", const="cprofile", choices=PROFILE_MODES,
+                            help="профилировать каждое действие (cprofile по умолчанию или sample)")
+        args, _ = parser.parse_known_args()
+        
+        import main_gui3
+        main_gui3.main(profile=args.profile)
+    except Exception as e:
+        print(f"\n❌ Критическая ошибка: {e}")
+        import traceback
+        traceback.print_exc()
+        input("\nНажмите Enter для выхода...")
\ No newline at end of file
@@ -0,0 +1,291 @@
+# analytics_snapshot.py - Колоночный локальный снимок каталога (Parquet / Arrow) и аналитика на DuckDB
+"""
+Снимок выгружает таблицы TMDB (movies, genres, movie_genres, people,
+cast_credits) потоковым курсором MySQLConnector.select_chunks в файлы под
+~/.sakila_cache/analytics: Parquet (сжатый, по умолчанию) или Arrow IPC
+(без сжатия, читается через memory map без копирования). Последним пишется
+manifest.json — пока его нет, снимок считается незавершённым.
+
+SnapshotAnalytics поднимает встроенный DuckDB поверх файлов и отдаёт
+select(sql) в том же виде, что MySQLConnector.select, поэтому графики вкладки
+Analytics и статистика БД работают по снимку без изменения SQL и не нагружают
+общую базу.
+
+Использование:
+    python analytics_snapshot.py                          # снять снимок (Parquet)
+    python analytics_snapshot.py --format arrow           # Arrow IPC для memory map
+    python analytics_snapshot.py --tables movies genres   # обновить часть таблиц
+    python analytics_snapshot.py --info
+    python analytics_snapshot.py --query "SELECT COUNT(*) AS n FROM movies"
+"""
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import importlib
+import threading
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from tracing import span
+
+SNAPSHOT_DIR = os.path.join(os.path.expanduser("~"), ".sakila_cache", "analytics")
+MANIFEST_FILE = "manifest.json"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_BATCH = 50_000       # строк на пачку потокового курсора и на row group
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+DEFAULT_MAX_AGE_H = 24
+
+# Таблица -> (колонка, тип Arrow). overview не выгружается: графикам текст не нужен,
+# а по объёму он больше всех остальных колонок вместе
+SNAPSHOT_TABLES: Dict[str, Sequence[tuple]] = {
+    "movies": (("tmdb_id", "int64"), ("title", "string"), ("release_date", "date32"),
+               ("runtime", "int32"), ("vote_average", "float64"), ("vote_count", "int64"),
+               ("popularity", "float64")),
+    "genres": (("genre_id", "int32"), ("name", "string")),
+    "movie_genres": (("tmdb_id", "int64"), ("genre_id", "int32")),
+    "people": (("person_id", "int64"), ("name", "string")),
+    "cast_credits": (("tmdb_id", "int64"), ("person_id", "int64"), ("character_name", "string"),
+                     ("cast_order", "int32")),
+}
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotError(Exception):
+    """Снимок отсутствует, устарел или не может быть создан/прочитан"""
+    pass
+
+
+def _require(module: str, package: str):
+    try:
+        return importlib.import_module(module)
+    except ImportError as e:
+        raise SnapshotError(f"Install {package} for analytics snapshots:\npip install {package}") from e
+
+
+# DECIMAL из MySQL -> float; нулевые даты ('0000-00-00' приходят строкой) -> NULL
+_CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    "float64": lambda v: None if v is None else float(v),
+    "date32": lambda v: v if isinstance(v, date) else None,
+}
+
+
+def _column(rows: List[tuple], i: int, arrow_type: str) -> list:
+    values = [row[i] for row in rows]
+    convert = _CONVERTERS.get(arrow_type)
+    return [convert(v) for v in values] if convert else values
+
+
+# ---------- Создание снимка ----------
+def load_manifest(directory: str = SNAPSHOT_DIR) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(directory, MANIFEST_FILE), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("version") == SNAPSHOT_VERSION else None
+
+
+def _export_table(db, pa, table: str, path: str, fmt: str,
+                  on_progress: Optional[Callable[[str, int], None]]) -> int:
+    spec = SNAPSHOT_TABLES[table]
+    schema = pa.schema([pa.field(name, getattr(pa, arrow_type)()) for name, arrow_type in spec])
+    sql = f"SELECT {', '.join(name for name, _ in spec)} FROM {table}"
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        writer = pq.ParquetWriter(path, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_file(path, schema)
+    rows = 0
+    try:
+        for chunk in db.select_chunks(sql, batch_size=SNAPSHOT_BATCH, as_tuples=True):
+            arrays = [pa.array(_column(chunk, i, arrow_type), type=getattr(pa, arrow_type)())
+                      for i, (_, arrow_type) in enumerate(spec)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            rows += len(chunk)
+            if on_progress:
+                on_progress(table, rows)
+    finally:
+        writer.close()
+    return rows
+
+
+def take_snapshot(db, directory: str = SNAPSHOT_DIR, fmt: str = "parquet",
+                  tables: Optional[Sequence[str]] = None,
+                  on_progress: Optional[Callable[[str, int], None]] = None) -> Dict[str, Any]:
+    """
+    Выгружает таблицы в directory и пишет манифест. Файлы сначала пишутся во
+    временные и подменяются только после успешной выгрузки всех таблиц, так что
+    читатели не видят наполовину записанный снимок.
+
+    Returns:
+        Dict: манифест нового снимка
+    """
+    if fmt not in FORMATS:
+        raise SnapshotError(f"Unknown snapshot format: {fmt}")
+    tables = list(tables or SNAPSHOT_TABLES)
+    unknown = [t for t in tables if t not in SNAPSHOT_TABLES]
+    if unknown:
+        raise SnapshotError(f"Unknown tables: {', '.join(unknown)}")
+    pa = _require("pyarrow", "pyarrow")
+    os.makedirs(directory, exist_ok=True)
+
+    # Частичное обновление сохраняет остальные таблицы прежнего снимка того же формата
+    previous = load_manifest(directory)
+    entries = dict(previous["tables"]) if previous and previous.get("format") == fmt else {}
+    written = []
+    try:
+        for table in tables:
+            path = os.path.join(directory, table + FORMATS[fmt])
+            written.append(path)   # до выгрузки: недописанный .tmp упавшей таблицы тоже удаляется
+            start = time.perf_counter()
+            with span("snapshot_table", table=table):
+                rows = _export_table(db, pa, table, path + ".tmp", fmt, on_progress)
+            entries[table] = {"file": os.path.basename(path), "rows": rows,
+                              "bytes": os.path.getsize(path + ".tmp"),
+                              "seconds": round(time.perf_counter() - start, 2)}
+    except BaseException:
+        for path in written:
+            if os.path.exists(path + ".tmp"):
+                os.remove(path + ".tmp")
+        raise
+    for path in written:
+        os.replace(path + ".tmp", path)
+
+    config = getattr(db, "config", {})
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "format": fmt,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "created_ts": time.time(),
+        "source": f"{config.get('host', '?')}/{config.get('database', '?')}",
+        "tables": entries,
+    }
+    tmp = os.path.join(directory, MANIFEST_FILE + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, os.path.join(directory, MANIFEST_FILE))
+    return manifest
+
+
+# ---------- Чтение снимка ----------
+class SnapshotAnalytics:
+    """Аналитика по снимку на встроенном DuckDB; select() совместим с MySQLConnector.select"""
+
+    def __init__(self, directory: str = SNAPSHOT_DIR):
+        self.directory = directory
+        self.manifest = load_manifest(directory)
+        if self.manifest is None:
+            raise SnapshotError(f"No analytics snapshot in {directory}")
+        missing = [t for t in SNAPSHOT_TABLES if t not in self.manifest["tables"]]
+        if missing:
+            raise SnapshotError(f"Snapshot has no tables: {', '.join(missing)}")
+        duckdb = _require("duckdb", "duckdb")
+        self.con = duckdb.connect(":memory:")
+        self._lock = threading.Lock()   # одно соединение DuckDB на все потоки
+        for table, info in self.manifest["tables"].items():
+            path = os.path.join(directory, info["file"])
+            if self.manifest["format"] == "parquet":
+                quoted = path.replace("'", "''")
+                self.con.execute(f"CREATE VIEW {table} AS SELECT * FROM read_parquet('{quoted}')")
+            else:
+                # Arrow IPC отображается в память: таблица не копируется в процесс
+                pa = _require("pyarrow", "pyarrow")
+                self.con.register(table, pa.ipc.open_file(pa.memory_map(path)).read_all())
+
+    @property
+    def age_hours(self) -> float:
+        return (time.time() - self.manifest["created_ts"]) / 3600
+
+    def describe(self) -> str:
+        return f"snapshot {self.manifest['created']} ({self.manifest['format']}, DuckDB)"
+
+    def select(self, sql: str, params=None) -> List[Dict]:
+        with span("snapshot_sql"), self._lock:
+            cursor = self.con.execute(sql, params or [])
+            columns = [d[0] for d in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def close(self):
+        self.con.close()
+
+
+def open_snapshot(directory: str = SNAPSHOT_DIR,
+                  max_age_h: Optional[float] = DEFAULT_MAX_AGE_H) -> Optional[SnapshotAnalytics]:
+    """Свежий снимок или None (нет, устарел, не установлен duckdb) — тогда аналитика идёт в MySQL"""
+    if load_manifest(directory) is None:
+        return None
+    try:
+        snapshot = SnapshotAnalytics(directory)
+    except Exception as e:
+        logger.info(f"Снимок аналитики недоступен: {e}")
+        return None
+    if max_age_h is not None and snapshot.age_hours > max_age_h:
+        logger.info(f"Снимок аналитики устарел ({snapshot.age_hours:.1f} ч), используется MySQL")
+        snapshot.close()
+        return None
+    return snapshot
+
+
+# ---------- CLI ----------
+def _print_info(manifest: Optional[Dict[str, Any]], directory: str):
+    if manifest is None:
+        print(f"No snapshot in {directory}")
+        return
+    print(f"📦 Snapshot {manifest['created']} from {manifest['source']} ({manifest['format']})")
+    for table, info in manifest["tables"].items():
+        print(f"   {table:<14} {info['rows']:>12,} rows  {info['bytes'] / 2 ** 20:>9.1f} MB"
+              f"  {info.get('seconds', 0):>7.1f} s")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Columnar analytics snapshot (Parquet/Arrow + DuckDB)")
+    parser.add_argument("--dir", default=SNAPSHOT_DIR, help="каталог снимка")
+    parser.add_argument("--format", choices=list(FORMATS), default="parquet")
+    parser.add_argument("--tables", nargs="+", choices=list(SNAPSHOT_TABLES), help="выгрузить только эти таблицы")
+    parser.add_argument("--info", action="store_true", help="показать манифест текущего снимка")
+    parser.add_argument("--query", metavar="SQL", help="выполнить SQL по снимку в DuckDB")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    try:
+        if args.info:
+            _print_info(load_manifest(args.dir), args.dir)
+            return 0
+        if args.query:
+            snapshot = SnapshotAnalytics(args.dir)
+            try:
+                start = time.perf_counter()
+                rows = snapshot.select(args.query)
+                for row in rows:
+                    print(json.dumps(row, ensure_ascii=False, default=str))
+                print(f"⏱  {len(rows)} rows in {(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+            finally:
+                snapshot.close()
+            return 0
+
+        from mysql_connector import MySQLConnector
+        db = MySQLConnector()
+        last = {"t": 0.0}
+
+        def progress(table: str, rows: int):
+            now = time.monotonic()
+            if now - last["t"] >= 1:
+                last["t"] = now
+                print(f"   {table}: {rows:,} rows...", file=sys.stderr)
+
+        start = time.perf_counter()
+        manifest = take_snapshot(db, args.dir, args.format, args.tables, progress)
+        print(f"✅ Snapshot written in {time.perf_counter() - start:.1f} s")
+        _print_info(manifest, args.dir)
+        return 0
+    except SnapshotError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,366 @@
+# async_data.py - Асинхронный слой данных: AsyncMySQLConnector (aiomysql), AsyncLogWriter и AsyncLogStats (motor)
+"""
+Асинхронные двойники MySQLConnector, LogWriter и LogStats с теми же именами
+методов, сигнатурами и формой строк (словари как у DictCursor). Запросы
+берутся из mysql_connector / log_stats, так что синхронный и асинхронный слой
+не расходятся.
+
+Отличия от синхронных классов:
+    - соединения MySQL берутся из пула aiomysql; COUNT и страница в поиске
+      идут одновременно через asyncio.gather, без потоков;
+    - AsyncLogWriter.log_search_nowait() пишет лог в фоне, не задерживая ответ;
+    - span() из tracing здесь не используется (он привязан к потоку), замеры
+      запросов по-прежнему попадают в QueryStats.
+
+Зависимости необязательные: aiomysql и motor нужны только этому модулю.
+
+    async with AsyncMySQLConnector() as db:
+        films, total = await db.search_by_keyword("love")
+
+Сверка формы строк с синхронным слоем: python async_data.py --parity [--tmdb]
+"""
+import time
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+try:
+    import aiomysql
+except ImportError:
+    aiomysql = None
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+except ImportError:
+    AsyncIOMotorClient = None
+
+from config import MYSQL_CONFIG, MONGODB_CONFIG
+from query_stats import QUERY_STATS, QueryTimer
+from mysql_connector import (
+    MySQLConnectionError, MySQLQueryError, build_advanced_query, COUNT_MODES, DEFAULT_COUNT_BOUND,
+    KEYWORD_COUNT_SQL, KEYWORD_BOUNDED_COUNT_SQL, KEYWORD_PAGE_SQL, GENRES_SQL, YEAR_RANGE_SQL,
+    GENRE_YEAR_COUNT_SQL, GENRE_YEAR_BOUNDED_COUNT_SQL, GENRE_YEAR_PAGE_SQL,
+    FILM_DETAILS_SQL, SIMILAR_FILMS_SQL,
+)
+from log_writer import MongoWriteError
+from log_stats import MongoStatsError, popular_pipeline, recent_pipeline
+
+DEFAULT_POOL_SIZE = 10
+
+logger = logging.getLogger(__name__)
+
+
+def _require(module, name: str):
+    if module is None:
+        raise ImportError(f"Для асинхронного слоя нужен пакет {name} (pip install {name})")
+
+
+class AsyncMySQLConnector:
+    """Асинхронный MySQLConnector на пуле aiomysql"""
+
+    # Адаптер схемы (Adapter_exe.install() подставляет преобразования TMDB)
+    sql_adapter: Optional[Callable[[str], str]] = None
+    # (страница, COUNT, ограниченный COUNT) поиска по жанру и годам, уже под схему адаптера
+    genre_year_sql: Optional[Tuple[str, str, str]] = None
+    rows_adapter: Optional[Callable[[List[Dict]], List[Dict]]] = None
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE):
+        _require(aiomysql, "aiomysql")
+        cfg = MYSQL_CONFIG
+        self.config = {
+            "host": cfg["host"], "port": cfg.get("port", 3306), "user": cfg["user"],
+            "password": cfg["password"], "db": cfg["database"],
+            "charset": cfg.get("charset", "utf8mb4"), "autocommit": cfg.get("autocommit", True),
+        }
+        self.pool_size = pool_size
+        self.stats = QUERY_STATS
+        self._pool = None
+        self._start_lock = asyncio.Lock()  # параллельные первые запросы создают один пул
+
+    async def start(self):
+        async with self._start_lock:
+            if self._pool is None:
+                try:
+                    self._pool = await aiomysql.create_pool(minsize=1, maxsize=self.pool_size, **self.config)
+                except Exception as e:
+                    raise MySQLConnectionError(f"Не удалось подключиться к MySQL: {e}") from e
+        return self
+
+    async def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            await self._pool.wait_closed()
+            self._pool = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _run(self, sql: str, args=None, one: bool = False, as_dict: bool = True, adapt: bool = True):
+        """Один запрос на отдельном соединении из пула, с замером по стадиям (adapt=False — SQL уже под схему)"""
+        if self._pool is None:
+            await self.start()
+        adapter = type(self).sql_adapter
+        if adapt and adapter is not None:
+            sql = adapter(sql)
+        timer = QueryTimer(sql, self.stats)
+        try:
+            async with self._pool.acquire() as conn:
+                timer.mark("connect")
+                cursor_class = aiomysql.DictCursor if as_dict else aiomysql.Cursor
+                async with conn.cursor(cursor_class) as cur:
+                    await cur.execute(sql, args)
+                    timer.mark("execute")
+                    if one:
+                        result = await cur.fetchone()
+                        timer.mark("fetch", rows=1 if result is not None else 0)
+                    else:
+                        result = list(await cur.fetchall())
+                        timer.mark("fetch", rows=len(result))
+        except Exception as e:
+            timer.finish(error=str(e))
+            raise MySQLQueryError(f"Ошибка выполнения запроса: {e}") from e
+        timer.finish()
+        rows_adapter = type(self).rows_adapter
+        if as_dict and rows_adapter is not None and result:
+            result = rows_adapter([result])[0] if one else rows_adapter(result)
+        return result
+
+    async def test_connection(self, timeout: Optional[float] = None) -> bool:
+        try:
+            await asyncio.wait_for(self._run("SELECT 1", one=True, as_dict=False), timeout)
+            return True
+        except Exception as e:
+            logger.warning("Тест подключения провален: %s", e)
+            return False
+
+    async def select(self, sql: str, params=None, args=None) -> List[Dict]:
+        return await self._run(sql, args if args is not None else params)
+
+    async def _search_page(self, page_sql: str, page_args, count_sql: str, bounded_sql: str, count_args,
+                           count_mode: str, count_bound: int, adapt: bool = True) -> Tuple[List[Dict], Optional[int]]:
+        """Страница и подсчёт по count_mode (как MySQLConnector._search_page), одновременно"""
+        if count_mode not in COUNT_MODES:
+            raise ValueError(f"Неизвестный режим подсчёта: {count_mode}")
+        if count_mode == "skip":
+            return await self._run(page_sql, page_args, adapt=adapt), None
+        if count_mode == "bounded":
+            count_sql, count_args = bounded_sql, (*count_args, count_bound)
+        count, films = await asyncio.gather(
+            self._run(count_sql, count_args, one=True, adapt=adapt),
+            self._run(page_sql, page_args, adapt=adapt),
+        )
+        return films, count['total']
+
+    async def search_by_keyword(self, keyword: str, offset: int = 0, limit: int = 10,
+                                count_mode: str = "exact",
+                                count_bound: int = DEFAULT_COUNT_BOUND) -> Tuple[List[Dict], Optional[int]]:
+        """Поиск по слову в названии; COUNT и страница — параллельно"""
+        pattern = f'%{keyword}%'
+        return await self._search_page(KEYWORD_PAGE_SQL, (pattern, limit, offset),
+                                       KEYWORD_COUNT_SQL, KEYWORD_BOUNDED_COUNT_SQL, (pattern,),
+                                       count_mode, count_bound)
+
+    async def get_available_genres(self) -> List[Dict]:
+        return await self._run(GENRES_SQL)
+
+    async def get_year_range(self) -> Tuple[int, int]:
+        result = await self._run(YEAR_RANGE_SQL, one=True, as_dict=False)
+        return result[0] or 1900, result[1] or 2025
+
+    async def search_by_genre_and_years(self, genre: str, start_year: int, end_year: int,
+                                        offset: int = 0, limit: int = 10, count_mode: str = "exact",
+                                        count_bound: int = DEFAULT_COUNT_BOUND) -> Tuple[List[Dict], Optional[int]]:
+        """Поиск по жанру и годам; COUNT и страница — параллельно"""
+        custom = type(self).genre_year_sql
+        page_sql, count_sql, bounded_sql = custom or (GENRE_YEAR_PAGE_SQL, GENRE_YEAR_COUNT_SQL,
+                                                      GENRE_YEAR_BOUNDED_COUNT_SQL)
+        return await self._search_page(page_sql, (genre, start_year, end_year, limit, offset),
+                                       count_sql, bounded_sql, (genre, start_year, end_year),
+                                       count_mode, count_bound, adapt=custom is None)
+
+    async def find_similar_films(self, film_id: int, genres: List[str], year: int, limit: int = 10) -> List[Dict]:
+        if not genres:
+            return []
+        sql = SIMILAR_FILMS_SQL.format(placeholders=', '.join(['%s'] * len(genres)))
+        return await self._run(sql, list(genres) + [film_id, year, limit])
+
+    async def get_film_details(self, film_id: int) -> Optional[Dict]:
+        rows = await self._run(FILM_DETAILS_SQL, {"fid": film_id})
+        return rows[0] if rows else None
+
+    async def search_advanced(self, title: Optional[str] = None, actor: Optional[str] = None,
+                              genre: Optional[str] = None, rating: Optional[str] = None,
+                              year_from: Optional[int] = None, year_to: Optional[int] = None,
+                              length_from: Optional[int] = None, length_to: Optional[int] = None,
+                              sort: str = "year_desc", limit: int = 100) -> List[Dict]:
+        sql, params = build_advanced_query(title, actor, genre, rating, year_from, year_to,
+                                           length_from, length_to, sort, limit)
+        return await self._run(sql, params)
+
+
+class _AsyncMongo:
+    """Общее для асинхронных клиентов MongoDB: ленивое подключение к коллекции логов"""
+
+    def __init__(self, timeout_ms: int = 5000):
+        _require(AsyncIOMotorClient, "motor")
+        self._uri: str = MONGODB_CONFIG["connection_string"]
+        self._db_name: str = MONGODB_CONFIG["database_name"] or ""
+        self._col_name: str = MONGODB_CONFIG["collection_name"]
+        self._timeout_ms = timeout_ms
+        self._client = None
+        self._col = None
+
+    def _collection(self):
+        if self._col is None:
+            self._client = AsyncIOMotorClient(self._uri, serverSelectionTimeoutMS=self._timeout_ms,
+                                              connectTimeoutMS=self._timeout_ms,
+                                              socketTimeoutMS=self._timeout_ms)
+            db = self._client[self._db_name] if self._db_name else self._client.get_default_database()
+            self._col = db[self._col_name]
+        return self._col
+
+    def _close_client(self):
+        if self._client is not None:
+            self._client.close()
+            self._client = None
+            self._col = None
+
+
+class AsyncLogWriter(_AsyncMongo):
+    """Асинхронный LogWriter; log_search_nowait() не ждёт записи"""
+
+    def __init__(self, timeout_ms: int = 5000):
+        super().__init__(timeout_ms)
+        self._pending: Set[asyncio.Task] = set()
+
+    async def test_connection(self) -> bool:
+        try:
+            self._collection()
+            await self._client.server_info()
+            return True
+        except Exception:
+            return False
+
+    async def log_search(self, search_type: str, params: Dict[str, Any], results_count: int) -> Optional[str]:
+        """Логируем один поиск"""
+        doc = {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "search_type": search_type,
+            "params": params,
+            "results_count": results_count,
+        }
+        try:
+            res = await self._collection().insert_one(doc)
+            return str(res.inserted_id)
+        except Exception as e:
+            raise MongoWriteError(f"Ошибка логирования: {e}") from e
+
+    def log_search_nowait(self, search_type: str, params: Dict[str, Any], results_count: int) -> asyncio.Task:
+        """Запись лога в фоне; ошибка только пишется в журнал"""
+        task = asyncio.get_running_loop().create_task(self.log_search(search_type, params, results_count))
+        self._pending.add(task)
+        task.add_done_callback(self._done)
+        return task
+
+    def _done(self, task: asyncio.Task):
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Лог поиска не записан: %s", task.exception())
+
+    async def flush(self):
+        """Дождаться фоновых записей (перед закрытием)"""
+        if self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
+
+    async def close_connection(self) -> None:
+        await self.flush()
+        self._close_client()
+
+
+class AsyncLogStats(_AsyncMongo):
+    """Асинхронный LogStats: те же конвейеры агрегации"""
+
+    async def get_popular_searches(self, limit: int = 5) -> List[Dict[str, Any]]:
+        try:
+            return await self._collection().aggregate(popular_pipeline(limit)).to_list(length=None)
+        except Exception as e:
+            raise MongoStatsError(f"Не удалось получить популярные запросы: {e}") from e
+
+    async def get_recent_searches(self, limit: int = 5) -> List[Dict[str, Any]]:
+        try:
+            return await self._collection().aggregate(recent_pipeline(limit)).to_list(length=None)
+        except Exception as e:
+            raise MongoStatsError(f"Не удалось получить последние запросы: {e}") from e
+
+    async def close(self) -> None:
+        self._close_client()
+
+
+async def _demo(keyword: str, concurrency: int):
+    """Одновременные поиски на одном цикле событий: python async_data.py love 100"""
+    async with AsyncMySQLConnector() as db:
+        writer = AsyncLogWriter()
+        start = time.perf_counter()
+        results = await asyncio.gather(*(db.search_by_keyword(keyword) for _ in range(concurrency)))
+        for films, total in results:
+            writer.log_search_nowait("keyword", {"keyword": keyword}, total)
+        elapsed = time.perf_counter() - start
+        await writer.close_connection()
+    print(f"{concurrency} searches for '{keyword}' in {elapsed * 1000:.0f} ms "
+          f"({results[0][1]} matches each)")
+
+
+def shape_mismatches(sync_rows: List[Dict], async_rows: List[Dict]) -> List[str]:
+    """Расхождения формы строк синхронного и асинхронного слоя (пусто — совпадают)"""
+    problems = []
+    if len(sync_rows) != len(async_rows):
+        problems.append(f"rows: sync {len(sync_rows)}, async {len(async_rows)}")
+    for i, (s_row, a_row) in enumerate(zip(sync_rows, async_rows)):
+        if set(s_row) != set(a_row):
+            problems.append(f"row {i}: sync keys {sorted(s_row)}, async keys {sorted(a_row)}")
+            break
+    return problems
+
+
+async def _parity(keyword: str, genre: str, start_year: int, end_year: int) -> int:
+    """
+    Сверка формы строк с MySQLConnector на одних и тех же запросах:
+    python async_data.py --parity [--tmdb]
+    """
+    from mysql_connector import MySQLConnector
+    sync_db = MySQLConnector()
+    cases = {
+        "search_by_keyword": (keyword,),
+        "search_by_genre_and_years": (genre, start_year, end_year),
+    }
+    failed = 0
+    async with AsyncMySQLConnector() as db:
+        for name, args in cases.items():
+            sync_rows, sync_total = getattr(sync_db, name)(*args)
+            async_rows, async_total = await getattr(db, name)(*args)
+            problems = shape_mismatches(list(sync_rows), async_rows)
+            if sync_total != async_total:
+                problems.append(f"total: sync {sync_total}, async {async_total}")
+            print(f"{'✅' if not problems else '❌'} {name}{args}: {len(async_rows)} rows")
+            for problem in problems:
+                print(f"   {problem}")
+            failed += bool(problems)
+    sync_db.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    import sys
+    argv = sys.argv[1:]
+    if "--tmdb" in argv:
+        argv.remove("--tmdb")
+        import Adapter_exe
+        Adapter_exe.install()
+    if argv and argv[0] == "--parity":
+        sys.exit(asyncio.run(_parity(argv[1] if len(argv) > 1 else "love",
+                                     argv[2] if len(argv) > 2 else "Drama", 1900, 2100)))
+    asyncio.run(_demo(argv[0] if argv else "love",
+                      int(argv[1]) if len(argv) > 1 else 50))
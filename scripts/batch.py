@@ -0,0 +1,367 @@
+# batch.py - Пакетный (неинтерактивный) режим поиска: спецификации из файла/stdin -> JSON Lines, CSV или таблица
+"""
+Читает поисковые спецификации, выполняет их параллельно пулом потоков поверх
+одного MySQLConnector с пулом соединений и потоково пишет результаты в том же
+порядке, что и на входе. Логи поиска копятся и пишутся в MongoDB пачками
+(insert_many), а не по одному документу на запрос.
+
+Формат входа — по одной спецификации в строке; пустые строки и '#' пропускаются:
+    {"id": "r1", "type": "keyword", "q": "love", "limit": 50}
+    {"type": "genre_year", "genre": "Drama", "from": 2000, "to": 2010, "limit": 100, "offset": 0}
+    {"type": "advanced", "actor": "GUINESS", "rating": "PG", "sort": "title_asc", "limit": 200}
+    keyword love
+    genre Science Fiction 2000-2010
+
+Необязательные поля: id (по умолчанию — номер строки), limit (10), offset (0),
+count (exact|skip|bounded — для keyword/genre_year).
+
+Использование:
+    python batch.py specs.jsonl -o results.jsonl --workers 8
+    cat specs.txt | python batch.py - --format csv > report.csv
+    python main.py --batch specs.jsonl --format csv -o report.csv
+    python batch.py specs.txt --format table | less -R
+"""
+import sys
+import csv
+import json
+import logging
+import argparse
+import contextlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from mysql_connector import MySQLConnector, COUNT_MODES, ADVANCED_SORTS
+
+DEFAULT_WORKERS = 8
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 10000
+LOG_BATCH = 500          # документов в одном insert_many
+AHEAD_PER_WORKER = 4     # сколько спецификаций держать в работе на поток (ограничивает память)
+FORMATS = ("jsonl", "csv", "table")
+CSV_COLUMNS = ("spec_id", "search_type", "total", "film_id", "title", "release_year",
+               "length", "rating", "genres", "description")
+ADVANCED_FIELDS = {"title": str, "actor": str, "genre": str, "rating": str,
+                   "year_from": int, "year_to": int, "length_from": int, "length_to": int}
+
+logger = logging.getLogger(__name__)
+
+
+class BatchSpecError(Exception):
+    """Некорректная строка спецификации"""
+    pass
+
+
+# ---------- Разбор спецификаций ----------
+
+def _years(text: str) -> Tuple[int, int]:
+    start, _, end = text.partition("-")
+    return int(start), int(end or start)
+
+
+def _bounded(spec: Dict[str, Any], name: str, default: int, lo: int, hi: int) -> int:
+    try:
+        value = int(spec.get(name, default))
+    except (TypeError, ValueError):
+        raise BatchSpecError(f"'{name}' must be an integer")
+    if not lo <= value <= hi:
+        raise BatchSpecError(f"'{name}' must be between {lo} and {hi}")
+    return value
+
+
+def _from_text(line: str) -> Dict[str, Any]:
+    """Короткая запись: 'keyword <текст>' или 'genre <жанр> <год|год-год>'"""
+    kind, _, rest = line.partition(" ")
+    rest = rest.strip()
+    if kind == "keyword" and rest:
+        return {"type": "keyword", "q": rest}
+    if kind == "genre":
+        genre, _, years = rest.rpartition(" ")
+        try:
+            start, end = _years(years)
+        except ValueError:
+            raise BatchSpecError("expected 'genre <name> <year|from-to>'")
+        if genre:
+            return {"type": "genre_year", "genre": genre, "from": start, "to": end}
+    raise BatchSpecError("expected a JSON object, 'keyword <text>' or 'genre <name> <year|from-to>'")
+
+
+def parse_spec(line: str, line_no: int) -> Dict[str, Any]:
+    """Строка входа -> нормализованная спецификация {id, type, params, limit, offset, count_mode}"""
+    if line.startswith("{"):
+        try:
+            raw = json.loads(line)
+        except ValueError as e:
+            raise BatchSpecError(f"invalid JSON: {e}")
+    else:
+        raw = _from_text(line)
+
+    kind = raw.get("type")
+    if kind == "keyword":
+        q = str(raw.get("q") or raw.get("keyword") or "").strip()
+        if not q:
+            raise BatchSpecError("keyword spec needs 'q'")
+        params = {"keyword": q}
+    elif kind == "genre_year":
+        genre = str(raw.get("genre") or "").strip()
+        if not genre:
+            raise BatchSpecError("genre_year spec needs 'genre'")
+        start = _bounded(raw, "from", 0, 1800, 2200)
+        end = _bounded(raw, "to", start, start, 2200)
+        params = {"genre": genre, "start_year": start, "end_year": end}
+    elif kind == "advanced":
+        params = {}
+        for name, cast in ADVANCED_FIELDS.items():
+            if raw.get(name) not in (None, ""):
+                try:
+                    params[name] = cast(raw[name])
+                except (TypeError, ValueError):
+                    raise BatchSpecError(f"'{name}' must be {cast.__name__}")
+        if not params:
+            raise BatchSpecError("advanced spec needs at least one filter")
+        sort = raw.get("sort", "year_desc")
+        if sort not in ADVANCED_SORTS:
+            raise BatchSpecError(f"'sort' must be one of {', '.join(ADVANCED_SORTS)}")
+        params["sort"] = sort
+    else:
+        raise BatchSpecError("'type' must be keyword, genre_year or advanced")
+
+    count_mode = raw.get("count", "exact")
+    if count_mode not in COUNT_MODES:
+        raise BatchSpecError(f"'count' must be one of {', '.join(COUNT_MODES)}")
+    return {
+        "id": str(raw.get("id", line_no)),
+        "type": kind,
+        "params": params,
+        "limit": _bounded(raw, "limit", DEFAULT_LIMIT, 1, MAX_LIMIT),
+        "offset": _bounded(raw, "offset", 0, 0, 10 ** 9),
+        "count_mode": count_mode,
+    }
+
+
+def read_specs(stream: TextIO) -> Iterator[Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]]:
+    """Лениво читает вход: (spec, None) или (None, запись об ошибке разбора)"""
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            yield parse_spec(line, line_no), None
+        except BatchSpecError as e:
+            yield None, {"id": str(line_no), "type": None, "error": f"line {line_no}: {e}"}
+
+
+# ---------- Выполнение ----------
+
+def run_spec(db: MySQLConnector, spec: Dict[str, Any]) -> Dict[str, Any]:
+    """Выполняет одну спецификацию; ошибки БД не прерывают пакет, а попадают в результат"""
+    p = spec["params"]
+    result = {"id": spec["id"], "type": spec["type"], "params": p}
+    try:
+        if spec["type"] == "keyword":
+            films, total = db.search_by_keyword(p["keyword"], spec["offset"], spec["limit"],
+                                                count_mode=spec["count_mode"])
+        elif spec["type"] == "genre_year":
+            films, total = db.search_by_genre_and_years(p["genre"], p["start_year"], p["end_year"],
+                                                        spec["offset"], spec["limit"],
+                                                        count_mode=spec["count_mode"])
+        else:
+            films = db.search_advanced(limit=spec["limit"], **p)
+            total = len(films)
+    except Exception as e:
+        logger.error(f"Спецификация {spec['id']}: {e}")
+        result["error"] = str(e)
+        return result
+    result["total"] = total
+    result["results"] = films
+    return result
+
+
+def _ordered(pool: ThreadPoolExecutor, fn: Callable, items: Iterable, window: int) -> Iterator:
+    """Как pool.map, но не больше window задач в полёте: вход читается лениво, порядок сохраняется"""
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class _BulkLogger:
+    """Копит логи поиска и сбрасывает их пачками в отдельном потоке"""
+
+    def __init__(self, batch_size: int = LOG_BATCH):
+        from log_writer import LogWriter
+        self.writer = LogWriter()
+        self.batch_size = batch_size
+        self.buffer: List[Tuple[str, Dict[str, Any], int, str]] = []
+        self.written = 0
+        self.failed = 0
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="batch-log")
+
+    def add(self, search_type: str, params: Dict[str, Any], count: int):
+        # Время фиксируем сейчас: пачка пишется позже, и у всех записей было бы одно время сброса
+        self.buffer.append((search_type, params, count, datetime.utcnow().isoformat() + "Z"))
+        if len(self.buffer) >= self.batch_size:
+            self._pool.submit(self._write, self.buffer)
+            self.buffer = []
+
+    def _write(self, entries):
+        try:
+            self.written += self.writer.log_searches(entries)
+        except Exception as e:
+            self.failed += len(entries)
+            logger.error(f"Не удалось записать логи ({len(entries)}): {e}")
+
+    def close(self):
+        if self.buffer:
+            self._pool.submit(self._write, self.buffer)
+            self.buffer = []
+        self._pool.shutdown(wait=True)
+        self.writer.close_connection()
+
+
+# ---------- Вывод ----------
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+class _JsonLinesSink:
+    """Одна строка JSON на спецификацию (вместе с найденными фильмами)"""
+
+    def __init__(self, out: TextIO):
+        self.out = out
+
+    def write(self, result: Dict[str, Any]):
+        self.out.write(json.dumps(result, ensure_ascii=False, default=_json_default) + "\n")
+
+
+class _CsvSink:
+    """Одна строка CSV на фильм; для спецификации без результатов или с ошибкой — одна пустая строка"""
+
+    def __init__(self, out: TextIO):
+        self.writer = csv.DictWriter(out, fieldnames=CSV_COLUMNS + ("error",), extrasaction="ignore")
+        self.writer.writeheader()
+
+    def write(self, result: Dict[str, Any]):
+        head = {"spec_id": result["id"], "search_type": result["type"], "total": result.get("total")}
+        films = result.get("results")
+        if not films:
+            self.writer.writerow(dict(head, error=result.get("error", "")))
+            return
+        self.writer.writerows(dict(film, **head) for film in films)
+
+
+class _TableSink:
+    """Человекочитаемый отчёт: заголовок спецификации и потоковая таблица Formatter.write_films_table"""
+
+    def __init__(self, out: TextIO):
+        from formatter import Formatter
+        self.out = out
+        self.formatter = Formatter()
+
+    def write(self, result: Dict[str, Any]):
+        params = ", ".join(f"{k}={v}" for k, v in result.get("params", {}).items())
+        self.out.write(f"\n[{result['id']}] {result['type']} {params}\n")
+        if "error" in result:
+            self.out.write(f"error: {result['error']}\n")
+            return
+        self.out.write(f"total: {result['total'] if result['total'] is not None else '?'}\n")
+        self.formatter.write_films_table(result["results"], self.out)
+
+
+SINKS = {"jsonl": _JsonLinesSink, "csv": _CsvSink, "table": _TableSink}
+
+
+def run_batch(specs_in: TextIO, out: TextIO, fmt: str = "jsonl", workers: int = DEFAULT_WORKERS,
+              log: bool = True, db: Optional[MySQLConnector] = None) -> Dict[str, int]:
+    """Выполняет все спецификации и пишет результаты в out; возвращает сводку"""
+    own_db = db is None
+    if own_db:
+        db = MySQLConnector(pool_size=workers)
+    sink = SINKS[fmt](out)
+    bulk = _BulkLogger() if log else None
+    summary = {"specs": 0, "errors": 0, "rows": 0}
+
+    def work(item):
+        spec, error = item
+        return error if spec is None else run_spec(db, spec)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as pool:
+            for result in _ordered(pool, work, read_specs(specs_in), workers * AHEAD_PER_WORKER):
+                summary["specs"] += 1
+                if "error" in result:
+                    summary["errors"] += 1
+                else:
+                    summary["rows"] += len(result["results"])
+                    if bulk is not None:
+                        total = result["total"]
+                        bulk.add(result["type"], result["params"],
+                                 total if total is not None else len(result["results"]))
+                sink.write(result)
+    finally:
+        if bulk is not None:
+            bulk.close()
+            summary["logged"] = bulk.written
+            summary["log_failed"] = bulk.failed
+        if own_db:
+            db.close()
+    return summary
+
+
+def add_batch_arguments(parser: argparse.ArgumentParser):
+    """Общие опции пакетного режима (batch.py и main.py --batch)"""
+    parser.add_argument("--format", choices=FORMATS, default="jsonl", help="формат вывода")
+    parser.add_argument("-o", "--output", metavar="FILE", help="файл результатов (по умолчанию stdout)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="параллельных запросов к MySQL")
+    parser.add_argument("--no-log", action="store_true", help="не писать логи поиска в MongoDB")
+
+
+def run_from_args(specs_path: str, args) -> int:
+    """Открывает вход/выход по аргументам CLI, выполняет пакет, сводку печатает в stderr"""
+    specs_in = sys.stdin if specs_path == "-" else open(specs_path, encoding="utf-8")
+    stdout = sys.stdout
+    out = stdout if not args.output else open(args.output, "w", encoding="utf-8", newline="")
+    try:
+        # Результаты идут только в out: диагностика адаптера и коннектора (print) —
+        # в stderr, иначе она перемешается с JSONL/CSV в stdout
+        with contextlib.redirect_stdout(sys.stderr):
+            summary = run_batch(specs_in, out, args.format, max(1, args.workers), log=not args.no_log)
+    finally:
+        if specs_in is not sys.stdin:
+            specs_in.close()
+        if out is not stdout:
+            out.close()
+    print(f"📦 Batch: {summary['specs']} specs, {summary['rows']} rows, {summary['errors']} errors"
+          + (f", {summary['logged']} logged" if "logged" in summary else ""), file=sys.stderr)
+    return 1 if summary["errors"] else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Batch film search: specs in, JSON Lines/CSV out")
+    parser.add_argument("specs", help="файл спецификаций или '-' для stdin")
+    add_batch_arguments(parser)
+    parser.add_argument("--tmdb", action="store_true", help="база в схеме TMDB: включить Adapter_exe")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING, stream=sys.stderr,
+                        format="%(asctime)s %(levelname)s %(message)s")
+    if args.tmdb:
+        # Адаптер печатает баннер при импорте — уводим его в stderr, чтобы не портить вывод
+        with contextlib.redirect_stdout(sys.stderr):
+            import Adapter_exe
+            Adapter_exe.install()
+    return run_from_args(args.specs, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
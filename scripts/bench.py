@@ -0,0 +1,464 @@
+# bench.py - Набор бенчмарков горячих путей: коннектор, адаптер TMDB, кэш, избранное, форматтер, статистика
+"""
+Прогоняет бенчмарки против локальных MySQL и MongoDB (из config.py), пишет
+результат в JSON и сравнивает с сохранённым базовым замером — регрессия по
+медиане сверх порога даёт код возврата 1. Базовые замеры хранятся отдельно
+для каждого размера данных (метка = --label или число фильмов в базе), так что
+10k и 1M фильмов не сравниваются между собой.
+
+Использование:
+    python bench.py                                 # всё, сравнение с базой
+    python bench.py --prepare small --database bench_synth --mongo-collection bench_logs --save-baseline
+                                                    # засеять отдельную базу datagen'ом и сохранить базу
+    python bench.py --tmdb --only connector. --repeat 20
+    python bench.py --skip mongo --threshold 0.2
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import io
+import itertools
+import platform
+import argparse
+import tempfile
+import statistics
+import contextlib
+import subprocess
+from typing import Any, Callable, Dict, List, Optional
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BENCH_DIR = os.path.join(os.path.expanduser("~"), ".sakila_cache", "bench")
+REGRESSION_THRESHOLD = 0.10   # +10% к медиане — регрессия
+NOISE_FLOOR_MS = 0.05         # разница меньше этого не считается
+FAVORITES_SIZES = (1_000, 10_000)
+STREAM_ROWS = 10_000          # строк для сравнения tabulate и write_films_table
+
+KEYWORDS = ("love", "the", "dragon", "zz")      # частое / очень частое / среднее / почти пустое
+SAMPLE_SQL = [
+    """SELECT f.film_id, f.title, f.release_year, f.length, f.rating, f.description,
+              GROUP_CONCAT(DISTINCT c.name ORDER BY c.name SEPARATOR ', ') as genres
+       FROM film f
+       LEFT JOIN film_category fc ON f.film_id = fc.film_id
+       LEFT JOIN category c ON fc.category_id = c.category_id
+       WHERE f.title LIKE %s
+       GROUP BY f.film_id, f.title, f.release_year, f.length, f.rating, f.description
+       ORDER BY f.title LIMIT %s OFFSET %s""",
+    """SELECT f.title, GROUP_CONCAT(CONCAT(a.first_name, ' ', a.last_name) ORDER BY a.last_name SEPARATOR ', ') actors
+       FROM film f JOIN film_actor fa ON fa.film_id = f.film_id JOIN actor a ON a.actor_id = fa.actor_id
+       WHERE f.film_id = %s GROUP BY f.title""",
+    """SELECT c.category_id, c.name, COUNT(fc.film_id) as film_count
+       FROM category c LEFT JOIN film_category fc ON c.category_id = fc.category_id
+       GROUP BY c.category_id, c.name ORDER BY c.name""",
+]
+
+
+class Benchmark:
+    """setup(ctx) -> op; op() вызывается number раз на замер, замеров repeat"""
+
+    def __init__(self, name: str, needs: str, setup: Callable[["BenchContext"], Callable[[], Any]],
+                 number: int = 1):
+        self.name = name
+        self.needs = needs   # "mysql" | "mongo" | "gui" | ""
+        self.setup = setup
+        self.number = number
+
+
+BENCHMARKS: List[Benchmark] = []
+
+
+def bench(name: str, needs: str = "", number: int = 1):
+    def decorator(setup):
+        BENCHMARKS.append(Benchmark(name, needs, setup, number))
+        return setup
+    return decorator
+
+
+class BenchContext:
+    """Общие ресурсы бенчмарков; подключения создаются лениво"""
+
+    def __init__(self, tmp_dir: str):
+        self.tmp_dir = tmp_dir
+        self._db = None
+        self._stats = None
+        self._gui = None
+
+    @property
+    def db(self):
+        if self._db is None:
+            from mysql_connector import MySQLConnector
+            self._db = MySQLConnector()
+        return self._db
+
+    @property
+    def stats(self):
+        if self._stats is None:
+            from log_stats import LogStats
+            self._stats = LogStats()
+        return self._stats
+
+    @property
+    def gui(self):
+        """main_gui3 с файлами кэша и избранного во временном каталоге (данные пользователя не трогаются)"""
+        if self._gui is None:
+            import main_gui3
+            main_gui3.CACHE_FILE = os.path.join(self.tmp_dir, "search_cache.pkl")
+            main_gui3.FAVORITES_FILE = os.path.join(self.tmp_dir, "favorites.json")
+            self._gui = main_gui3
+        return self._gui
+
+    def sample_films(self, n: int) -> List[Dict]:
+        """n фильмов в формате Sakila (как их отдаёт коннектор) из генератора datagen"""
+        from datagen import CatalogGenerator, CHUNK_FILMS
+        gen = CatalogGenerator(max(n, CHUNK_FILMS), seed=7)
+        rows = []
+        chunk = 0
+        while len(rows) < n:
+            part = gen.film_chunk(chunk, ("sakila",))
+            rows += [{"film_id": fid, "title": title, "release_year": year, "length": length,
+                      "rating": rating, "description": desc, "genres": "Drama, Comedy"}
+                     for fid, title, desc, year, length, rating in part["film"]]
+            chunk += 1
+        return rows[:n]
+
+    def sample_tmdb_rows(self, n: int) -> List[Dict]:
+        from datagen import CatalogGenerator, COLUMNS
+        gen = CatalogGenerator(max(n, 1), seed=7)
+        cols = COLUMNS["movies"]
+        rows = []
+        chunk = 0
+        while len(rows) < n:
+            rows += [dict(zip(cols, r)) for r in gen.film_chunk(chunk, ("tmdb",))["movies"]]
+            chunk += 1
+        return rows[:n]
+
+    def close(self):
+        if self._stats is not None:
+            self._stats.close()
+
+
+# ---------- Коннектор ----------
+@bench("connector.search_by_keyword", needs="mysql")
+def _b_keyword(ctx):
+    kw = itertools.cycle(KEYWORDS)
+    return lambda: ctx.db.search_by_keyword(next(kw), 0, 10)
+
+
+@bench("connector.search_by_keyword.deep_page", needs="mysql")
+def _b_keyword_deep(ctx):
+    _, total = ctx.db.search_by_keyword(KEYWORDS[0], 0, 1)
+    offset = max(0, total - 10)
+    return lambda: ctx.db.search_by_keyword(KEYWORDS[0], offset, 10)
+
+
+@bench("connector.search_by_genre_and_years", needs="mysql")
+def _b_genre_years(ctx):
+    genres = sorted(ctx.db.get_available_genres(), key=lambda g: g.get("film_count") or 0, reverse=True)
+    genre = genres[0]["name"]
+    _, max_year = ctx.db.get_year_range()
+    return lambda: ctx.db.search_by_genre_and_years(genre, max_year - 10, max_year, 0, 10)
+
+
+@bench("connector.find_similar_films", needs="mysql")
+def _b_similar(ctx):
+    films, _ = ctx.db.search_by_keyword(KEYWORDS[0], 0, 1)
+    film = films[0]
+    genres = [g.strip() for g in (film.get("genres") or "").split(",") if g.strip()]
+    return lambda: ctx.db.find_similar_films(film["film_id"], genres, film.get("release_year") or 2000, 10)
+
+
+# ---------- Адаптер TMDB ----------
+@bench("adapter.adapt_sql", number=100)
+def _b_adapt_sql(ctx):
+    from Adapter_exe import TMDBAdapterV2
+    sqls = itertools.cycle(SAMPLE_SQL)
+    return lambda: TMDBAdapterV2.adapt_sql(next(sqls))
+
+
+@bench("adapter.adapt_results.1000")
+def _b_adapt_results(ctx):
+    from Adapter_exe import TMDBAdapterV2
+    rows = ctx.sample_tmdb_rows(1000)
+    return lambda: TMDBAdapterV2.adapt_results(rows)
+
+
+# ---------- Кэш поиска ----------
+def _cache_key(i: int) -> str:
+    return hashlib.md5(json.dumps({"type": "advanced", "i": i}).encode()).hexdigest()
+
+
+@bench("cache.search_cache.set", needs="gui")
+def _b_cache_set(ctx):
+    cache = ctx.gui.SearchCache()
+    value = ctx.sample_films(100)
+    counter = itertools.count()
+    return lambda: cache.set(_cache_key(next(counter)), value)
+
+
+@bench("cache.search_cache.get", needs="gui", number=1000)
+def _b_cache_get(ctx):
+    cache = ctx.gui.SearchCache()
+    value = ctx.sample_films(100)
+    # Записи SearchCache — (штамп таблиц, значение); set() тут не годится: он пишет файл на каждый вызов
+    stamp = ctx.gui.change_detector.stamp(ctx.gui.change_detector.CAST_TABLES)
+    for i in range(cache.max_size):
+        cache.cache.set(_cache_key(i), (stamp, value))
+    keys = itertools.cycle([_cache_key(i) for i in range(cache.max_size * 2)])  # половина — промахи
+    return lambda: cache.get(next(keys))
+
+
+# ---------- Избранное ----------
+def _favorites_bench(size: int):
+    def setup(ctx):
+        store = ctx.gui.FavoritesStore()
+        films = ctx.sample_films(size)
+        store.replace(films, {})
+        next_id = itertools.count(size + 1)
+        template = dict(films[0])
+        return lambda: store.add(dict(template, film_id=next(next_id)))
+    return setup
+
+
+for _size in FAVORITES_SIZES:
+    bench(f"favorites.add@{_size}", needs="gui")(_favorites_bench(_size))
+
+
+# ---------- Форматтер ----------
+@bench("formatter.format_films_table.10", number=20)
+def _b_format_small(ctx):
+    from formatter import Formatter
+    fmt, films = Formatter(), ctx.sample_films(10)
+    return lambda: fmt.format_films_table(films)
+
+
+@bench("formatter.format_films_table.500")
+def _b_format_large(ctx):
+    from formatter import Formatter
+    fmt, films = Formatter(), ctx.sample_films(500)
+    return lambda: fmt.format_films_table(films)
+
+
+# tabulate против потокового рендерера на большой выдаче (вывод в StringIO: без TTY цвет отключается)
+@bench(f"formatter.format_films_table.{STREAM_ROWS}")
+def _b_format_tabulate(ctx):
+    from formatter import Formatter
+    fmt, films = Formatter(), ctx.sample_films(STREAM_ROWS)
+    return lambda: fmt.format_films_table(films)
+
+
+@bench(f"formatter.write_films_table.{STREAM_ROWS}")
+def _b_write_table(ctx):
+    from formatter import Formatter
+    fmt, films = Formatter(), ctx.sample_films(STREAM_ROWS)
+    return lambda: fmt.write_films_table(films, io.StringIO(), color=True)
+
+
+@bench(f"formatter.write_films_table.{STREAM_ROWS}.plain")
+def _b_write_table_plain(ctx):
+    from formatter import Formatter
+    fmt, films = Formatter(), ctx.sample_films(STREAM_ROWS)
+    return lambda: fmt.write_films_table(films, io.StringIO())
+
+
+# ---------- Статистика логов ----------
+@bench("logstats.get_popular_searches", needs="mongo")
+def _b_popular(ctx):
+    return lambda: ctx.stats.get_popular_searches(5)
+
+
+@bench("logstats.get_recent_searches", needs="mongo")
+def _b_recent(ctx):
+    return lambda: ctx.stats.get_recent_searches(5)
+
+
+# ---------- Прогон ----------
+def run_benchmark(b: Benchmark, ctx: BenchContext, repeat: int, warmup: int) -> Dict[str, Any]:
+    # adapt_sql и прочие печатают отладку — вывод уходит в /dev/null, стоимость записи сохраняется
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        op = b.setup(ctx)
+        for _ in range(warmup):
+            op()
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for _ in range(b.number):
+                op()
+            samples.append((time.perf_counter() - start) * 1000 / b.number)
+    samples.sort()
+    return {
+        "median_ms": statistics.median(samples),
+        "mean_ms": statistics.fmean(samples),
+        "min_ms": samples[0],
+        "p95_ms": samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+        "stdev_ms": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "repeat": repeat,
+        "number": b.number,
+    }
+
+
+def dataset_info(ctx: BenchContext, skip: List[str]) -> Dict[str, Any]:
+    """Размер данных, на которых идёт замер (для метки и проверки сравнимости)"""
+    info: Dict[str, Any] = {}
+    if "mysql" not in skip:
+        try:
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                info["films"] = ctx.db.select("SELECT COUNT(*) AS n FROM film")[0]["n"]
+        except Exception as e:
+            info["mysql_error"] = str(e)
+    if "mongo" not in skip:
+        try:
+            info["logs"] = ctx.stats._get_collection().estimated_document_count()
+        except Exception as e:
+            info["mongo_error"] = str(e)
+    return info
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True,
+                              text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """Печатает сравнение с базой; возвращает имена регрессировавших бенчмарков"""
+    regressions = []
+    print(f"\n{'benchmark':<42} {'base ms':>10} {'now ms':>10} {'change':>8}")
+    for name, res in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<42} {'—':>10} {res['median_ms']:>10.3f} {'new':>8}")
+            continue
+        before, now = base["median_ms"], res["median_ms"]
+        change = (now - before) / before if before else 0.0
+        bad = change > threshold and now - before > NOISE_FLOOR_MS
+        mark = "❌" if bad else ("✅" if change < -threshold else "  ")
+        print(f"{name:<42} {before:>10.3f} {now:>10.3f} {change:>+7.1%} {mark}")
+        if bad:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Hot-path benchmark suite")
+    parser.add_argument("--only", action="append", default=[], help="префикс имени (можно несколько раз)")
+    parser.add_argument("--skip", action="append", default=[], choices=("mysql", "mongo", "gui"),
+                        help="пропустить группу по зависимости")
+    parser.add_argument("--repeat", type=int, default=10, help="замеров на бенчмарк")
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--tmdb", action="store_true", help="база в схеме TMDB: включить Adapter_exe")
+    parser.add_argument("--prepare", metavar="SCALE",
+                        help="сначала засеять --database / --mongo-collection (datagen, с --drop!)")
+    parser.add_argument("--database", help="база MySQL для замеров (и для --prepare) вместо базы из config.py")
+    parser.add_argument("--mongo-collection", help="коллекция логов для замеров (и для --prepare)")
+    parser.add_argument("--allow-app-database", action="store_true",
+                        help="разрешить --prepare пересоздать базу/коллекцию самого приложения")
+    parser.add_argument("--label", help="метка набора данных (по умолчанию films<N>)")
+    parser.add_argument("--out", default=BENCH_DIR, help="каталог результатов")
+    parser.add_argument("--baseline", help="файл базового замера (по умолчанию <out>/baseline_<label>.json)")
+    parser.add_argument("--save-baseline", action="store_true", help="сохранить результат как базу")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--list", action="store_true", help="только список бенчмарков")
+    args = parser.parse_args(argv)
+
+    selected = [b for b in BENCHMARKS
+                if (not args.only or any(b.name.startswith(p) for p in args.only)) and b.needs not in args.skip]
+    if args.list:
+        for b in selected:
+            print(f"{b.name:<42} {b.needs or '-'}")
+        return 0
+
+    if args.tmdb:
+        import Adapter_exe
+        Adapter_exe.install()
+    from config import MYSQL_CONFIG, MONGODB_CONFIG
+    if args.prepare:
+        # datagen --drop пересоздаёт таблицы каталога, а логи навсегда сдвигают статистику:
+        # только в явно указанную отдельную базу и коллекцию
+        seed_mongo = "mongo" not in args.skip
+        if not args.database or (seed_mongo and not args.mongo_collection):
+            parser.error("--prepare requires a scratch --database"
+                         + (" and --mongo-collection" if seed_mongo else ""))
+        if not args.allow_app_database:
+            if args.database == MYSQL_CONFIG["database"]:
+                parser.error(f"--database {args.database} is the app database; "
+                             "pass --allow-app-database to drop it anyway")
+            if seed_mongo and args.mongo_collection == MONGODB_CONFIG["collection_name"]:
+                parser.error(f"--mongo-collection {args.mongo_collection} is the app log collection; "
+                             "pass --allow-app-database to seed it anyway")
+        import datagen
+        datagen.main(["--scale", args.prepare, "--database", args.database, "--drop",
+                      "--schema", "tmdb" if args.tmdb else "sakila"]
+                     + (["--mongo-logs", str(min(datagen.SCALES[args.prepare], 1_000_000)),
+                         "--mongo-collection", args.mongo_collection] if seed_mongo else []))
+    # Замеры идут по той же базе и коллекции, что засеяны (коннекторы читают конфиг при создании)
+    if args.database:
+        MYSQL_CONFIG["database"] = args.database
+    if args.mongo_collection:
+        MONGODB_CONFIG["collection_name"] = args.mongo_collection
+
+    tmp_dir = tempfile.mkdtemp(prefix="sakila_bench_")
+    ctx = BenchContext(tmp_dir)
+    try:
+        dataset = dataset_info(ctx, args.skip)
+        label = args.label or (f"films{dataset['films']}" if "films" in dataset else "nodb")
+        results: Dict[str, Dict] = {}
+        errors: Dict[str, str] = {}
+        for b in selected:
+            try:
+                res = run_benchmark(b, ctx, args.repeat, args.warmup)
+            except Exception as e:
+                errors[b.name] = f"{type(e).__name__}: {e}"
+                print(f"⚠️  {b.name}: {errors[b.name]}")
+                continue
+            results[b.name] = res
+            print(f"⏱  {b.name:<42} {res['median_ms']:>10.3f} ms (p95 {res['p95_ms']:.3f})")
+    finally:
+        ctx.close()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "label": label,
+            "dataset": dataset,
+            "schema": "tmdb" if args.tmdb else "sakila",
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": args.repeat,
+        },
+        "results": results,
+        "errors": errors,
+    }
+    os.makedirs(args.out, exist_ok=True)
+    out_path = os.path.join(args.out, f"bench_{time.strftime('%Y%m%d_%H%M%S')}_{label}.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 {out_path}")
+
+    baseline_path = args.baseline or os.path.join(args.out, f"baseline_{label}.json")
+    if args.save_baseline:
+        shutil.copyfile(out_path, baseline_path)
+        print(f"📌 Baseline saved: {baseline_path}")
+        return 0
+    if not os.path.exists(baseline_path):
+        print(f"ℹ️  No baseline at {baseline_path} (use --save-baseline)")
+        return 0
+    with open(baseline_path, encoding="utf-8") as f:
+        base = json.load(f)
+    if base["meta"].get("dataset") != dataset:
+        print(f"⚠️  Dataset differs from baseline: {base['meta'].get('dataset')} vs {dataset}")
+    regressions = compare(results, base["results"], args.threshold)
+    if regressions:
+        print(f"\n❌ Regressions (> {args.threshold:.0%}): {', '.join(regressions)}")
+        return 1
+    print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+# change_detector.py - Отслеживание изменений каталога по дешёвым отпечаткам таблиц для точечной инвалидации кэшей
+"""
+Детектор периодически (в фоновом потоке) снимает отпечаток каждой таблицы
+каталога и сравнивает с прошлым. Кэши привязываются к таблицам, от которых
+зависят, двумя способами:
+
+    stamp / is_fresh   запись кэша хранит отпечатки своих таблиц на момент
+                       вычисления; при чтении запись годна, пока они совпадают
+                       с текущими (подходит и для кэшей, сохранённых на диск)
+    watch              колбэк вызывается из потока детектора с множеством
+                       изменившихся таблиц (для перезагрузки справочников и т. п.)
+
+Поэтому TTL кэшей можно делать длинными: изменение в БД инвалидирует только
+записи, читавшие изменившиеся таблицы, не позже чем через interval секунд.
+
+Таблицы называются по схеме Sakila (film, category, film_category, actor,
+film_actor); для базы в схеме TMDB (есть таблица movies) они отображаются
+на movies, genres, movie_genres, people, cast_credits.
+
+Методы отпечатка (APP_CONFIG["change_method"]):
+    stats     information_schema.TABLES (TABLE_ROWS, AUTO_INCREMENT, UPDATE_TIME) —
+              один запрос без чтения данных (по умолчанию: детектор опрашивает
+              общий сервер из каждого клиента); TABLE_ROWS в InnoDB — оценка,
+              возможны лишние инвалидации
+    count     AUTO_INCREMENT и UPDATE_TIME + COUNT(*) по каждой таблице —
+              точно ловит вставки и удаления, но сканирует индекс каждой таблицы
+    checksum  CHECKSUM TABLE — ловит и правки на месте, но читает таблицы целиком
+
+Использование:
+    python change_detector.py                 # текущие отпечатки
+    python change_detector.py --watch 10      # печатать изменения каждые 10 секунд
+"""
+import sys
+import time
+import logging
+import argparse
+import threading
+from typing import Any, Callable, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from tracing import span
+
+POLL_INTERVAL_S = 30
+METHODS = ("stats", "count", "checksum")
+CATALOG_TABLES = ("film", "category", "film_category", "actor", "film_actor")
+TMDB_TABLES = {"film": "movies", "category": "genres", "film_category": "movie_genres",
+               "actor": "people", "film_actor": "cast_credits"}
+
+# Типичные наборы зависимостей кэшей
+FILM_TABLES = ("film", "film_category", "category")      # фильмы с жанрами
+CAST_TABLES = FILM_TABLES + ("film_actor", "actor")      # ... и с актёрами
+GENRE_TABLES = ("category", "film_category")
+
+Stamp = Tuple[Tuple[str, Optional[str]], ...]
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeDetectorError(Exception):
+    """Ошибки детектора изменений"""
+    pass
+
+
+class ChangeDetector:
+    """Опрашивает отпечатки таблиц каталога и оповещает привязанные к ним кэши"""
+
+    def __init__(self, db, interval: float = POLL_INTERVAL_S, method: str = "stats",
+                 tables: Iterable[str] = CATALOG_TABLES):
+        if method not in METHODS:
+            raise ChangeDetectorError(f"Неизвестный метод отпечатка: {method} (допустимо: {', '.join(METHODS)})")
+        self.db = db
+        self.interval = interval
+        self.method = method
+        self.tables = tuple(tables)
+        self.polls = 0
+        self.changes = 0
+        self.last_error: Optional[str] = None
+        self._prints: Dict[str, str] = {}   # таблица -> отпечаток; пусто — ещё не опрашивали
+        self._watchers: List[Tuple[FrozenSet[str], Callable[[Set[str]], None]]] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- Привязка кэшей ----------
+    def watch(self, tables: Iterable[str], callback: Callable[[Set[str]], None]):
+        """callback(изменившиеся таблицы) — из потока детектора, если изменилась хоть одна из tables"""
+        with self._lock:
+            self._watchers.append((frozenset(tables), callback))
+
+    def stamp(self, tables: Iterable[str]) -> Stamp:
+        """Текущие отпечатки таблиц — сохраняется вместе с записью кэша"""
+        with self._lock:
+            return tuple((t, self._prints.get(t)) for t in sorted(set(tables)))
+
+    def is_fresh(self, stamp: Stamp) -> bool:
+        """Запись со штампом stamp ещё актуальна (до первого опроса — считаем, что да)"""
+        with self._lock:
+            if not self._prints:
+                return True
+            return all(self._prints.get(t) == fp for t, fp in stamp)
+
+    # ---------- Опрос ----------
+    def poll(self) -> Set[str]:
+        """Снимает отпечатки; возвращает изменившиеся таблицы (первый опрос — только запоминает)"""
+        with span("change_detector.poll", method=self.method):
+            prints = self._read()
+        with self._lock:
+            first = not self._prints
+            changed = set() if first else {t for t in self.tables if prints.get(t) != self._prints.get(t)}
+            self._prints = prints
+            self.polls += 1
+            watchers = list(self._watchers)
+        if changed:
+            self.changes += 1
+            logger.info(f"Изменились таблицы каталога: {', '.join(sorted(changed))}")
+            for tables, callback in watchers:
+                if tables & changed:
+                    try:
+                        callback(changed)
+                    except Exception as e:
+                        logger.warning(f"Обработчик изменений {callback!r} упал: {e}")
+        return changed
+
+    def _read(self) -> Dict[str, str]:
+        """
+        Отпечатки по методу self.method через сырое соединение db.get_connection()
+        (в обход патчей Adapter_exe — имена таблиц отображаются здесь).
+        """
+        with self.db.get_connection() as conn:
+            with conn.cursor() as cur:
+                try:
+                    # MySQL 8 по умолчанию сутки кэширует статистику information_schema
+                    cur.execute("SET SESSION information_schema_stats_expiry = 0")
+                except Exception:
+                    pass  # MySQL 5.7 / MariaDB: переменной нет, статистика не кэшируется
+                # Только свои таблицы: статистика остальных в схеме не нужна
+                names = sorted(set(self.tables) | {TMDB_TABLES.get(t, t) for t in self.tables} | {"movies"})
+                cur.execute(f"""
+                    SELECT TABLE_NAME, TABLE_ROWS, AUTO_INCREMENT, UPDATE_TIME
+                    FROM information_schema.TABLES
+                    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({', '.join(['%s'] * len(names))})
+                """, names)
+                stats = {row[0]: row[1:] for row in cur.fetchall()}
+                tmdb = "movies" in stats
+                physical = {t: TMDB_TABLES.get(t, t) if tmdb else t for t in self.tables}
+                physical = {t: p for t, p in physical.items() if p in stats}
+
+                if self.method == "stats":
+                    return {t: "rows={}|ai={}|upd={}".format(*stats[p]) for t, p in physical.items()}
+                if self.method == "checksum":
+                    if not physical:
+                        return {}
+                    cur.execute("CHECKSUM TABLE " + ", ".join(f"`{p}`" for p in physical.values()))
+                    sums = {str(name).rsplit(".", 1)[-1]: value for name, value in cur.fetchall()}
+                    return {t: f"crc={sums.get(p)}" for t, p in physical.items()}
+                prints = {}
+                for t, p in physical.items():
+                    cur.execute(f"SELECT COUNT(*) FROM `{p}`")
+                    prints[t] = "n={}|ai={}|upd={}".format(cur.fetchone()[0], *stats[p][1:])
+                return prints
+
+    # ---------- Фоновый поток ----------
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="change-detector", daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.poll()
+                self.last_error = None
+            except Exception as e:
+                # MySQL недоступна: отпечатки не трогаем, кэши продолжают отдавать последние данные
+                if self.last_error is None:
+                    logger.warning(f"Опрос изменений каталога не удался: {e}")
+                self.last_error = str(e)
+            self._stop.wait(self.interval)
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self) -> Dict[str, Any]:
+        return {"method": self.method, "interval_s": self.interval, "polls": self.polls,
+                "changes": self.changes, "last_error": self.last_error}
+
+
+# ---------- Общий детектор процесса ----------
+_DETECTOR: Dict[str, Optional[ChangeDetector]] = {"current": None}
+
+
+def install(detector: Optional[ChangeDetector]):
+    """Делает detector общим для stamp()/is_fresh() (None — отключить)"""
+    _DETECTOR["current"] = detector
+
+
+def current() -> Optional[ChangeDetector]:
+    return _DETECTOR["current"]
+
+
+def stamp(tables: Iterable[str]) -> Stamp:
+    """Штамп для записи кэша; без детектора — пустой (запись всегда актуальна)"""
+    detector = _DETECTOR["current"]
+    return detector.stamp(tables) if detector is not None else ()
+
+
+def is_fresh(stamp: Stamp) -> bool:
+    detector = _DETECTOR["current"]
+    return detector.is_fresh(stamp) if detector is not None else True
+
+
+def setup_from_config(db) -> Optional[ChangeDetector]:
+    """Детектор по APP_CONFIG (change_poll_s / change_method): установка как общего + фоновый опрос"""
+    from config import APP_CONFIG
+    interval = APP_CONFIG.get("change_poll_s", POLL_INTERVAL_S)
+    if not interval or interval <= 0:
+        return None
+    try:
+        detector = ChangeDetector(db, interval, APP_CONFIG.get("change_method", "stats"))
+    except ChangeDetectorError as e:
+        logger.error(f"Детектор изменений отключён: {e}")
+        return None
+    install(detector)
+    detector.start()
+    return detector
+
+
+# ---------- CLI ----------
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Catalog change detector (table fingerprints)")
+    parser.add_argument("--method", choices=METHODS, default="stats")
+    parser.add_argument("--watch", type=float, metavar="SECONDS", help="опрашивать с интервалом и печатать изменения")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    from mysql_connector import MySQLConnector
+    detector = ChangeDetector(MySQLConnector(), method=args.method)
+    start = time.perf_counter()
+    detector.poll()
+    elapsed = (time.perf_counter() - start) * 1000
+    for table, fp in detector.stamp(detector.tables):
+        print(f"{table:<14} {fp or '(no table)'}")
+    print(f"⏱  {args.method} fingerprints in {elapsed:.1f} ms", file=sys.stderr)
+    while args.watch:
+        time.sleep(args.watch)
+        changed = detector.poll()
+        if changed:
+            print(f"🔔 {time.strftime('%H:%M:%S')} changed: {', '.join(sorted(changed))}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
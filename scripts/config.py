@@ -50,6 +50,17 @@ APP_CONFIG = {
     "results_per_page": 10,
     "stats_limit": 5,
     "log_level": "INFO",
+    "stream_batch_size": 1000,  # строк на одну пачку в MySQLConnector.select_chunks
+    "slow_query_ms": int(os.getenv("SLOW_QUERY_MS", "500")),  # порог журнала медленных запросов
+    # старше этого снимок аналитики (analytics_snapshot.py) не используется — графики идут в MySQL
+    "analytics_snapshot_max_age_h": float(os.getenv("ANALYTICS_SNAPSHOT_MAX_AGE_H", "24")),
+    # локальная SQLite-реплика (local_replica.py): off | fallback | prefer
+    "replica_mode": os.getenv("SAKILA_REPLICA", "off"),
+    "replica_path": os.getenv("SAKILA_REPLICA_PATH", ""),   # пусто — ~/.sakila_cache/replica.sqlite3
+    "replica_sync_s": int(os.getenv("SAKILA_REPLICA_SYNC_S", "300")),
+    # детектор изменений каталога (change_detector.py): интервал опроса, 0 — выключен; stats | count | checksum
+    "change_poll_s": float(os.getenv("SAKILA_CHANGE_POLL_S", "30")),
+    "change_method": os.getenv("SAKILA_CHANGE_METHOD", "stats"),
 }
 
 LOGGING_CONFIG = {
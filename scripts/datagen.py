@@ -0,0 +1,448 @@
+# datagen.py - Генератор синтетического каталога фильмов для нагрузочных замеров
+"""
+Создаёт совместимые со схемой данные TMDB (movies / genres / movie_genres /
+people / cast_credits) и, по желанию, Sakila (film / category / film_category /
+actor / film_actor) на масштабе от 10 тыс. до 10 млн фильмов, а также засевает
+логи поиска в MongoDB. Распределения приближены к реальным: годы выпуска
+смещены к недавним, длительность и рейтинг — около нормальных, популярность
+и частота слов в названиях — по степенному закону (Zipf), так что LIKE-поиск
+и группировки ведут себя как на живой базе.
+
+Данные детерминированы: один и тот же --seed и масштаб дают те же строки.
+Генерация потоковая, пачками — память не растёт с масштабом.
+
+Использование:
+    python datagen.py --scale small --database movies_synth --drop
+    python datagen.py --films 2000000 --schema both --database synth --mongo-logs 1000000
+    python datagen.py --scale medium --csv ./synth_csv      # без БД, только CSV
+"""
+import os
+import sys
+import csv
+import math
+import time
+import random
+import argparse
+import itertools
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+SCALES = {"tiny": 10_000, "small": 100_000, "medium": 1_000_000, "large": 10_000_000}
+CHUNK_FILMS = 5_000        # фильмов на одну пачку генерации/вставки
+PEOPLE_PER_FILM = 0.6      # размер базы людей относительно числа фильмов
+MONGO_BATCH = 10_000
+
+# id и относительная частота жанров TMDB
+TMDB_GENRES = [
+    (28, "Action", 14), (12, "Adventure", 7), (16, "Animation", 5), (35, "Comedy", 18),
+    (80, "Crime", 7), (99, "Documentary", 9), (18, "Drama", 26), (10751, "Family", 5),
+    (14, "Fantasy", 4), (36, "History", 2), (27, "Horror", 9), (10402, "Music", 3),
+    (9648, "Mystery", 4), (10749, "Romance", 9), (878, "Science Fiction", 5),
+    (10770, "TV Movie", 4), (53, "Thriller", 11), (10752, "War", 2), (37, "Western", 1),
+]
+SAKILA_CATEGORIES = ["Action", "Animation", "Children", "Classics", "Comedy", "Documentary",
+                     "Drama", "Family", "Foreign", "Games", "Horror", "Music", "New",
+                     "Sci-Fi", "Sports", "Travel"]
+SAKILA_RATINGS = [("G", 15), ("PG", 22), ("PG-13", 30), ("R", 25), ("NC-17", 8)]
+
+WORDS = (
+    "love night day man woman house last first dark time world life death city girl boy king "
+    "dead black story heart blood home secret war lost return red little blue dream road "
+    "american great big white summer fire island lady family game christmas star shadow moon "
+    "wild young dragon street queen gold river brother sister sun winter wolf ghost hunter "
+    "killer angel devil space planet earth ocean mountain storm silent broken hidden final "
+    "eternal golden iron crystal midnight morning evening forgotten perfect beautiful crazy "
+    "good bad new old true wrong dangerous lucky happy sweet bitter cold hot long short "
+    "mission escape journey legend empire kingdom revenge rising fall battle code project "
+    "zone line point edge circle tower bridge garden forest desert valley lake sea sky "
+    "stranger doctor teacher soldier captain detective thief prince princess witch robot "
+    "machine hero monster beast spirit soul mind eye hand face voice song dance music"
+).split()
+FIRST_NAMES = (
+    "James Mary John Patricia Robert Jennifer Michael Linda William Elizabeth David Barbara "
+    "Richard Susan Joseph Jessica Thomas Sarah Charles Karen Daniel Nancy Matthew Lisa Anthony "
+    "Betty Mark Margaret Donald Sandra Steven Ashley Paul Kimberly Andrew Emily Joshua Donna "
+    "Kenneth Michelle Kevin Carol Brian Amanda George Melissa Timothy Deborah Ronald Stephanie "
+    "Jean Pierre Marie Hans Anna Ivan Olga Yuki Hiro Chen Wei Ana Carlos Sofia Luca Giulia"
+).split()
+LAST_NAMES = (
+    "Smith Johnson Williams Brown Jones Garcia Miller Davis Rodriguez Martinez Hernandez Lopez "
+    "Gonzalez Wilson Anderson Thomas Taylor Moore Jackson Martin Lee Perez Thompson White Harris "
+    "Sanchez Clark Ramirez Lewis Robinson Walker Young Allen King Wright Scott Torres Nguyen Hill "
+    "Flores Green Adams Nelson Baker Hall Rivera Campbell Mitchell Carter Roberts Dubois Muller "
+    "Rossi Ivanov Petrov Tanaka Sato Wang Li Kim Park Silva Santos Novak Kowalski Jensen Berg"
+).split()
+
+
+def _zipf_cum_weights(n: int, s: float = 1.07) -> List[float]:
+    weights = [1 / (i + 1) ** s for i in range(n)]
+    return list(itertools.accumulate(weights))
+
+
+_WORD_CUM = _zipf_cum_weights(len(WORDS))
+_GENRE_CUM = list(itertools.accumulate(w for _, _, w in TMDB_GENRES))
+_RATING_CUM = list(itertools.accumulate(w for _, w in SAKILA_RATINGS))
+
+
+class CatalogGenerator:
+    """Детерминированный генератор строк; каждая пачка — свой RNG от (seed, таблица, номер)"""
+
+    def __init__(self, films: int, seed: int = 42, max_year: int = 2025):
+        self.films = films
+        self.people = max(100, int(films * PEOPLE_PER_FILM))
+        self.seed = seed
+        self.max_year = max_year
+
+    def _rng(self, kind: str, chunk: int) -> random.Random:
+        return random.Random(f"{self.seed}:{kind}:{chunk}")
+
+    # ---------- Справочники ----------
+    def genres(self) -> List[Tuple]:
+        return [(gid, name) for gid, name, _ in TMDB_GENRES]
+
+    def categories(self) -> List[Tuple]:
+        return [(i, name) for i, name in enumerate(SAKILA_CATEGORIES, 1)]
+
+    # ---------- Фильмы ----------
+    def _title(self, rng: random.Random) -> str:
+        words = rng.choices(WORDS, cum_weights=_WORD_CUM, k=rng.choice((1, 2, 2, 3, 3, 4)))
+        title = " ".join(w.capitalize() for w in words)
+        if rng.random() < 0.35:
+            title = "The " + title
+        if rng.random() < 0.06:
+            title += f" {rng.randint(2, 5)}"  # сиквелы
+        return title
+
+    def _overview(self, rng: random.Random) -> str:
+        words = rng.choices(WORDS, cum_weights=_WORD_CUM, k=rng.randint(15, 45))
+        return " ".join(words).capitalize() + "."
+
+    def film_chunk(self, chunk: int, schemas: Sequence[str]) -> Dict[str, List[Tuple]]:
+        """Пачка фильмов [chunk*CHUNK_FILMS, ...) со связями для выбранных схем"""
+        rng = self._rng("film", chunk)
+        first = chunk * CHUNK_FILMS + 1
+        last = min(self.films, first + CHUNK_FILMS - 1)
+        out: Dict[str, List[Tuple]] = {t: [] for t in (
+            "movies", "movie_genres", "cast_credits", "film", "film_category", "film_actor")}
+        for fid in range(first, last + 1):
+            title = self._title(rng)
+            overview = self._overview(rng)
+            # Годы смещены к недавним (экспоненциальный «возраст»)
+            year = max(1900, self.max_year - int(rng.expovariate(1 / 14)))
+            released = date(year, 1, 1) + timedelta(days=rng.randrange(365))
+            runtime = None if rng.random() < 0.02 else int(min(240, max(40, rng.gauss(104, 22))))
+            vote_count = int(rng.paretovariate(1.2) * 3) - 3
+            vote = None if vote_count == 0 else round(min(10.0, max(0.5, rng.gauss(6.2, 1.1))), 1)
+            popularity = round(rng.paretovariate(1.5) * (1 + vote_count / 100), 3)
+            genre_ids = {TMDB_GENRES[i][0] for i in
+                         (rng.choices(range(len(TMDB_GENRES)), cum_weights=_GENRE_CUM, k=rng.randint(1, 3)))}
+            # Популярные актёры снимаются чаще: индекс ~ people * u^3
+            cast = list(dict.fromkeys(int(self.people * rng.random() ** 3) + 1
+                                      for _ in range(rng.randint(4, 15))))
+
+            if "tmdb" in schemas:
+                out["movies"].append((fid, title, overview, released, runtime, vote, vote_count, popularity))
+                out["movie_genres"].extend((fid, gid) for gid in genre_ids)
+                out["cast_credits"].extend((fid, pid, f"Character {order + 1}", order)
+                                           for order, pid in enumerate(cast))
+            if "sakila" in schemas:
+                rating = rng.choices(SAKILA_RATINGS, cum_weights=_RATING_CUM)[0][0]
+                out["film"].append((fid, title.upper(), overview, year, runtime, rating))
+                cats = {rng.randint(1, len(SAKILA_CATEGORIES)) for _ in range(rng.randint(1, 2))}
+                out["film_category"].extend((fid, cid) for cid in cats)
+                out["film_actor"].extend((pid, fid) for pid in cast)
+        return {t: rows for t, rows in out.items() if rows}
+
+    def n_film_chunks(self) -> int:
+        return math.ceil(self.films / CHUNK_FILMS)
+
+    # ---------- Люди ----------
+    def people_chunk(self, chunk: int, schemas: Sequence[str]) -> Dict[str, List[Tuple]]:
+        rng = self._rng("people", chunk)
+        first = chunk * CHUNK_FILMS + 1
+        last = min(self.people, first + CHUNK_FILMS - 1)
+        out: Dict[str, List[Tuple]] = {"people": [], "actor": []}
+        for pid in range(first, last + 1):
+            fn, ln = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            if "tmdb" in schemas:
+                out["people"].append((pid, f"{fn} {ln}"))
+            if "sakila" in schemas:
+                out["actor"].append((pid, fn.upper(), ln.upper()))
+        return {t: rows for t, rows in out.items() if rows}
+
+    def n_people_chunks(self) -> int:
+        return math.ceil(self.people / CHUNK_FILMS)
+
+    # ---------- Логи поиска ----------
+    def search_logs(self, count: int, days: int = 90) -> Iterator[Dict]:
+        rng = self._rng("logs", 0)
+        now = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)  # воспроизводимо в пределах суток
+        genre_names = [name for _, name, _ in TMDB_GENRES]
+        for _ in range(count):
+            ts = now - timedelta(seconds=rng.randrange(days * 86400))
+            kind = rng.choices(("keyword", "genre_year", "advanced"), weights=(5, 3, 2))[0]
+            word = rng.choices(WORDS, cum_weights=_WORD_CUM)[0]
+            if kind == "keyword":
+                params = {"keyword": word, "rating": "All"}
+            elif kind == "genre_year":
+                y1 = self.max_year - int(rng.expovariate(1 / 12))
+                params = {"genre": rng.choices(genre_names, cum_weights=_GENRE_CUM)[0],
+                          "start_year": y1, "end_year": min(self.max_year, y1 + rng.choice((0, 5, 10)))}
+            else:
+                params = {"title": f"%{word}%", "genre": rng.choice(genre_names), "limit": 100}
+            yield {
+                "timestamp": ts.isoformat() + "Z",
+                "search_type": kind,
+                "params": params,
+                "results_count": int(rng.paretovariate(1.1) * 5),
+            }
+
+
+# ---------- Схема ----------
+DDL = {
+    "tmdb": [
+        """CREATE TABLE IF NOT EXISTS genres (
+            genre_id INT PRIMARY KEY, name VARCHAR(64) NOT NULL
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4""",
+        """CREATE TABLE IF NOT EXISTS movies (
+            tmdb_id INT PRIMARY KEY, title VARCHAR(255) NOT NULL, overview TEXT,
+            release_date DATE NULL, runtime SMALLINT NULL, vote_average DECIMAL(3,1) NULL,
+            vote_count INT NOT NULL DEFAULT 0, popularity DOUBLE NOT NULL DEFAULT 0
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4""",
+        """CREATE TABLE IF NOT EXISTS movie_genres (
+            tmdb_id INT NOT NULL, genre_id INT NOT NULL, PRIMARY KEY (tmdb_id, genre_id)
+        ) ENGINE=InnoDB""",
+        """CREATE TABLE IF NOT EXISTS people (
+            person_id INT PRIMARY KEY, name VARCHAR(255) NOT NULL
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4""",
+        """CREATE TABLE IF NOT EXISTS cast_credits (
+            tmdb_id INT NOT NULL, person_id INT NOT NULL, character_name VARCHAR(255),
+            cast_order SMALLINT, PRIMARY KEY (tmdb_id, person_id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4""",
+    ],
+    "sakila": [
+        """CREATE TABLE IF NOT EXISTS category (
+            category_id INT PRIMARY KEY, name VARCHAR(25) NOT NULL
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4""",
+        """CREATE TABLE IF NOT EXISTS film (
+            film_id INT PRIMARY KEY, title VARCHAR(255) NOT NULL, description TEXT,
+            release_year SMALLINT NULL, length SMALLINT NULL,
+            rating ENUM('G','PG','PG-13','R','NC-17') DEFAULT 'G'
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4""",
+        """CREATE TABLE IF NOT EXISTS film_category (
+            film_id INT NOT NULL, category_id INT NOT NULL, PRIMARY KEY (film_id, category_id)
+        ) ENGINE=InnoDB""",
+        """CREATE TABLE IF NOT EXISTS actor (
+            actor_id INT PRIMARY KEY, first_name VARCHAR(45) NOT NULL, last_name VARCHAR(45) NOT NULL
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4""",
+        """CREATE TABLE IF NOT EXISTS film_actor (
+            actor_id INT NOT NULL, film_id INT NOT NULL, PRIMARY KEY (actor_id, film_id)
+        ) ENGINE=InnoDB""",
+    ],
+}
+# Вторичные индексы строятся после загрузки — так в разы быстрее
+INDEXES = {
+    "tmdb": [
+        ("movies", "idx_movies_title", "title"),
+        ("movies", "idx_movies_release", "release_date"),
+        ("movies", "idx_movies_vote", "vote_average"),
+        ("movie_genres", "idx_mg_genre", "genre_id"),
+        ("cast_credits", "idx_cc_person", "person_id"),
+        ("people", "idx_people_name", "name"),
+    ],
+    "sakila": [
+        ("film", "idx_title", "title"),
+        ("film", "idx_release_year", "release_year"),
+        ("film_category", "idx_fc_category", "category_id"),
+        ("film_actor", "idx_fa_film", "film_id"),
+        ("actor", "idx_actor_last_name", "last_name"),
+    ],
+}
+TABLES = {
+    "tmdb": ["genres", "movies", "movie_genres", "people", "cast_credits"],
+    "sakila": ["category", "film", "film_category", "actor", "film_actor"],
+}
+COLUMNS = {
+    "genres": ("genre_id", "name"),
+    "movies": ("tmdb_id", "title", "overview", "release_date", "runtime", "vote_average",
+               "vote_count", "popularity"),
+    "movie_genres": ("tmdb_id", "genre_id"),
+    "people": ("person_id", "name"),
+    "cast_credits": ("tmdb_id", "person_id", "character_name", "cast_order"),
+    "category": ("category_id", "name"),
+    "film": ("film_id", "title", "description", "release_year", "length", "rating"),
+    "film_category": ("film_id", "category_id"),
+    "actor": ("actor_id", "first_name", "last_name"),
+    "film_actor": ("actor_id", "film_id"),
+}
+
+
+# ---------- Приёмники ----------
+class MySQLSink:
+    """Пакетная вставка в MySQL/MariaDB (executemany → многострочный INSERT)"""
+
+    def __init__(self, database: str, drop: bool = False):
+        import pymysql
+        from config import MYSQL_CONFIG
+        cfg = {k: v for k, v in MYSQL_CONFIG.items() if k != "database"}
+        self.conn = pymysql.connect(**{**cfg, "autocommit": False})
+        self.database = database
+        with self.conn.cursor() as cur:
+            cur.execute(f"CREATE DATABASE IF NOT EXISTS `{database}` CHARACTER SET utf8mb4")
+            cur.execute(f"USE `{database}`")
+            cur.execute("SET SESSION unique_checks = 0, foreign_key_checks = 0")
+        self.drop = drop
+
+    def prepare(self, schemas: Sequence[str]):
+        with self.conn.cursor() as cur:
+            for schema in schemas:
+                if self.drop:
+                    for table in reversed(TABLES[schema]):
+                        cur.execute(f"DROP TABLE IF EXISTS `{table}`")
+                for ddl in DDL[schema]:
+                    cur.execute(ddl)
+                for table in TABLES[schema]:
+                    cur.execute(f"SELECT 1 FROM `{table}` LIMIT 1")
+                    if cur.fetchone():
+                        raise RuntimeError(f"Таблица {self.database}.{table} не пуста — используйте --drop")
+        self.conn.commit()
+
+    def write(self, table: str, rows: List[Tuple]):
+        cols = COLUMNS[table]
+        sql = (f"INSERT INTO `{table}` ({', '.join(cols)}) "
+               f"VALUES ({', '.join(['%s'] * len(cols))})")
+        with self.conn.cursor() as cur:
+            cur.executemany(sql, rows)
+        self.conn.commit()
+
+    def finish(self, schemas: Sequence[str]):
+        import pymysql
+        with self.conn.cursor() as cur:
+            for schema in schemas:
+                for table, name, column in INDEXES[schema]:
+                    try:
+                        cur.execute(f"ALTER TABLE `{table}` ADD INDEX `{name}` (`{column}`)")
+                    except pymysql.err.OperationalError as e:
+                        if e.args[0] != 1061:  # индекс уже есть
+                            raise
+                for table in TABLES[schema]:
+                    cur.execute(f"ANALYZE TABLE `{table}`")
+                    cur.fetchall()
+        self.conn.commit()
+        self.conn.close()
+
+
+class CSVSink:
+    """CSV по файлу на таблицу (для LOAD DATA или офлайн-проверок)"""
+
+    def __init__(self, out_dir: str):
+        self.out_dir = out_dir
+        self._files = {}
+
+    def prepare(self, schemas: Sequence[str]):
+        os.makedirs(self.out_dir, exist_ok=True)
+        for schema in schemas:
+            for table in TABLES[schema]:
+                f = open(os.path.join(self.out_dir, f"{table}.csv"), "w", newline="", encoding="utf-8")
+                writer = csv.writer(f)
+                writer.writerow(COLUMNS[table])
+                self._files[table] = (f, writer)
+
+    def write(self, table: str, rows: List[Tuple]):
+        self._files[table][1].writerows(("\\N" if v is None else v for v in row) for row in rows)
+
+    def finish(self, schemas: Sequence[str]):
+        for f, _ in self._files.values():
+            f.close()
+
+
+def seed_mongo(gen: CatalogGenerator, count: int, collection: Optional[str] = None) -> int:
+    """Засевает логи поиска пачками insert_many (коллекция из MONGODB_CONFIG по умолчанию)"""
+    from pymongo import MongoClient
+    from config import MONGODB_CONFIG
+    client = MongoClient(MONGODB_CONFIG["connection_string"])
+    try:
+        db = client[MONGODB_CONFIG["database_name"]] if MONGODB_CONFIG["database_name"] \
+            else client.get_default_database()
+        col = db[collection or MONGODB_CONFIG["collection_name"]]
+        written = 0
+        docs = gen.search_logs(count)
+        while True:
+            batch = list(itertools.islice(docs, MONGO_BATCH))
+            if not batch:
+                break
+            col.insert_many(batch, ordered=False)
+            written += len(batch)
+            print(f"\r🍃 logs: {written:,}/{count:,}", end="", flush=True)
+        print()
+        return written
+    finally:
+        client.close()
+
+
+# ---------- Загрузка ----------
+def generate(gen: CatalogGenerator, sink, schemas: Sequence[str]) -> Dict[str, int]:
+    """Прогоняет все пачки через приёмник; возвращает число строк по таблицам"""
+    counts: Dict[str, int] = {}
+
+    def _write(tables: Dict[str, List[Tuple]]):
+        for table, rows in tables.items():
+            sink.write(table, rows)
+            counts[table] = counts.get(table, 0) + len(rows)
+
+    sink.prepare(schemas)
+    if "tmdb" in schemas:
+        _write({"genres": gen.genres()})
+    if "sakila" in schemas:
+        _write({"category": gen.categories()})
+
+    start = time.perf_counter()
+    for i in range(gen.n_people_chunks()):
+        _write(gen.people_chunk(i, schemas))
+    n = gen.n_film_chunks()
+    for i in range(n):
+        _write(gen.film_chunk(i, schemas))
+        done = min(gen.films, (i + 1) * CHUNK_FILMS)
+        rate = done / max(time.perf_counter() - start, 1e-9)
+        print(f"\r📦 films: {done:,}/{gen.films:,} ({rate:,.0f}/s)", end="", flush=True)
+    print()
+    print("🔧 Building indexes...")
+    sink.finish(schemas)
+    return counts
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Synthetic movie catalog generator")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument("--scale", choices=SCALES, default="tiny", help="готовый масштаб")
+    size.add_argument("--films", type=int, help="число фильмов (вместо --scale)")
+    parser.add_argument("--schema", choices=("tmdb", "sakila", "both"), default="tmdb")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database", help="база MySQL для загрузки (создаётся при необходимости)")
+    parser.add_argument("--drop", action="store_true", help="пересоздать таблицы, если они уже есть")
+    parser.add_argument("--csv", metavar="DIR", help="писать CSV в DIR вместо загрузки в MySQL")
+    parser.add_argument("--mongo-logs", type=int, default=0, metavar="N", help="засеять N логов поиска")
+    parser.add_argument("--mongo-collection", help="коллекция для логов (по умолчанию из конфига)")
+    args = parser.parse_args(argv)
+
+    films = args.films or SCALES[args.scale]
+    schemas = ("tmdb", "sakila") if args.schema == "both" else (args.schema,)
+    gen = CatalogGenerator(films, seed=args.seed)
+
+    if not args.csv and not args.database and not args.mongo_logs:
+        parser.error("укажите --database или --csv (и/или --mongo-logs)")
+
+    started = time.perf_counter()
+    if args.csv or args.database:
+        sink = CSVSink(args.csv) if args.csv else MySQLSink(args.database, drop=args.drop)
+        counts = generate(gen, sink, schemas)
+        for table, n in counts.items():
+            print(f"   {table:<14} {n:>12,}")
+    if args.mongo_logs:
+        seed_mongo(gen, args.mongo_logs, args.mongo_collection)
+    print(f"✅ Done in {time.perf_counter() - started:.1f}s (films={films:,}, seed={args.seed})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
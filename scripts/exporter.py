@@ -0,0 +1,252 @@
+# exporter.py - Потоковый экспорт результатов в CSV / Excel / Parquet
+import os
+import csv
+from itertools import chain
+from typing import Iterable, Iterator, List, Optional, Callable, Sequence
+
+# Формат -> фильтр для диалога сохранения
+EXPORT_FORMATS = {
+    "csv": "CSV Files (*.csv)",
+    "xlsx": "Excel Files (*.xlsx)",
+    "parquet": "Parquet Files (*.parquet)",
+}
+
+EXPORT_BATCH_SIZE = 5000      # строк на одну пачку при чтении из БД
+WIDTH_SAMPLE_ROWS = 500       # строк, по которым считается ширина колонок Excel
+MAX_COLUMN_WIDTH = 50
+EXCEL_MAX_ROWS = 1_048_576    # лимит строк на лист Excel (включая заголовок)
+
+
+class ExportError(Exception):
+    """Ошибки экспорта"""
+    pass
+
+
+class ExportCancelled(ExportError):
+    """Экспорт прерван пользователем"""
+    pass
+
+
+def format_from_path(path: str) -> str:
+    """Определяет формат по расширению файла"""
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    if ext not in EXPORT_FORMATS:
+        raise ExportError(f"Неизвестный формат экспорта: .{ext}")
+    return ext
+
+
+def _rows(chunk, columns: Sequence[str]) -> List[Sequence]:
+    """Пачка строк -> список кортежей (строки-словари раскладываются по колонкам)"""
+    if chunk and isinstance(chunk[0], dict):
+        return [tuple(row.get(c) for c in columns) for row in chunk]
+    return chunk
+
+
+def export_chunks(chunks: Iterable[List], columns: List[str], path: str, fmt: Optional[str] = None,
+                  on_progress: Optional[Callable[[int], None]] = None,
+                  should_stop: Optional[Callable[[], bool]] = None) -> int:
+    """
+    Пишет пачки строк в файл, не держа весь результат в памяти.
+
+    Args:
+        chunks: Итератор пачек (списков) строк-кортежей или словарей
+        columns: Имена колонок; может заполняться лениво (до первой пачки)
+        path: Путь к файлу
+        fmt: csv / xlsx / parquet (по умолчанию — по расширению)
+        on_progress: Вызывается с числом записанных строк после каждой пачки
+        should_stop: Если вернёт True — экспорт прерывается
+
+    Returns:
+        int: Количество записанных строк
+    """
+    fmt = fmt or format_from_path(path)
+    writers = {"csv": _write_csv, "xlsx": _write_excel, "parquet": _write_parquet}
+    if fmt not in writers:
+        raise ExportError(f"Неизвестный формат экспорта: {fmt}")
+
+    chunks = iter(chunks)
+    # Первая пачка нужна до заголовка: у потокового курсора колонки известны после execute
+    first = next(chunks, [])
+
+    def _all_chunks() -> Iterator[List[Sequence]]:
+        written = 0
+        for i, chunk in enumerate(chain([first] if first else [], chunks)):
+            if i and should_stop and should_stop():
+                raise ExportCancelled("Экспорт прерван")
+            yield _rows(chunk, columns)
+            written += len(chunk)
+            if on_progress:
+                on_progress(written)
+
+    try:
+        return writers[fmt](_all_chunks(), list(columns), path)
+    except BaseException:
+        # Отмена, ошибка MySQL, таймаут: обрезанный файл выглядел бы полным — удаляем
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    finally:
+        # Освобождаем соединение потокового курсора, если чтение прервано
+        close = getattr(chunks, "close", None)
+        if callable(close):
+            close()
+
+
+def export_query(db, sql: str, params, path: str, fmt: Optional[str] = None,
+                 on_progress: Optional[Callable[[int], None]] = None,
+                 should_stop: Optional[Callable[[], bool]] = None) -> int:
+    """Заново выполняет запрос через потоковый курсор и пишет результат в файл"""
+    columns: List[str] = []
+    chunks = db.select_chunks(sql, params, batch_size=EXPORT_BATCH_SIZE,
+                              as_tuples=True, on_columns=columns.extend)
+    return export_chunks(chunks, columns, path, fmt, on_progress, should_stop)
+
+
+def export_dataframe(df, path: str, fmt: Optional[str] = None,
+                     on_progress: Optional[Callable[[int], None]] = None,
+                     should_stop: Optional[Callable[[], bool]] = None) -> int:
+    """Пишет уже загруженный DataFrame теми же писателями, пачками"""
+    def _chunks():
+        for start in range(0, len(df), EXPORT_BATCH_SIZE):
+            part = df.iloc[start:start + EXPORT_BATCH_SIZE]
+            yield list(part.itertuples(index=False, name=None))
+
+    return export_chunks(_chunks(), [str(c) for c in df.columns], path, fmt, on_progress, should_stop)
+
+
+# ---------- Писатели ----------
+def _write_csv(chunks: Iterator[List[Sequence]], columns: List[str], path: str) -> int:
+    total = 0
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_MINIMAL)
+        header_written = False
+        for rows in chunks:
+            if not header_written:
+                writer.writerow(columns)
+                header_written = True
+            writer.writerows(rows)
+            total += len(rows)
+        if not header_written:
+            writer.writerow(columns)
+    return total
+
+
+def _sample_widths(columns: List[str], rows: List[Sequence]) -> List[int]:
+    """Ширина колонок по заголовку и первым WIDTH_SAMPLE_ROWS строкам"""
+    widths = [len(str(c)) for c in columns]
+    for row in rows[:WIDTH_SAMPLE_ROWS]:
+        for i, value in enumerate(row):
+            if value is not None and i < len(widths):
+                widths[i] = max(widths[i], len(str(value)))
+    return [min(w + 2, MAX_COLUMN_WIDTH) for w in widths]
+
+
+def _write_excel(chunks: Iterator[List[Sequence]], columns: List[str], path: str) -> int:
+    try:
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Font, PatternFill, Alignment
+        from openpyxl.utils import get_column_letter
+    except ImportError as e:
+        raise ExportError("Install openpyxl for export in Excel:\npip install openpyxl") from e
+
+    # write_only: строки сразу уходят во временный файл, память не растёт
+    wb = Workbook(write_only=True)
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+    header_alignment = Alignment(horizontal="center", vertical="center")
+
+    state = {"ws": None, "rows": 0, "sheets": 0}
+
+    def _new_sheet(sample: List[Sequence]):
+        state["sheets"] += 1
+        title = "Films" if state["sheets"] == 1 else f"Films ({state['sheets']})"
+        ws = wb.create_sheet(title)
+        # В режиме write_only ширины задаются до первой строки
+        for i, width in enumerate(_sample_widths(columns, sample), 1):
+            ws.column_dimensions[get_column_letter(i)].width = width
+        header = []
+        for name in columns:
+            cell = WriteOnlyCell(ws, value=name)
+            cell.font = header_font
+            cell.fill = header_fill
+            cell.alignment = header_alignment
+            header.append(cell)
+        ws.append(header)
+        state["ws"], state["rows"] = ws, 1
+
+    total = 0
+    for rows in chunks:
+        pos = 0
+        while pos < len(rows):
+            if state["ws"] is None or state["rows"] >= EXCEL_MAX_ROWS:
+                _new_sheet(rows[pos:])
+            take = min(len(rows) - pos, EXCEL_MAX_ROWS - state["rows"])
+            for row in rows[pos:pos + take]:
+                state["ws"].append(list(row))
+            state["rows"] += take
+            pos += take
+        total += len(rows)
+    if state["ws"] is None:
+        _new_sheet([])
+    wb.save(path)
+    return total
+
+
+def _parquet_type(pa, inferred):
+    """
+    Тип колонки файла по первой пачке. Колонка из одних NULL — строка (тип
+    неизвестен, а схему файла потом не поменять); DECIMAL — с максимальной
+    точностью, чтобы в неё влезли значения следующих пачек.
+    """
+    if pa.types.is_null(inferred):
+        return pa.string()
+    if pa.types.is_decimal(inferred):
+        return pa.decimal128(38, inferred.scale)
+    return inferred
+
+
+def _conform(pa, table, schema):
+    """Приводит пачку к схеме файла: типы следующих пачек могут отличаться от первой"""
+    if table.schema.equals(schema):
+        return table
+    columns = []
+    for name, target in zip(schema.names, schema.types):
+        col = table.column(name)
+        if pa.types.is_null(col.type):
+            col = pa.nulls(len(col), target)
+        elif pa.types.is_string(target) and not pa.types.is_string(col.type):
+            # Колонка была пустой в первой пачке — значения пишем текстом
+            col = pa.array([None if v is None else str(v) for v in col.to_pylist()], pa.string())
+        elif col.type != target:
+            col = col.cast(target)
+        columns.append(col)
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def _write_parquet(chunks: Iterator[List[Sequence]], columns: List[str], path: str) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ExportError("Install pyarrow for export in Parquet:\npip install pyarrow") from e
+
+    writer = None
+    schema = None
+    total = 0
+    try:
+        for rows in chunks:
+            data = {name: [row[i] for row in rows] for i, name in enumerate(columns)}
+            table = pa.table(data)
+            if schema is None:
+                schema = pa.schema([pa.field(f.name, _parquet_type(pa, f.type)) for f in table.schema])
+                writer = pq.ParquetWriter(path, schema)
+            writer.write_table(_conform(pa, table, schema))
+            total += len(rows)
+        if writer is None:
+            schema = pa.schema([pa.field(name, pa.string()) for name in columns])
+            writer = pq.ParquetWriter(path, schema)
+    finally:
+        if writer is not None:
+            writer.close()
+    return total
@@ -1,5 +1,9 @@
 # formatter.py - Форматирование вывода данных
-from typing import List, Dict, Any
+import os
+import re
+import sys
+import itertools
+from typing import List, Dict, Any, Iterable, Optional, TextIO
 from datetime import datetime
 from tabulate import tabulate
 import textwrap
@@ -8,6 +12,18 @@ from colorama import init, Fore, Back, Style
 # Инициализация colorama для цветного вывода в консоли
 init(autoreset=True)
 
+# Потоковый вывод (write_films_*): ширина колонок по первым строкам, запись в поток пачками
+FILM_COLUMNS = ("#", "Название", "Год", "Рейтинг", "Длительность", "Жанры", "Описание")
+STREAM_WIDTH_SAMPLE = 1000
+STREAM_FLUSH_ROWS = 500
+_ANSI_RE = re.compile(r"\x1b\[[0-9;]*m")
+
+
+def use_color(out: TextIO) -> bool:
+    """Цвет только для терминала (и если не задан NO_COLOR)"""
+    isatty = getattr(out, "isatty", None)
+    return bool(isatty and isatty()) and "NO_COLOR" not in os.environ
+
 
 class Formatter:
     """Класс для форматирования вывода данных"""
@@ -30,8 +46,7 @@ class Formatter:
             return ""
         return '\n'.join(textwrap.wrap(text, width))
     
-    def _colorize_rating(self, rating: str) -> str:
-        """Цветовая маркировка рейтинга"""
+    def _rating_color(self, rating: str) -> str:
         rating_colors = {
             'G': Fore.GREEN,
             'PG': Fore.CYAN,
@@ -39,17 +54,23 @@ class Formatter:
             'R': Fore.MAGENTA,
             'NC-17': Fore.RED
         }
-        color = rating_colors.get(rating, Fore.WHITE)
-        return f"{color}{rating}{Style.RESET_ALL}"
+        return rating_colors.get(rating, Fore.WHITE)
     
-    def _colorize_year(self, year: int) -> str:
-        """Цветовая маркировка года"""
+    def _year_color(self, year: int) -> str:
         if year >= 2010:
-            return f"{Fore.GREEN}{year}{Style.RESET_ALL}"
+            return Fore.GREEN
         elif year >= 2000:
-            return f"{Fore.YELLOW}{year}{Style.RESET_ALL}"
+            return Fore.YELLOW
         else:
-            return f"{Fore.CYAN}{year}{Style.RESET_ALL}"
+            return Fore.CYAN
+    
+    def _colorize_rating(self, rating: str) -> str:
+        """Цветовая маркировка рейтинга"""
+        return f"{self._rating_color(rating)}{rating}{Style.RESET_ALL}"
+    
+    def _colorize_year(self, year: int) -> str:
+        """Цветовая маркировка года"""
+        return f"{self._year_color(year)}{year}{Style.RESET_ALL}"
     
     def format_films_table(self, films: List[Dict]) -> str:
         """Форматирование списка фильмов в виде красивой таблицы"""
@@ -93,14 +114,91 @@ class Formatter:
         
         return table
     
-    def format_films_cards(self, films: List[Dict]) -> str:
-        """Форматирование фильмов в виде карточек"""
-        if not films:
-            return "Нет данных для отображения"
+    def _film_cells(self, i: int, film: Dict) -> List[str]:
+        """Сырые (без цвета) значения ячеек строки фильма — по ним считается ширина колонок"""
+        return [
+            str(i),
+            self._truncate_text(film.get('title', 'N/A'), 30),
+            str(film.get('release_year') or ''),
+            str(film.get('rating', 'N/A')),
+            f"{film.get('length', 0)} мин",
+            self._truncate_text(film.get('genres', 'N/A'), 30),
+            self._truncate_text(film.get('description', 'N/A'), 50).replace('\n', ' ')
+        ]
+    
+    def _stream_row(self, cells: List[str], film: Dict, widths: List[int], color: bool) -> str:
+        """Строка таблицы: выравнивание по сырой ширине, цвет добавляется уже после"""
+        parts = []
+        for col, (cell, width) in enumerate(zip(cells, widths)):
+            if len(cell) > width and col:
+                cell = self._truncate_text(cell, width)
+            parts.append(cell.ljust(width) if col < len(widths) - 1 else cell)
+        if color:
+            year = film.get('release_year')
+            parts[0] = f"{Fore.CYAN}{parts[0]}{Style.RESET_ALL}"
+            parts[1] = f"{Fore.WHITE}{parts[1]}{Style.RESET_ALL}"
+            if isinstance(year, int):
+                parts[2] = f"{self._year_color(year)}{parts[2]}{Style.RESET_ALL}"
+            parts[3] = f"{self._rating_color(film.get('rating', 'N/A'))}{parts[3]}{Style.RESET_ALL}"
+        return " │ ".join(parts)
+    
+    def write_films_table(self, films: Iterable[Dict], out: Optional[TextIO] = None,
+                          color: Optional[bool] = None) -> int:
+        """Потоковый вывод таблицы фильмов без tabulate (для больших выборок).
         
-        cards = []
-        for i, film in enumerate(films, 1):
-            card = f"""
+        Ширина колонок считается по сырым значениям первых STREAM_WIDTH_SAMPLE строк,
+        остальные строки пишутся в out пачками по мере чтения films (подходит и для итераторов).
+        color=None — цвет только если out терминал. Возвращает число выведенных фильмов.
+        """
+        out = out or sys.stdout
+        if color is None:
+            color = use_color(out)
+        rows = iter(films)
+        head = [(self._film_cells(i, film), film)
+                for i, film in zip(range(1, STREAM_WIDTH_SAMPLE + 1), rows)]
+        if not head:
+            out.write("Нет данных для отображения\n")
+            return 0
+        
+        widths = [max(len(title), *(len(cells[col]) for cells, _ in head))
+                  for col, title in enumerate(FILM_COLUMNS)]
+        if hasattr(films, '__len__'):
+            widths[0] = max(widths[0], len(str(len(films))))
+        header = " │ ".join(title.ljust(width) for title, width in zip(FILM_COLUMNS, widths)).rstrip()
+        if color:
+            header = f"{Fore.YELLOW}{header}{Style.RESET_ALL}"
+        out.write(header + "\n" + "─┼─".join("─" * width for width in widths) + "\n")
+        
+        tail = ((self._film_cells(i, film), film) for i, film in enumerate(rows, len(head) + 1))
+        count = 0
+        batch = []
+        for cells, film in itertools.chain(head, tail):
+            batch.append(self._stream_row(cells, film, widths, color))
+            if len(batch) >= STREAM_FLUSH_ROWS:
+                out.write("\n".join(batch) + "\n")
+                count += len(batch)
+                batch = []
+        if batch:
+            out.write("\n".join(batch) + "\n")
+            count += len(batch)
+        return count
+    
+    def write_films_cards(self, films: Iterable[Dict], out: Optional[TextIO] = None,
+                          color: Optional[bool] = None) -> int:
+        """Потоковый вариант format_films_cards: карточки пишутся в out по одной, без общей строки"""
+        out = out or sys.stdout
+        if color is None:
+            color = use_color(out)
+        count = 0
+        for count, film in enumerate(films, 1):
+            card = self._film_card(count, film)
+            out.write((card if color else _ANSI_RE.sub("", card)) + "\n")
+        if not count:
+            out.write("Нет данных для отображения\n")
+        return count
+    
+    def _film_card(self, i: int, film: Dict) -> str:
+        return f"""
 {Fore.CYAN}{'='*60}{Style.RESET_ALL}
 {Fore.YELLOW}#{i}{Style.RESET_ALL} {Fore.WHITE}{Style.BRIGHT}{film.get('title', 'N/A')}{Style.RESET_ALL}
 {Fore.CYAN}{'─'*60}{Style.RESET_ALL}
@@ -112,9 +210,13 @@ class Formatter:
 📝 Описание:
 {self._wrap_text(film.get('description', 'Описание отсутствует'), 58)}
 {Fore.CYAN}{'='*60}{Style.RESET_ALL}"""
-            cards.append(card)
+    
+    def format_films_cards(self, films: List[Dict]) -> str:
+        """Форматирование фильмов в виде карточек"""
+        if not films:
+            return "Нет данных для отображения"
         
-        return '\n'.join(cards)
+        return '\n'.join(self._film_card(i, film) for i, film in enumerate(films, 1))
     
     def format_genres_list(self, genres: List[Dict]) -> str:
         """Форматирование списка жанров"""
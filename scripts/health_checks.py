@@ -0,0 +1,70 @@
+# health_checks.py - Фоновые проверки подключений (MySQL / MongoDB / TMDB) при старте
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, Tuple
+
+HEALTH_TIMEOUT = 3.0  # секунды на одну проверку
+TMDB_CHECK_URL = "https://api.themoviedb.org/3/configuration"
+
+Probe = Callable[[], Tuple[bool, str]]
+
+
+def check_mysql(db, timeout: float = HEALTH_TIMEOUT) -> Tuple[bool, str]:
+    """Проверка MySQL через MySQLConnector с коротким таймаутом"""
+    ok = db.test_connection(timeout=timeout)
+    return ok, "OK" if ok else "Connection failed"
+
+
+def check_mongo(timeout: float = HEALTH_TIMEOUT) -> Tuple[bool, str]:
+    """Проверка MongoDB отдельным клиентом с коротким таймаутом"""
+    from log_writer import LogWriter
+    lw = LogWriter(timeout_ms=int(timeout * 1000))
+    try:
+        ok = lw.test_connection()
+    finally:
+        lw.close_connection()
+    return ok, "OK" if ok else "Connection failed"
+
+
+def check_tmdb(api_key: str, timeout: float = HEALTH_TIMEOUT) -> Tuple[bool, str]:
+    """Проверка ключа TMDB API"""
+    if not api_key:
+        return False, "API key not set"
+    import requests
+    resp = requests.get(TMDB_CHECK_URL, params={"api_key": api_key}, timeout=timeout)
+    if resp.status_code == 200:
+        return True, "OK"
+    return False, f"HTTP {resp.status_code}"
+
+
+def _timed(name: str, probe: Probe) -> Dict[str, Any]:
+    start = time.perf_counter()
+    try:
+        ok, message = probe()
+    except Exception as e:
+        ok, message = False, str(e)
+    return {
+        "name": name,
+        "ok": ok,
+        "message": message,
+        "elapsed": time.perf_counter() - start,
+    }
+
+
+def run_checks(probes: Dict[str, Probe], on_result: Callable[[Dict[str, Any]], None]) -> ThreadPoolExecutor:
+    """
+    Запускает все проверки параллельно и сразу возвращает управление.
+
+    Args:
+        probes: Имя -> функция, возвращающая (ok, сообщение)
+        on_result: Вызывается из рабочего потока по мере готовности каждой проверки
+            словарем {name, ok, message, elapsed}
+
+    Returns:
+        ThreadPoolExecutor: Пул (уже переведён в shutdown без ожидания)
+    """
+    executor = ThreadPoolExecutor(max_workers=max(1, len(probes)), thread_name_prefix="health")
+    for name, probe in probes.items():
+        executor.submit(lambda n=name, p=probe: on_result(_timed(n, p)))
+    executor.shutdown(wait=False)
+    return executor
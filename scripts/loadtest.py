@@ -0,0 +1,313 @@
+# loadtest.py - Нагрузочный тест поискового слоя: много «клиентов» против одних MySQL и MongoDB
+"""
+Каждый рабочий (поток или процесс) изображает отдельное настольное приложение:
+свой MySQLConnector, LogWriter и LogStats, и в цикле выполняет смесь операций
+как в GUI (поиск по слову, жанр+годы, расширенный поиск, карточка фильма,
+похожие фильмы, статистика) с логированием поиска в MongoDB.
+
+Для каждого уровня параллелизма печатаются пропускная способность и
+p50/p95/p99 по операциям, а также среднее время стадий (подключение к MySQL,
+выполнение, выборка, запись лога, чтение статистики). По росту стадий между
+уровнями видно, что насыщается первым.
+
+Использование:
+    python loadtest.py --concurrency 1,4,16,32 --duration 30
+    python loadtest.py --mode process --concurrency 8 --mix keyword=5,details=3,stats=1
+    python loadtest.py --tmdb --json loadtest.json --think-ms 200
+"""
+import sys
+import json
+import time
+import random
+import argparse
+import itertools
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_MIX = {"keyword": 35, "genre_year": 20, "advanced": 15, "details": 15, "similar": 10, "stats": 5}
+STAGES = ("connect", "execute", "fetch", "log", "stats")
+PERCENTILES = (0.50, 0.95, 0.99)
+SCALING_EFFICIENCY = 0.5   # ниже этой доли от линейного роста — пропускная способность упёрлась
+
+def _advanced_filters(rng: random.Random, ref: Dict[str, Any]) -> Dict[str, Any]:
+    """Случайная комбинация фильтров расширенного поиска (аргументы MySQLConnector.search_advanced)"""
+    filters: Dict[str, Any] = {}
+    if rng.random() < 0.6:
+        filters["title"] = rng.choice(ref["keywords"])
+    if rng.random() < 0.5:
+        filters["genre"] = rng.choice(ref["genres"])
+    if rng.random() < 0.4:
+        filters["year_from"] = rng.randint(ref["min_year"], ref["max_year"])
+    if rng.random() < 0.3:
+        filters["length_to"] = rng.choice((90, 120, 150))
+    filters["sort"] = rng.choice(("year_desc", "title_asc", "length_asc"))
+    filters["limit"] = 100
+    return filters
+
+
+class Client:
+    """Один имитируемый клиент: свои подключения и свой сборщик замеров запросов"""
+
+    def __init__(self, ref: Dict[str, Any], seed: int):
+        from mysql_connector import MySQLConnector
+        from query_stats import QueryStats
+        from log_writer import LogWriter
+        from log_stats import LogStats
+        self.db = MySQLConnector()
+        self.db.stats = QueryStats(slow_log=None)  # стадии запросов этого клиента, без общего журнала
+        self.logger = LogWriter()
+        self.stats = LogStats()
+        self.ref = ref
+        self.rng = random.Random(seed)
+        self.stage_ms = {"log": 0.0, "stats": 0.0}
+
+    def _log(self, search_type: str, params: Dict[str, Any], count: int):
+        start = time.perf_counter()
+        try:
+            self.logger.log_search(search_type, params, count)
+        finally:
+            self.stage_ms["log"] += (time.perf_counter() - start) * 1000
+
+    # ---------- Операции ----------
+    def keyword(self):
+        kw = self.rng.choice(self.ref["keywords"])
+        films, total = self.db.search_by_keyword(kw, self.rng.choice((0, 0, 0, 10, 20)), 10)
+        self._log("keyword", {"keyword": kw}, total)
+
+    def genre_year(self):
+        genre = self.rng.choice(self.ref["genres"])
+        end = self.rng.randint(self.ref["min_year"], self.ref["max_year"])
+        start = max(self.ref["min_year"], end - self.rng.choice((0, 5, 10, 20)))
+        films, total = self.db.search_by_genre_and_years(genre, start, end, 0, 10)
+        self._log("genre_year", {"genre": genre, "start_year": start, "end_year": end}, total)
+
+    def advanced(self):
+        filters = _advanced_filters(self.rng, self.ref)
+        films = self.db.search_advanced(**filters)
+        self._log("advanced", filters, len(films))
+
+    def details(self):
+        self.db.get_film_details(self.rng.randint(1, self.ref["max_film_id"]))
+
+    def similar(self):
+        genres = self.rng.sample(self.ref["genres"], k=min(2, len(self.ref["genres"])))
+        year = self.rng.randint(self.ref["min_year"], self.ref["max_year"])
+        self.db.find_similar_films(self.rng.randint(1, self.ref["max_film_id"]), genres, year, 10)
+
+    def stats_op(self):
+        start = time.perf_counter()
+        try:
+            self.stats.get_popular_searches(5)
+            self.stats.get_recent_searches(5)
+        finally:
+            self.stage_ms["stats"] += (time.perf_counter() - start) * 1000
+
+    def query_stage_ms(self) -> Dict[str, float]:
+        totals = {"connect": 0.0, "execute": 0.0, "fetch": 0.0}
+        for row in self.db.stats.summary():
+            for stage in totals:
+                totals[stage] += row[f"avg_{stage}_ms"] * row["count"]
+        return totals
+
+    def close(self):
+        self.logger.close_connection()
+        self.stats.close()
+
+
+OPERATIONS = {
+    "keyword": Client.keyword,
+    "genre_year": Client.genre_year,
+    "advanced": Client.advanced,
+    "details": Client.details,
+    "similar": Client.similar,
+    "stats": Client.stats_op,
+}
+
+
+def run_worker(worker_id: int, ref: Dict[str, Any], mix: Dict[str, int], duration: float,
+               think_ms: float, seed: int, tmdb: bool) -> Dict[str, Any]:
+    """Цикл одного клиента; работает и в потоке, и в отдельном процессе"""
+    if tmdb:
+        import Adapter_exe
+        Adapter_exe.install()
+    client = Client(ref, seed * 1000 + worker_id)
+    names = list(mix)
+    cum = list(itertools.accumulate(mix[n] for n in names))
+    samples: List[Tuple[str, float, bool]] = []
+    errors: Dict[str, str] = {}
+    deadline = time.perf_counter() + duration
+    try:
+        while time.perf_counter() < deadline:
+            op = client.rng.choices(names, cum_weights=cum)[0]
+            start = time.perf_counter()
+            ok = True
+            try:
+                OPERATIONS[op](client)
+            except Exception as e:
+                ok = False
+                errors.setdefault(op, f"{type(e).__name__}: {e}")
+            samples.append((op, (time.perf_counter() - start) * 1000, ok))
+            if think_ms:
+                time.sleep(client.rng.expovariate(1 / think_ms) / 1000)
+    finally:
+        stages = {**client.query_stage_ms(), **client.stage_ms}
+        client.close()
+    return {"samples": samples, "stages": stages, "errors": errors}
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))]
+
+
+def run_level(concurrency: int, ref: Dict[str, Any], mix: Dict[str, int], duration: float,
+              think_ms: float, seed: int, mode: str, tmdb: bool) -> Dict[str, Any]:
+    """Один уровень параллелизма: сводка по операциям и стадиям"""
+    pool_cls = ProcessPoolExecutor if mode == "process" else ThreadPoolExecutor
+    started = time.perf_counter()
+    with pool_cls(max_workers=concurrency) as pool:
+        # Потоки разделяют уже пропатченный MySQLConnector; процессам нужно поставить адаптер у себя
+        futures = [pool.submit(run_worker, i, ref, mix, duration, think_ms, seed, tmdb and mode == "process")
+                   for i in range(concurrency)]
+        parts = [f.result() for f in futures]
+    wall = time.perf_counter() - started
+
+    by_op: Dict[str, List[float]] = {}
+    failures: Dict[str, int] = {}
+    stage_totals = dict.fromkeys(STAGES, 0.0)
+    errors: Dict[str, str] = {}
+    for part in parts:
+        for op, ms, ok in part["samples"]:
+            by_op.setdefault(op, []).append(ms)
+            if not ok:
+                failures[op] = failures.get(op, 0) + 1
+        for stage, ms in part["stages"].items():
+            stage_totals[stage] += ms
+        errors.update(part["errors"])
+
+    total_ops = sum(len(v) for v in by_op.values())
+    ops = {}
+    for op, values in sorted(by_op.items()):
+        values.sort()
+        ops[op] = {"count": len(values), "errors": failures.get(op, 0),
+                   "throughput": len(values) / wall,
+                   **{f"p{int(q * 100)}_ms": _percentile(values, q) for q in PERCENTILES}}
+    return {
+        "concurrency": concurrency,
+        "wall_s": wall,
+        "ops": ops,
+        "total_ops": total_ops,
+        "throughput": total_ops / wall,
+        # Среднее время стадии в расчёте на одну операцию
+        "stages_ms_per_op": {s: stage_totals[s] / total_ops if total_ops else 0.0 for s in STAGES},
+        "errors": errors,
+    }
+
+
+def load_reference(tmdb: bool) -> Dict[str, Any]:
+    """Параметры для генерации запросов: жанры, годы, диапазон id, ключевые слова"""
+    if tmdb:
+        import Adapter_exe
+        Adapter_exe.install()
+    from mysql_connector import MySQLConnector
+    from datagen import WORDS
+    db = MySQLConnector()
+    genres = [g["name"] for g in db.get_available_genres()]
+    min_year, max_year = db.get_year_range()
+    max_id = db.select("SELECT MAX(film_id) AS m FROM film")[0]["m"] or 1
+    return {"genres": genres or ["Drama"], "min_year": int(min_year), "max_year": int(max_year),
+            "max_film_id": int(max_id), "keywords": WORDS[:60]}
+
+
+def parse_mix(text: Optional[str]) -> Dict[str, int]:
+    if not text:
+        return dict(DEFAULT_MIX)
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Неизвестная операция: {name} (есть: {', '.join(OPERATIONS)})")
+        mix[name] = int(weight or 1)
+    return mix
+
+
+def print_level(res: Dict[str, Any]):
+    print(f"\n=== concurrency {res['concurrency']}: {res['throughput']:.1f} ops/s "
+          f"({res['total_ops']} ops in {res['wall_s']:.1f}s)")
+    print(f"{'operation':<12} {'count':>7} {'err':>5} {'ops/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for op, r in res["ops"].items():
+        print(f"{op:<12} {r['count']:>7} {r['errors']:>5} {r['throughput']:>8.1f} "
+              f"{r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f}")
+    stages = res["stages_ms_per_op"]
+    print("stages per op: " + ", ".join(f"{s} {stages[s]:.1f} ms" for s in STAGES))
+    for op, err in res["errors"].items():
+        print(f"  ⚠️  {op}: {err}")
+
+
+def saturation_report(levels: List[Dict[str, Any]]) -> List[str]:
+    """Где сначала упирается: рост стадий и масштабирование пропускной способности"""
+    if len(levels) < 2:
+        return []
+    first, last = levels[0], levels[-1]
+    lines = [f"\nSaturation (c={first['concurrency']} → c={last['concurrency']}):"]
+    base_tput = first["throughput"] / first["concurrency"] if first["concurrency"] else 0
+    for res in levels[1:]:
+        ideal = base_tput * res["concurrency"]
+        eff = res["throughput"] / ideal if ideal else 0
+        if eff < SCALING_EFFICIENCY:
+            lines.append(f"  throughput stops scaling at c={res['concurrency']} "
+                         f"({eff:.0%} of linear, {res['throughput']:.1f} ops/s)")
+            break
+    growth = []
+    for stage in STAGES:
+        before, after = first["stages_ms_per_op"][stage], last["stages_ms_per_op"][stage]
+        if after > 0:
+            growth.append((after - before, stage, after / before if before else float("inf"), before, after))
+    growth.sort(reverse=True)
+    for delta, stage, ratio, before, after in growth:
+        lines.append(f"  {stage:<8} {before:8.1f} → {after:8.1f} ms/op  (+{delta:.1f} ms, ×{ratio:.1f})")
+    if growth and growth[0][0] > 0:
+        lines.append(f"  ➜ {growth[0][1]} saturates first")
+    return lines
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Concurrent load test for the search layer")
+    parser.add_argument("--concurrency", default="1,4,16", help="уровни параллелизма через запятую")
+    parser.add_argument("--duration", type=float, default=20, help="секунд на уровень")
+    parser.add_argument("--mode", choices=("thread", "process"), default="thread")
+    parser.add_argument("--mix", help="веса операций, напр. keyword=5,details=2 (по умолчанию смесь GUI)")
+    parser.add_argument("--think-ms", type=float, default=0, help="средняя пауза клиента между операциями")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--tmdb", action="store_true", help="база в схеме TMDB: включить Adapter_exe")
+    parser.add_argument("--json", metavar="FILE", help="сохранить результат в JSON")
+    args = parser.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+        levels = [int(x) for x in args.concurrency.split(",") if x.strip()]
+    except ValueError as e:
+        parser.error(str(e))
+
+    ref = load_reference(args.tmdb)
+    print(f"📋 {len(ref['genres'])} genres, years {ref['min_year']}–{ref['max_year']}, "
+          f"max film id {ref['max_film_id']}; mix {mix}; mode {args.mode}")
+    results = []
+    for c in levels:
+        res = run_level(c, ref, mix, args.duration, args.think_ms, args.seed, args.mode, args.tmdb)
+        print_level(res)
+        results.append(res)
+    for line in saturation_report(results):
+        print(line)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"args": vars(args), "mix": mix, "levels": results}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,589 @@
+# local_replica.py - Локальная реплика каталога в SQLite (FTS5) для офлайн-работы и быстрых поисков
+"""
+Реплика хранит фильмы в том же виде, что их отдаёт MySQLConnector (film_id,
+title, release_year, length, rating, description, genres), плюс жанры и
+связи фильм-жанр. Названия и описания проиндексированы FTS5 с триграммным
+токенизатором, поэтому LIKE '%слово%' по названию идёт по индексу и даёт те
+же результаты, что и в MySQL.
+
+Синхронизация инкрементальная и не требует служебных колонок в MySQL: id
+фильмов делятся на диапазоны по BUCKET_SIZE, MySQL одним агрегирующим запросом
+считает отпечаток каждого диапазона (COUNT + BIT_XOR(CRC32(...))), и заново
+выгружаются только диапазоны с изменившимся отпечатком — так подхватываются
+новые, изменённые и удалённые фильмы. Первая синхронизация — один потоковый
+запрос на весь каталог.
+
+Маршрутизация (install) оборачивает поисковые методы MySQLConnector (поверх
+патчей Adapter_exe, если они установлены). Режимы (APP_CONFIG["replica_mode"]):
+    off       реплика не используется
+    fallback  запросы идут в MySQL; при ошибке — в реплику, и следующие
+              REPLICA_RETRY_S секунд сразу в реплику, без ожидания таймаутов
+    prefer    поиск всегда в реплике (после первой синхронизации);
+              MySQL нужна только фоновой синхронизации
+
+Использование:
+    python local_replica.py sync                # синхронизировать один раз
+    python local_replica.py sync --watch 300    # синхронизировать каждые 5 минут
+    python local_replica.py search love         # поиск по реплике (как search_by_keyword)
+    python local_replica.py text "space pirate" # полнотекстовый поиск по названию и описанию
+    python local_replica.py info
+"""
+import os
+import sys
+import time
+import sqlite3
+import logging
+import argparse
+import functools
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import pymysql
+
+from tracing import span
+from mysql_connector import COUNT_MODES, DEFAULT_COUNT_BOUND, MySQLConnectionError
+
+REPLICA_FILE = os.path.join(os.path.expanduser("~"), ".sakila_cache", "replica.sqlite3")
+REPLICA_MODES = ("off", "fallback", "prefer")
+BUCKET_SIZE = 1000            # id фильмов в одном диапазоне отпечатка
+FETCH_BATCH = 5000            # строк на fetchmany при выгрузке из MySQL
+SYNC_INTERVAL_S = 300
+REPLICA_RETRY_S = 30          # сколько секунд после ошибки MySQL поиск сразу идёт в реплику
+ROUTED_METHODS = ("search_by_keyword", "search_by_genre_and_years",
+                  "get_available_genres", "get_year_range")
+
+logger = logging.getLogger(__name__)
+
+
+class ReplicaError(Exception):
+    """Ошибки локальной реплики"""
+    pass
+
+
+# ---------- SQL источника (MySQL), по схеме ----------
+# Строки-кортежи в фиксированном порядке: id, title, release_year, length, rating, description
+SOURCE_SQL = {
+    "sakila": {
+        "films_fp": """
+            SELECT film_id DIV %s AS bucket, COUNT(*) AS n,
+                   BIT_XOR(CRC32(CONCAT_WS('|', film_id, title, description, release_year, length, rating))) AS fp
+            FROM film GROUP BY bucket
+        """,
+        "links_fp": """
+            SELECT film_id DIV %s AS bucket, COUNT(*) AS n,
+                   BIT_XOR(CRC32(CONCAT_WS('|', film_id, category_id))) AS fp
+            FROM film_category GROUP BY bucket
+        """,
+        "films": """
+            SELECT film_id, title, release_year, length, rating, description
+            FROM film WHERE film_id BETWEEN %s AND %s
+        """,
+        "links": "SELECT film_id, category_id FROM film_category WHERE film_id BETWEEN %s AND %s",
+        "genres": "SELECT category_id, name FROM category",
+    },
+    "tmdb": {
+        "films_fp": """
+            SELECT tmdb_id DIV %s AS bucket, COUNT(*) AS n,
+                   BIT_XOR(CRC32(CONCAT_WS('|', tmdb_id, title, overview, release_date, runtime, vote_average))) AS fp
+            FROM movies GROUP BY bucket
+        """,
+        "links_fp": """
+            SELECT tmdb_id DIV %s AS bucket, COUNT(*) AS n,
+                   BIT_XOR(CRC32(CONCAT_WS('|', tmdb_id, genre_id))) AS fp
+            FROM movie_genres GROUP BY bucket
+        """,
+        "films": """
+            SELECT tmdb_id, title, YEAR(release_date), runtime, vote_average, overview
+            FROM movies WHERE tmdb_id BETWEEN %s AND %s
+        """,
+        "links": "SELECT tmdb_id, genre_id FROM movie_genres WHERE tmdb_id BETWEEN %s AND %s",
+        "genres": "SELECT genre_id, name FROM genres",
+    },
+}
+
+
+def _tmdb_row(row: tuple) -> tuple:
+    """Строка TMDB -> вид Sakila (рейтинг из vote_average), как после Adapter_exe"""
+    from Adapter_exe import TMDBAdapterV2
+    film_id, title, year, runtime, vote, overview = row
+    return film_id, title, year, runtime, TMDBAdapterV2.rating_from_vote(vote), overview or ''
+
+
+ROW_FIXES: Dict[str, Callable[[tuple], tuple]] = {"sakila": tuple, "tmdb": _tmdb_row}
+
+
+# ---------- Схема реплики ----------
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)""",
+    """CREATE TABLE IF NOT EXISTS films (
+        film_id INTEGER PRIMARY KEY, title TEXT NOT NULL, release_year INTEGER, length INTEGER,
+        rating TEXT, description TEXT, genres TEXT
+    )""",
+    """CREATE INDEX IF NOT EXISTS films_year ON films (release_year, title)""",
+    """CREATE INDEX IF NOT EXISTS films_title ON films (title)""",
+    """CREATE TABLE IF NOT EXISTS genres (genre_id INTEGER PRIMARY KEY, name TEXT NOT NULL)""",
+    """CREATE TABLE IF NOT EXISTS film_genres (
+        genre_id INTEGER NOT NULL, film_id INTEGER NOT NULL, PRIMARY KEY (genre_id, film_id)
+    ) WITHOUT ROWID""",
+    """CREATE INDEX IF NOT EXISTS film_genres_film ON film_genres (film_id)""",
+    """CREATE TABLE IF NOT EXISTS sync_buckets (bucket INTEGER PRIMARY KEY, fp TEXT NOT NULL)""",
+]
+FTS_SCHEMA = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS films_fts USING fts5(
+        title, description, content='films', content_rowid='film_id', tokenize='{tokenizer}'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS films_ai AFTER INSERT ON films BEGIN
+        INSERT INTO films_fts (rowid, title, description) VALUES (new.film_id, new.title, new.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS films_ad AFTER DELETE ON films BEGIN
+        INSERT INTO films_fts (films_fts, rowid, title, description)
+        VALUES ('delete', old.film_id, old.title, old.description);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS films_au AFTER UPDATE OF title, description ON films BEGIN
+        INSERT INTO films_fts (films_fts, rowid, title, description)
+        VALUES ('delete', old.film_id, old.title, old.description);
+        INSERT INTO films_fts (rowid, title, description) VALUES (new.film_id, new.title, new.description);
+    END""",
+]
+# Строка жанров "A, B, C" — как GROUP_CONCAT(... ORDER BY name SEPARATOR ', ') в MySQL
+GENRE_STRING_SQL = """
+    UPDATE films SET genres = (
+        SELECT group_concat(name, ', ') FROM (
+            SELECT g.name FROM film_genres fg JOIN genres g ON g.genre_id = fg.genre_id
+            WHERE fg.film_id = films.film_id ORDER BY g.name
+        )
+    )
+"""
+FILM_COLUMNS = "f.film_id, f.title, f.release_year, f.length, f.rating, f.description, f.genres"
+
+
+def _ranges(buckets: List[int]) -> Iterator[Tuple[int, int]]:
+    """Соседние диапазоны склеиваются: первая синхронизация — один запрос на весь каталог"""
+    start = prev = None
+    for b in buckets:
+        if start is None:
+            start = prev = b
+        elif b == prev + 1:
+            prev = b
+        else:
+            yield start * BUCKET_SIZE, (prev + 1) * BUCKET_SIZE - 1
+            start = prev = b
+    if start is not None:
+        yield start * BUCKET_SIZE, (prev + 1) * BUCKET_SIZE - 1
+
+
+class LocalReplica:
+    """SQLite-реплика каталога; поисковые методы совместимы с MySQLConnector"""
+
+    def __init__(self, path: str = REPLICA_FILE):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._tls = threading.local()       # соединение SQLite на поток
+        self._sync_lock = threading.Lock()
+        conn = self._conn()
+        for ddl in SCHEMA:
+            conn.execute(ddl)
+        self.fts = self._meta("fts") or self._create_fts(conn)
+
+    # ---- служебное ----
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._tls, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")      # чтение не ждёт фоновую синхронизацию
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._tls.conn = conn
+        return conn
+
+    def _create_fts(self, conn: sqlite3.Connection) -> str:
+        """trigram (SQLite 3.34+) -> unicode61 -> без FTS (поиск LIKE по таблице)"""
+        for tokenizer in ("trigram", "unicode61"):
+            try:
+                for ddl in FTS_SCHEMA:
+                    conn.execute(ddl.format(tokenizer=tokenizer))
+                break
+            except sqlite3.OperationalError as e:
+                logger.info(f"FTS5 ({tokenizer}) недоступен: {e}")
+        else:
+            tokenizer = "none"
+        self._set_meta(conn, "fts", tokenizer)
+        return tokenizer
+
+    def _meta(self, key: str) -> Optional[str]:
+        row = self._conn().execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    @staticmethod
+    def _set_meta(conn: sqlite3.Connection, key: str, value: Any):
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+    def _rows(self, sql: str, args=()) -> List[Dict]:
+        cur = self._conn().execute(sql, args)
+        columns = [d[0] for d in cur.description]
+        return [dict(zip(columns, row)) for row in cur.fetchall()]
+
+    @property
+    def ready(self) -> bool:
+        """Есть хотя бы одна завершённая синхронизация"""
+        return self._meta("synced_at") is not None
+
+    @property
+    def synced_at(self) -> Optional[float]:
+        value = self._meta("synced_at")
+        return float(value) if value else None
+
+    def describe(self) -> str:
+        if not self.ready:
+            return "local replica (not synced)"
+        minutes = (time.time() - self.synced_at) / 60
+        return f"local replica, synced {minutes:.0f} min ago"
+
+    # ---- поиск (те же сигнатуры и формат, что у MySQLConnector) ----
+    def _page(self, page_sql: str, count_sql: str, args: tuple, offset: int, limit: int,
+              count_mode: str, count_bound: int) -> Tuple[List[Dict], Optional[int]]:
+        if count_mode not in COUNT_MODES:
+            raise ValueError(f"Неизвестный режим подсчёта: {count_mode}")
+        with span("replica_query"):
+            films = self._rows(f"{page_sql} LIMIT ? OFFSET ?", args + (limit, offset))
+            if count_mode == "skip":
+                return films, None
+            if count_mode == "bounded":
+                total = self._conn().execute(f"SELECT COUNT(*) FROM ({count_sql} LIMIT ?)",
+                                             args + (count_bound,)).fetchone()[0]
+            else:
+                total = self._conn().execute(f"SELECT COUNT(*) FROM ({count_sql})", args).fetchone()[0]
+        return films, total
+
+    def search_by_keyword(self, keyword: str, offset: int = 0, limit: int = 10,
+                          count_mode: str = "exact",
+                          count_bound: int = DEFAULT_COUNT_BOUND) -> Tuple[List[Dict], Optional[int]]:
+        """title LIKE '%keyword%' — с триграммным FTS5 по индексу"""
+        if self.fts == "trigram":
+            match = "SELECT rowid AS film_id FROM films_fts WHERE title LIKE ?"
+            page_sql = f"""
+                SELECT {FILM_COLUMNS} FROM films f
+                WHERE f.film_id IN ({match}) ORDER BY f.title
+            """
+        else:
+            match = "SELECT film_id FROM films WHERE title LIKE ?"
+            page_sql = f"SELECT {FILM_COLUMNS} FROM films f WHERE f.title LIKE ? ORDER BY f.title"
+        return self._page(page_sql, match, (f"%{keyword}%",), offset, limit, count_mode, count_bound)
+
+    def search_by_genre_and_years(self, genre: str, start_year: int, end_year: int,
+                                  offset: int = 0, limit: int = 10, count_mode: str = "exact",
+                                  count_bound: int = DEFAULT_COUNT_BOUND) -> Tuple[List[Dict], Optional[int]]:
+        match = """
+            SELECT f.film_id FROM film_genres fg
+            JOIN genres g ON g.genre_id = fg.genre_id
+            JOIN films f ON f.film_id = fg.film_id
+            WHERE g.name = ? AND f.release_year BETWEEN ? AND ?
+        """
+        page_sql = f"""
+            SELECT {FILM_COLUMNS} FROM film_genres fg
+            JOIN genres g ON g.genre_id = fg.genre_id
+            JOIN films f ON f.film_id = fg.film_id
+            WHERE g.name = ? AND f.release_year BETWEEN ? AND ?
+            ORDER BY f.release_year DESC, f.title
+        """
+        return self._page(page_sql, match, (genre, start_year, end_year), offset, limit,
+                          count_mode, count_bound)
+
+    def get_available_genres(self) -> List[Dict]:
+        return self._rows("""
+            SELECT g.genre_id AS category_id, g.name, COUNT(fg.film_id) AS film_count
+            FROM genres g LEFT JOIN film_genres fg ON fg.genre_id = g.genre_id
+            GROUP BY g.genre_id, g.name ORDER BY g.name
+        """)
+
+    def get_year_range(self) -> Tuple[int, int]:
+        low, high = self._conn().execute(
+            "SELECT MIN(release_year), MAX(release_year) FROM films WHERE release_year IS NOT NULL").fetchone()
+        return low or 1900, high or 2025
+
+    def search_text(self, query: str, limit: int = 20) -> List[Dict]:
+        """Полнотекстовый поиск по названию и описанию, лучшие совпадения первыми (bm25)"""
+        if self.fts == "none":
+            pattern = f"%{query}%"
+            return self._rows(f"SELECT {FILM_COLUMNS} FROM films f WHERE f.title LIKE ? OR f.description LIKE ? "
+                              f"ORDER BY f.title LIMIT ?", (pattern, pattern, limit))
+        phrase = '"' + query.replace('"', '""') + '"'
+        return self._rows(f"""
+            SELECT {FILM_COLUMNS} FROM films_fts JOIN films f ON f.film_id = films_fts.rowid
+            WHERE films_fts MATCH ? ORDER BY bm25(films_fts, 10.0, 1.0) LIMIT ?
+        """, (phrase, limit))
+
+    # ---- синхронизация ----
+    @staticmethod
+    def _fetch(conn, sql: str, args=None) -> Iterator[List[tuple]]:
+        """Потоковое чтение из MySQL (серверный курсор) пачками"""
+        import pymysql
+        cursor = conn.cursor(pymysql.cursors.SSCursor)
+        try:
+            cursor.execute(sql, args)
+            while True:
+                rows = cursor.fetchmany(FETCH_BATCH)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            cursor.close()
+
+    def _fingerprints(self, conn, sql: Dict[str, str]) -> Dict[int, str]:
+        prints: Dict[int, List[str]] = {}
+        for key in ("films_fp", "links_fp"):
+            for rows in self._fetch(conn, sql[key], (BUCKET_SIZE,)):
+                for bucket, n, fp in rows:
+                    prints.setdefault(int(bucket), ["-", "-"])[key == "links_fp"] = f"{n}:{fp}"
+        return {bucket: "/".join(parts) for bucket, parts in prints.items()}
+
+    def sync_from(self, db) -> Dict[str, Any]:
+        """
+        Инкрементальная синхронизация из MySQL. Использует сырое соединение
+        db.get_connection() (в обход патчей Adapter_exe — SQL здесь уже под схему).
+
+        Returns:
+            Dict: changed_buckets, films (перезаписано), seconds
+        """
+        with self._sync_lock, span("replica_sync"):
+            start = time.perf_counter()
+            w = self._conn()
+            with db.get_connection() as conn:
+                with conn.cursor() as cur:
+                    cur.execute("SHOW TABLES LIKE 'movies'")
+                    schema = "tmdb" if cur.fetchone() else "sakila"
+                # Другая база под тем же файлом — начинаем с нуля
+                reset = self._meta("schema") not in (None, schema)
+                sql, fix = SOURCE_SQL[schema], ROW_FIXES[schema]
+
+                # Жанры — маленький справочник: сверяем целиком
+                with conn.cursor() as cur:
+                    cur.execute(sql["genres"])
+                    genres = sorted((int(gid), name) for gid, name in cur.fetchall())
+                genres_changed = reset or genres != sorted(w.execute("SELECT genre_id, name FROM genres").fetchall())
+
+                remote = self._fingerprints(conn, sql)
+                local = {} if reset else dict(w.execute("SELECT bucket, fp FROM sync_buckets").fetchall())
+                changed = sorted(b for b in set(remote) | set(local) if remote.get(b) != local.get(b))
+
+                films = 0
+                w.execute("BEGIN IMMEDIATE")
+                try:
+                    if reset:
+                        w.execute("DELETE FROM films")
+                        w.execute("DELETE FROM film_genres")
+                    if genres_changed:
+                        w.execute("DELETE FROM genres")
+                        w.executemany("INSERT INTO genres (genre_id, name) VALUES (?, ?)", genres)
+                    for lo, hi in _ranges(changed):
+                        w.execute("DELETE FROM films WHERE film_id BETWEEN ? AND ?", (lo, hi))
+                        w.execute("DELETE FROM film_genres WHERE film_id BETWEEN ? AND ?", (lo, hi))
+                        for rows in self._fetch(conn, sql["films"], (lo, hi)):
+                            w.executemany("INSERT INTO films (film_id, title, release_year, length, rating, "
+                                          "description) VALUES (?, ?, ?, ?, ?, ?)", [fix(r) for r in rows])
+                            films += len(rows)
+                        for rows in self._fetch(conn, sql["links"], (lo, hi)):
+                            w.executemany("INSERT OR IGNORE INTO film_genres (film_id, genre_id) VALUES (?, ?)",
+                                          rows)
+                        if not genres_changed:
+                            w.execute(GENRE_STRING_SQL + " WHERE film_id BETWEEN ? AND ?", (lo, hi))
+                    if genres_changed:
+                        w.execute(GENRE_STRING_SQL)
+                    w.execute("DELETE FROM sync_buckets")
+                    w.executemany("INSERT INTO sync_buckets (bucket, fp) VALUES (?, ?)", remote.items())
+                    self._set_meta(w, "schema", schema)
+                    self._set_meta(w, "synced_at", time.time())
+                    w.execute("COMMIT")
+                except BaseException:
+                    w.execute("ROLLBACK")
+                    raise
+            return {"changed_buckets": len(changed), "films": films,
+                    "seconds": round(time.perf_counter() - start, 2)}
+
+
+# ---------- Фоновая синхронизация ----------
+class ReplicaSyncer:
+    """Синхронизирует реплику в фоновом потоке каждые interval секунд"""
+
+    def __init__(self, db, replica: LocalReplica, interval: float = SYNC_INTERVAL_S):
+        self.db = db
+        self.replica = replica
+        self.interval = interval
+        self.last_result: Optional[Dict[str, Any]] = None
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="replica-sync", daemon=True)
+            self._thread.start()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            self.sync_once()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def request_sync(self):
+        """Синхронизировать сейчас, не дожидаясь интервала (например, по сигналу change_detector)"""
+        self._wake.set()
+
+    def sync_once(self) -> Optional[Dict[str, Any]]:
+        try:
+            self.last_result = self.replica.sync_from(self.db)
+            self.last_error = None
+            mark_mysql_up()
+            if self.last_result["changed_buckets"]:
+                logger.info(f"Реплика синхронизирована: {self.last_result}")
+            return self.last_result
+        except Exception as e:
+            self.last_error = str(e)
+            if mysql_unreachable(e):
+                mark_mysql_down()   # ошибки SQLite-стороны не повод уводить поиск с живой MySQL
+            logger.warning(f"Синхронизация реплики не удалась: {e}")
+            return None
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+
+# ---------- Маршрутизация MySQLConnector ----------
+_STATE: Dict[str, Any] = {"replica": None, "mode": "off", "down_until": 0.0}
+
+
+def mark_mysql_down(seconds: float = REPLICA_RETRY_S):
+    """MySQL недоступна: ближайшие seconds секунд поиск (в режиме fallback) идёт сразу в реплику"""
+    _STATE["down_until"] = time.monotonic() + seconds
+
+
+def mark_mysql_up():
+    _STATE["down_until"] = 0.0
+
+
+def serving_from_replica() -> bool:
+    """Поиск сейчас обслуживает реплика (для индикатора в интерфейсе)"""
+    replica = _STATE["replica"]
+    if replica is None or _STATE["mode"] == "off" or not replica.ready:
+        return False
+    return _STATE["mode"] == "prefer" or time.monotonic() < _STATE["down_until"]
+
+
+def mysql_unreachable(error: BaseException) -> bool:
+    """
+    Ошибка означает недоступность MySQL (нет соединения, обрыв, таймаут), а не
+    ошибку самого запроса или кода: по цепочке причин ищем MySQLConnectionError
+    или OperationalError / InterfaceError драйвера
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        if isinstance(error, (MySQLConnectionError, pymysql.err.OperationalError, pymysql.err.InterfaceError)):
+            return True
+        seen.add(id(error))
+        error = error.__cause__
+    return False
+
+
+def _routed(name: str, original: Callable) -> Callable:
+    @functools.wraps(original)
+    def method(self, *args, **kwargs):
+        replica = _STATE["replica"]
+        if replica is None or _STATE["mode"] == "off" or not replica.ready:
+            return original(self, *args, **kwargs)
+        if serving_from_replica():
+            return getattr(replica, name)(*args, **kwargs)
+        try:
+            return original(self, *args, **kwargs)
+        except Exception as e:
+            if not mysql_unreachable(e):
+                raise   # ошибка SQL или кода: реплика её не исправит, а прятать её нельзя
+            logger.warning(f"MySQL: {e} — {name} из локальной реплики")
+            mark_mysql_down()
+            return getattr(replica, name)(*args, **kwargs)
+    method._replica_original = original
+    return method
+
+
+def install(replica: Optional[LocalReplica], mode: str = "fallback"):
+    """Направляет поисковые методы MySQLConnector в реплику по режиму (вызывать после Adapter_exe.install)"""
+    if mode not in REPLICA_MODES:
+        raise ReplicaError(f"Unknown replica mode: {mode}")
+    from mysql_connector import MySQLConnector
+    _STATE.update(replica=replica, mode=mode)
+    for name in ROUTED_METHODS:
+        original = getattr(MySQLConnector, name)
+        original = getattr(original, "_replica_original", original)
+        setattr(MySQLConnector, name, _routed(name, original))
+
+
+def setup_from_config(db) -> Optional[ReplicaSyncer]:
+    """Реплика по APP_CONFIG (replica_mode / replica_path / replica_sync_s): маршрутизация + фоновая синхронизация"""
+    from config import APP_CONFIG
+    mode = APP_CONFIG.get("replica_mode", "off")
+    if mode == "off":
+        return None
+    try:
+        replica = LocalReplica(APP_CONFIG.get("replica_path") or REPLICA_FILE)
+        install(replica, mode)
+    except (ReplicaError, sqlite3.Error, OSError) as e:
+        logger.error(f"Локальная реплика отключена: {e}")
+        return None
+    syncer = ReplicaSyncer(db, replica, APP_CONFIG.get("replica_sync_s", SYNC_INTERVAL_S))
+    syncer.start()
+    return syncer
+
+
+# ---------- CLI ----------
+def _print_films(films: List[Dict]):
+    for film in films:
+        print(f"{film['film_id']:>8}  {film['release_year'] or '':>4}  {film['rating'] or '':<6} "
+              f"{film['title']}  [{film['genres'] or ''}]")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Local SQLite replica of the film catalog")
+    parser.add_argument("--path", default=REPLICA_FILE, help="файл реплики")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_sync = sub.add_parser("sync", help="синхронизировать из MySQL")
+    p_sync.add_argument("--watch", type=float, metavar="SECONDS", help="повторять с интервалом")
+    p_search = sub.add_parser("search", help="поиск по названию (как search_by_keyword)")
+    p_search.add_argument("keyword")
+    p_search.add_argument("--limit", type=int, default=20)
+    p_text = sub.add_parser("text", help="полнотекстовый поиск по названию и описанию")
+    p_text.add_argument("query")
+    p_text.add_argument("--limit", type=int, default=20)
+    sub.add_parser("info", help="состояние реплики")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    replica = LocalReplica(args.path)
+    if args.command == "sync":
+        from mysql_connector import MySQLConnector
+        db = MySQLConnector()
+        while True:
+            result = replica.sync_from(db)
+            print(f"🔄 {result['changed_buckets']} changed ranges, {result['films']:,} films "
+                  f"in {result['seconds']:.1f} s")
+            if not args.watch:
+                return 0
+            time.sleep(args.watch)
+    if args.command in ("search", "text"):
+        start = time.perf_counter()
+        if args.command == "search":
+            films, total = replica.search_by_keyword(args.keyword, limit=args.limit)
+        else:
+            films, total = replica.search_text(args.query, args.limit), None
+        elapsed = (time.perf_counter() - start) * 1000
+        _print_films(films)
+        print(f"⏱  {len(films)} shown{f' of {total}' if total is not None else ''} in {elapsed:.1f} ms",
+              file=sys.stderr)
+        return 0
+    films = replica._conn().execute("SELECT COUNT(*) FROM films").fetchone()[0]
+    print(f"📀 {args.path}: {films:,} films, FTS: {replica.fts}, schema: {replica._meta('schema') or '?'}; "
+          f"{replica.describe()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,6 +9,58 @@ class MongoStatsError(Exception):
     pass
 
 
+# Конвейеры агрегации (общие для LogStats и async_data.AsyncLogStats)
+def popular_pipeline(limit: int) -> List[Dict[str, Any]]:
+    """Топ одинаковых запросов (агрегируем по типу + параметрам)"""
+    return [
+        {
+            "$group": {
+                "_id": {"search_type": "$search_type", "params": "$params"},
+                "count": {"$sum": 1},
+                "total_results": {"$sum": "$results_count"},
+                "last_search": {"$max": "$timestamp"},
+            }
+        },
+        {"$sort": {"count": -1}},
+        {"$limit": limit},
+        {
+            "$project": {
+                "_id": 0,
+                "search_type": "$_id.search_type",
+                "params": "$_id.params",
+                "count": 1,
+                "total_results": 1,
+                "last_search": 1,
+            }
+        },
+    ]
+
+
+def recent_pipeline(limit: int) -> List[Dict[str, Any]]:
+    """Последние уникальные запросы (по сочетанию тип+параметры)"""
+    return [
+        {"$sort": {"timestamp": -1}},
+        {
+            "$group": {
+                "_id": {"search_type": "$search_type", "params": "$params"},
+                "timestamp": {"$first": "$timestamp"},
+                "results_count": {"$first": "$results_count"},
+            }
+        },
+        {"$sort": {"timestamp": -1}},
+        {"$limit": limit},
+        {
+            "$project": {
+                "_id": 0,
+                "search_type": "$_id.search_type",
+                "params": "$_id.params",
+                "timestamp": 1,
+                "results_count": 1,
+            }
+        },
+    ]
+
+
 class LogStats:
     """Возвращает популярные и последние поисковые запросы из логов"""
 
@@ -41,57 +93,14 @@ class LogStats:
     def get_popular_searches(self, limit: int = 5) -> List[Dict[str, Any]]:
         """Топ одинаковых запросов (агрегируем по типу + параметрам)"""
         try:
-            pipeline = [
-                {
-                    "$group": {
-                        "_id": {"search_type": "$search_type", "params": "$params"},
-                        "count": {"$sum": 1},
-                        "total_results": {"$sum": "$results_count"},
-                        "last_search": {"$max": "$timestamp"},
-                    }
-                },
-                {"$sort": {"count": -1}},
-                {"$limit": limit},
-                {
-                    "$project": {
-                        "_id": 0,
-                        "search_type": "$_id.search_type",
-                        "params": "$_id.params",
-                        "count": 1,
-                        "total_results": 1,
-                        "last_search": 1,
-                    }
-                },
-            ]
-            return list(self._get_collection().aggregate(pipeline))
+            return list(self._get_collection().aggregate(popular_pipeline(limit)))
         except Exception as e:
             raise MongoStatsError(f"Не удалось получить популярные запросы: {e}") from e
 
     def get_recent_searches(self, limit: int = 5) -> List[Dict[str, Any]]:
         """Последние уникальные запросы (по сочетанию тип+параметры)"""
         try:
-            pipeline = [
-                {"$sort": {"timestamp": -1}},
-                {
-                    "$group": {
-                        "_id": {"search_type": "$search_type", "params": "$params"},
-                        "timestamp": {"$first": "$timestamp"},
-                        "results_count": {"$first": "$results_count"},
-                    }
-                },
-                {"$sort": {"timestamp": -1}},
-                {"$limit": limit},
-                {
-                    "$project": {
-                        "_id": 0,
-                        "search_type": "$_id.search_type",
-                        "params": "$_id.params",
-                        "timestamp": 1,
-                        "results_count": 1,
-                    }
-                },
-            ]
-            return list(self._get_collection().aggregate(pipeline))
+            return list(self._get_collection().aggregate(recent_pipeline(limit)))
         except Exception as e:
             raise MongoStatsError(f"Не удалось получить последние запросы: {e}") from e
 
@@ -1,6 +1,6 @@
 # log_writer.py — запись логов в MongoDB (без хардкода, через config)
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, Optional, Tuple
 from pymongo import MongoClient
 from config import MONGODB_CONFIG
 
@@ -18,7 +18,8 @@ class MongoWriteError(Exception):
 class LogWriter:
     """Пишет логи поисковых запросов в коллекцию MongoDB"""
 
-    def __init__(self) -> None:
+    def __init__(self, timeout_ms: int = 5000) -> None:
+        self._timeout_ms = timeout_ms
         self._uri: str = MONGODB_CONFIG["connection_string"]
         self._db_name: str = MONGODB_CONFIG["database_name"] or ""   # если пусто — берём из URI
         self._col_name: str = MONGODB_CONFIG["collection_name"]
@@ -33,9 +34,9 @@ class LogWriter:
             try:
                 self._client = MongoClient(
                     self._uri,
-                    serverSelectionTimeoutMS=5000,
-                    connectTimeoutMS=5000,
-                    socketTimeoutMS=5000,
+                    serverSelectionTimeoutMS=self._timeout_ms,
+                    connectTimeoutMS=self._timeout_ms,
+                    socketTimeoutMS=self._timeout_ms,
                 )
                 self._client.server_info()  # проверяем подключение
                 self._db = (
@@ -70,6 +71,25 @@ class LogWriter:
         except Exception as e:
             raise MongoWriteError(f"Ошибка логирования: {e}") from e
 
+    def log_searches(self, entries: Iterable[Tuple[Any, ...]]) -> int:
+        """
+        Логируем пачку поисков одним insert_many: (search_type, params, results_count[, timestamp]).
+        timestamp — время самого поиска (ISO, как в log_search); без него — время записи.
+        """
+        now = datetime.utcnow().isoformat() + "Z"
+        docs = [
+            {"timestamp": rest[0] if rest else now, "search_type": t, "params": p, "results_count": n}
+            for t, p, n, *rest in entries
+        ]
+        if not docs:
+            return 0
+        try:
+            self._ensure()
+            res = self._col.insert_many(docs, ordered=False)
+            return len(res.inserted_ids)
+        except Exception as e:
+            raise MongoWriteError(f"Ошибка пакетного логирования: {e}") from e
+
     def close_connection(self) -> None:
         if self._client is not None:
             self._client.close()
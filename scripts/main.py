@@ -1,23 +1,95 @@
 # main.py - Точка входа в приложение
 import sys
 import logging
-from typing import Optional
+import argparse
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
 
 from mysql_connector import MySQLConnector
 from log_writer import LogWriter
 from log_stats import LogStats
 from formatter import Formatter
+from tracing import TRACER, action, span, format_breakdown
+import profiling
+import batch
+import local_replica
+
+
+PAGE_SIZE = 10
+PAGE_CACHE_PAGES = 50   # страниц в кэше сессии CLI
+
+
+class PageCache:
+    """Страницы результатов за сессию CLI (LRU) и фоновая подгрузка следующей страницы"""
+    
+    def __init__(self, max_pages: int = PAGE_CACHE_PAGES):
+        self.max_pages = max_pages
+        self._pages: "OrderedDict[tuple, Tuple[List[Dict], Optional[int]]]" = OrderedDict()
+        self._pending: Dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cli-prefetch")
+    
+    def _store(self, key: tuple, value: Tuple[List[Dict], Optional[int]]):
+        with self._lock:
+            self._pages[key] = value
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+    
+    def get(self, key: tuple, fetch: Callable[[], Tuple[List[Dict], Optional[int]]]):
+        """Страница из кэша, из уже идущей подгрузки или синхронным запросом"""
+        with self._lock:
+            if key in self._pages:
+                self._pages.move_to_end(key)
+                return self._pages[key]
+            future = self._pending.get(key)
+        if future is not None:
+            with span("prefetch_wait"):
+                try:
+                    return future.result()
+                except Exception:
+                    pass   # фоновая попытка не удалась — повторяем в основном потоке
+        value = fetch()
+        self._store(key, value)
+        return value
+    
+    def prefetch(self, key: tuple, fetch: Callable[[], Tuple[List[Dict], Optional[int]]]):
+        """Запускает загрузку страницы в фоне, пока пользователь смотрит текущую"""
+        with self._lock:
+            if key in self._pages or key in self._pending:
+                return
+            future = self._pool.submit(fetch)
+            self._pending[key] = future
+        future.add_done_callback(lambda f: self._done(key, f))
+    
+    def _done(self, key: tuple, future: Future):
+        with self._lock:
+            self._pending.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            self._store(key, future.result())
+    
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
 
 
 class MovieSearchApp:
     """Основное приложение для поиска фильмов"""
     
-    def __init__(self):
+    def __init__(self, trace_path: Optional[str] = None):
         self.setup_logging()
         self.mysql_conn = MySQLConnector()
+        # Локальная реплика (SAKILA_REPLICA=fallback|prefer) — поиск и без MySQL
+        self.replica_syncer = local_replica.setup_from_config(self.mysql_conn)
         self.log_writer = LogWriter()
         self.log_stats = LogStats()
         self.formatter = Formatter()
+        self.page_cache = PageCache()
+        # Трассировка: разбивка каждого действия по стадиям + Chrome trace при выходе
+        self.trace_path = trace_path
+        if trace_path:
+            TRACER.listeners.append(lambda r: print(f"⏱  {format_breakdown(r)}"))
         
     def setup_logging(self):
         """Настройка системы логирования"""
@@ -47,6 +119,36 @@ class MovieSearchApp:
 Выберите действие (1-5): """
         return input(menu).strip()
     
+    def _get_page(self, key: tuple, page: int, search: Callable) -> Tuple[List[Dict], Optional[int]]:
+        """Страница page (из кэша, если есть) и фоновая подгрузка следующей.
+        
+        search(offset, count_mode) -> (films, total); COUNT выполняется только для первой страницы,
+        дальше общее число берётся из неё.
+        """
+        def fetch(n):
+            return lambda: search(n * PAGE_SIZE, "exact" if n == 0 else "skip")
+        
+        films, total = self.page_cache.get(key + (page,), fetch(page))
+        if len(films) == PAGE_SIZE:
+            self.page_cache.prefetch(key + (page + 1,), fetch(page + 1))
+        return films, total
+    
+    def _ask_page(self, page: int, films: List[Dict]) -> Optional[int]:
+        """Следующий номер страницы по ответу пользователя или None — выйти из листания"""
+        has_next = len(films) == PAGE_SIZE
+        if not has_next and page == 0:
+            return None
+        options = ["y — следующие 10"] if has_next else []
+        if page > 0:
+            options.append("b — назад")
+        options.append("n — выход")
+        choice = input(f"\n➡️  Листать результаты? ({', '.join(options)}): ").strip().lower()
+        if choice == 'y' and has_next:
+            return page + 1
+        if choice == 'b' and page > 0:
+            return page - 1
+        return None
+    
     def search_by_keyword(self):
         """Поиск фильмов по ключевому слову"""
         try:
@@ -56,36 +158,43 @@ class MovieSearchApp:
                 return
             
             page = 0
-            while True:
-                offset = page * 10
-                films, total_count = self.mysql_conn.search_by_keyword(keyword, offset)
-                
-                if not films and page == 0:
-                    print(f"❌ Фильмы с ключевым словом '{keyword}' не найдены.")
-                    # Логируем даже пустые результаты
-                    self.log_writer.log_search("keyword", {"keyword": keyword}, 0)
-                    return
-                
-                if not films:
-                    print("\n📋 Больше результатов нет.")
-                    break
-                
-                # Первый раз логируем запрос
-                if page == 0:
-                    self.log_writer.log_search("keyword", {"keyword": keyword}, total_count)
-                
-                # Отображаем результаты
-                print(f"\n📽️  Результаты поиска '{keyword}' (показано {offset + 1}-{offset + len(films)} из {total_count}):")
-                print(self.formatter.format_films_table(films))
-                
-                # Спрашиваем о продолжении
-                if len(films) == 10:  # Есть потенциально еще результаты
-                    choice = input("\n➡️  Показать следующие 10 результатов? (y/n): ").lower()
-                    if choice != 'y':
+            total_count = None
+            logged = False
+            search = lambda offset, count_mode: self.mysql_conn.search_by_keyword(
+                keyword, offset, PAGE_SIZE, count_mode=count_mode)
+            while page is not None:
+                offset = page * PAGE_SIZE
+                # Одно действие — одна страница (ожидание ввода в замер не входит)
+                with action("cli.keyword_search", page=page):
+                    # Общее число известно с первой страницы — дальше COUNT не нужен
+                    films, count = self._get_page(("keyword", keyword), page, search)
+                    total_count = count if count is not None else total_count
+                    
+                    if not films and page == 0:
+                        print(f"❌ Фильмы с ключевым словом '{keyword}' не найдены.")
+                        # Логируем даже пустые результаты
+                        with span("log_search"):
+                            self.log_writer.log_search("keyword", {"keyword": keyword}, 0)
+                        return
+                    
+                    if not films:
+                        print("\n📋 Больше результатов нет.")
                         break
-                    page += 1
-                else:
-                    break
+                    
+                    # Первый раз логируем запрос (возврат на первую страницу — не новый поиск)
+                    if not logged:
+                        with span("log_search"):
+                            self.log_writer.log_search("keyword", {"keyword": keyword}, total_count)
+                        logged = True
+                    
+                    # Отображаем результаты
+                    print(f"\n📽️  Результаты поиска '{keyword}' (показано {offset + 1}-{offset + len(films)} из {total_count}):")
+                    with span("format"):
+                        table = self.formatter.format_films_table(films)
+                    print(table)
+                
+                # Спрашиваем о продолжении (следующая страница тем временем грузится в фоне)
+                page = self._ask_page(page, films)
                     
         except Exception as e:
             self.logger.error(f"Ошибка при поиске по ключевому слову: {e}")
@@ -95,8 +204,9 @@ class MovieSearchApp:
         """Поиск фильмов по жанру и диапазону годов"""
         try:
             # Получаем доступные жанры и диапазон годов
-            genres = self.mysql_conn.get_available_genres()
-            year_range = self.mysql_conn.get_year_range()
+            with action("cli.load_genres"):
+                genres = self.mysql_conn.get_available_genres()
+                year_range = self.mysql_conn.get_year_range()
             
             if not genres:
                 print("❌ Не удалось получить список жанров.")
@@ -141,38 +251,41 @@ class MovieSearchApp:
                 "end_year": end_year
             }
             
-            while True:
-                offset = page * 10
-                films, total_count = self.mysql_conn.search_by_genre_and_years(
-                    genre, start_year, end_year, offset
-                )
-                
-                if not films and page == 0:
-                    print(f"❌ Фильмы жанра '{genre}' за {start_year}-{end_year} не найдены.")
-                    self.log_writer.log_search("genre_year", search_params, 0)
-                    return
-                
-                if not films:
-                    print("\n📋 Больше результатов нет.")
-                    break
-                
-                # Первый раз логируем запрос
-                if page == 0:
-                    self.log_writer.log_search("genre_year", search_params, total_count)
-                
-                # Отображаем результаты
-                year_str = f"{start_year}-{end_year}" if start_year != end_year else str(start_year)
-                print(f"\n🎬 Фильмы жанра '{genre}' за {year_str} (показано {offset + 1}-{offset + len(films)} из {total_count}):")
-                print(self.formatter.format_films_table(films))
+            total_count = None
+            logged = False
+            search = lambda offset, count_mode: self.mysql_conn.search_by_genre_and_years(
+                genre, start_year, end_year, offset, PAGE_SIZE, count_mode=count_mode)
+            while page is not None:
+                offset = page * PAGE_SIZE
+                with action("cli.genre_year_search", page=page):
+                    films, count = self._get_page(("genre_year", genre, start_year, end_year), page, search)
+                    total_count = count if count is not None else total_count
+                    
+                    if not films and page == 0:
+                        print(f"❌ Фильмы жанра '{genre}' за {start_year}-{end_year} не найдены.")
+                        with span("log_search"):
+                            self.log_writer.log_search("genre_year", search_params, 0)
+                        return
+                    
+                    if not films:
+                        print("\n📋 Больше результатов нет.")
+                        break
+                    
+                    # Первый раз логируем запрос (возврат на первую страницу — не новый поиск)
+                    if not logged:
+                        with span("log_search"):
+                            self.log_writer.log_search("genre_year", search_params, total_count)
+                        logged = True
+                    
+                    # Отображаем результаты
+                    year_str = f"{start_year}-{end_year}" if start_year != end_year else str(start_year)
+                    print(f"\n🎬 Фильмы жанра '{genre}' за {year_str} (показано {offset + 1}-{offset + len(films)} из {total_count}):")
+                    with span("format"):
+                        table = self.formatter.format_films_table(films)
+                    print(table)
                 
                 # Спрашиваем о продолжении
-                if len(films) == 10:
-                    choice = input("\n➡️  Показать следующие 10 результатов? (y/n): ").lower()
-                    if choice != 'y':
-                        break
-                    page += 1
-                else:
-                    break
+                page = self._ask_page(page, films)
                     
         except Exception as e:
             self.logger.error(f"Ошибка при поиске по жанру и годам: {e}")
@@ -214,8 +327,12 @@ class MovieSearchApp:
         
         # Проверяем подключения при запуске
         if not self.mysql_conn.test_connection():
-            print("❌ Не удалось подключиться к MySQL. Проверьте настройки подключения.")
-            return
+            replica = self.replica_syncer.replica if self.replica_syncer else None
+            if replica is None or not replica.ready:
+                print("❌ Не удалось подключиться к MySQL. Проверьте настройки подключения.")
+                return
+            local_replica.mark_mysql_down()
+            print(f"⚠️  MySQL недоступна — поиск работает по локальной реплике ({replica.describe()}).")
         
         if not self.log_writer.test_connection():
             print("❌ Не удалось подключиться к MongoDB. Проверьте настройки подключения.")
@@ -250,8 +367,44 @@ class MovieSearchApp:
             except Exception as e:
                 self.logger.error(f"Неожиданная ошибка в главном цикле: {e}")
                 print("❌ Произошла неожиданная ошибка. Попробуйте еще раз.")
+        
+        self.page_cache.close()
+        self.export_trace()
+    
+    def export_trace(self):
+        """Сохраняет накопленные спаны в Chrome trace (если включено --trace)"""
+        if not self.trace_path:
+            return
+        try:
+            n = TRACER.export_chrome(self.trace_path)
+            print(f"🧵 Трассировка сохранена: {self.trace_path} ({n} спанов)")
+        except Exception as e:
+            self.logger.error(f"Не удалось сохранить трассировку: {e}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Поиск фильмов (консольная версия)")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="выводить разбивку действий по стадиям и сохранить Chrome trace в FILE")
+    parser.add_argument("--profile", nargs="?", const="cprofile", choices=profiling.PROFILE_MODES,
+                        help="профилировать каждое действие (cprofile по умолчанию или sample)")
+    parser.add_argument("--batch", metavar="SPECS",
+                        help="пакетный режим без меню: спецификации из файла или '-' (stdin), см. batch.py")
+    batch.add_batch_arguments(parser)
+    return parser.parse_args(argv)
 
 
 if __name__ == "__main__":
-    app = MovieSearchApp()
-    app.run()
\ No newline at end of file
+    args = parse_args()
+    if args.batch:
+        logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+        sys.exit(batch.run_from_args(args.batch, args))
+    if args.profile:
+        profiling.PROFILER.enable(args.profile)
+    app = MovieSearchApp(trace_path=args.trace)
+    app.run()
+    if profiling.PROFILER.records:
+        print(f"\n🔬 Профили ({len(profiling.PROFILER.records)}): {profiling.PROFILE_DIR}")
+        slowest = max(profiling.PROFILER.records, key=lambda r: r["elapsed_ms"])
+        print(f"Самое медленное действие: {slowest['name']} ({slowest['elapsed_ms']:.0f} ms)")
+        print(profiling.summarize(slowest["path"], limit=15))
\ No newline at end of file
@@ -1,25 +1,40 @@
 # main_gui3.py – Sakila Desktop v3 (Максимальный функционал)
-import sys, os, csv, webbrowser, json, ctypes, importlib, requests, hashlib
-from typing import List, Dict, Optional, Tuple, Any
+import sys, os, webbrowser, json, ctypes, importlib, hashlib
+from typing import List, Dict, Optional, Tuple, Any, Callable, TYPE_CHECKING
 from datetime import datetime, timedelta
-from functools import lru_cache
+from itertools import islice
 import pickle
+import weakref
 
 # --- Хак для PyInstaller ---
-if getattr(sys, "frozen", False):
+# Импорты видны анализатору PyInstaller, но при запуске не выполняются
+if TYPE_CHECKING:
     import pandas as _pandas
     import matplotlib as _matplotlib
+    import matplotlib.pyplot as _pyplot
+    import matplotlib.backends.backend_qt5agg as _backend_qt5agg
     import numpy as _numpy
+    import requests as _requests
 
 # Ленивый импорт для быстрого старта
 def pd(): return importlib.import_module("pandas")
 def plt(): return importlib.import_module("matplotlib.pyplot")
 def np(): return importlib.import_module("numpy")
+def requests(): return importlib.import_module("requests")
 
-from PyQt6.QtCore import (Qt, QAbstractTableModel, QModelIndex, QTimer, QSize, 
+def mpl_canvas():
+    """(Figure, FigureCanvas) — matplotlib грузится при первом графике"""
+    matplotlib = importlib.import_module("matplotlib")
+    if matplotlib.get_backend().lower() != "qt5agg":
+        matplotlib.use('Qt5Agg')
+    backend = importlib.import_module("matplotlib.backends.backend_qt5agg")
+    figure = importlib.import_module("matplotlib.figure")
+    return figure.Figure, backend.FigureCanvasQTAgg
+
+from PyQt6.QtCore import (Qt, QObject, QAbstractTableModel, QModelIndex, QTimer, QSize, 
                          QSettings, QThread, pyqtSignal, QPropertyAnimation, 
-                         QEasingCurve, QPoint, QRect)
-from PyQt6.QtGui import (QAction, QIcon, QPalette, QColor, QFont, QPixmap, 
+                         QEasingCurve, QPoint, QRect, QStringListModel)
+from PyQt6.QtGui import (QAction, QActionGroup, QIcon, QPalette, QColor, QFont, QPixmap, 
                         QMovie, QPainter, QBrush, QPen, QKeySequence)
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QTabWidget, QVBoxLayout, QHBoxLayout,
@@ -29,16 +44,23 @@ from PyQt6.QtWidgets import (
     QGraphicsOpacityEffect, QCompleter, QGridLayout, QButtonGroup, QRadioButton
 )
 
-# Matplotlib backend
-import matplotlib
-matplotlib.use('Qt5Agg')
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
-
 # твои модули
 from mysql_connector import MySQLConnector
 from log_writer import LogWriter
 from log_stats import LogStats
+import exporter
+import health_checks
+from reference_data import ReferenceData, keys_for
+from query_stats import QUERY_STATS, SLOW_QUERY_LOG
+from tracing import TRACER, span, traced, format_breakdown
+from stall_watchdog import StallWatchdog, HEARTBEAT_MS
+import profiling
+import memory_budget
+from memory_budget import BoundedCache
+import analytics_snapshot
+import local_replica
+import change_detector
+from config import APP_CONFIG
 
 APP_ID = "com.ich.sakila.desktop.v3"
 APP_BUILD = "v3.0"
@@ -46,6 +68,17 @@ CACHE_DIR = os.path.join(os.path.expanduser("~"), ".sakila_cache")
 FAVORITES_FILE = os.path.join(CACHE_DIR, "favorites.json")
 SETTINGS_FILE = os.path.join(CACHE_DIR, "settings.json")
 CACHE_FILE = os.path.join(CACHE_DIR, "search_cache.pkl")
+REFERENCE_FILE = os.path.join(CACHE_DIR, "reference_data.json")
+STALLS_FILE = os.path.join(CACHE_DIR, "ui_stalls.log")
+
+# Потоковая подгрузка результатов в таблицы
+RESULT_FIRST_BATCH = 200   # строк до первой отрисовки
+RESULT_FETCH_BATCH = 500   # строк на каждый fetchMore
+RESIZE_SAMPLE_ROWS = 200   # строк, по которым считается ширина колонок
+RESULT_LIMIT_MAX = 500000  # верхняя граница спинбоксов Limit
+
+# Вкладки строятся при первом показе (ключ lazy_tabs в settings.json)
+LAZY_TABS = True
 
 # TMDB API (опционально - если есть ключ)
 TMDB_API_KEY = ""  # Можно задать в настройках
@@ -68,66 +101,88 @@ def base_dir():
 def res_path(name: str) -> str:
     return os.path.join(base_dir(), name)
 
-def save_df_to_csv(parent, df, default_name="data.csv"):
-    if df is None or df.empty:
-        parent_notify = getattr(parent, "notify", None)
-        if callable(parent_notify):
-            parent_notify("No data for export")
-        else:
-            QMessageBox.information(parent, "Export", "No data for export.")
-        return
-    path, _ = QFileDialog.getSaveFileName(parent, "Save CSV", default_name, "CSV Files (*.csv)")
-    if not path:
-        return
-    df.to_csv(path, index=False, quoting=csv.QUOTE_MINIMAL)
-    if callable(parent_notify := getattr(parent, "notify", None)):
-        parent_notify("File сохранён")
+def analytics_source(db):
+    """Свежий локальный снимок (DuckDB) для аналитики, иначе живая MySQL"""
+    snapshot = analytics_snapshot.open_snapshot(
+        max_age_h=APP_CONFIG.get("analytics_snapshot_max_age_h", analytics_snapshot.DEFAULT_MAX_AGE_H))
+    return snapshot or db
 
-def save_df_to_excel(parent, df, default_name="data.xlsx"):
-    """Export в Excel с форматированием"""
-    if df is None or df.empty:
-        QMessageBox.information(parent, "Export", "No data for export.")
+def _notify(parent, msg: str):
+    notify = getattr(parent, "notify", None)
+    if callable(notify):
+        notify(msg)
+    elif isinstance(parent, QMainWindow):
+        parent.statusBar().showMessage(msg, 3000)
+    else:
+        QMessageBox.information(parent, "Export", msg)
+
+# ---------- Экспорт в фоне ----------
+class ExportWorker(QThread):
+    """Пишет файл экспорта в отдельном потоке (запрос без LIMIT или готовый DataFrame)"""
+    progress = pyqtSignal(int)
+    finished_ok = pyqtSignal(str, int)
+    failed = pyqtSignal(str)
+    
+    def __init__(self, path: str, db=None, sql: str = None, params=None, df=None):
+        super().__init__()
+        self.path = path
+        self.db, self.sql, self.params, self.df = db, sql, params, df
+        self._stop = False
+    
+    def cancel(self):
+        self._stop = True
+    
+    def run(self):
+        try:
+            if self.sql is not None:
+                rows = exporter.export_query(self.db, self.sql, self.params, self.path,
+                                             on_progress=self.progress.emit,
+                                             should_stop=lambda: self._stop)
+            else:
+                rows = exporter.export_dataframe(self.df, self.path,
+                                                 on_progress=self.progress.emit,
+                                                 should_stop=lambda: self._stop)
+            self.finished_ok.emit(self.path, rows)
+        except exporter.ExportCancelled:
+            self.failed.emit("Export cancelled")
+        except Exception as e:
+            self.failed.emit(str(e))
+
+def start_export(parent, default_name: str, formats=("csv",), df=None,
+                 db=None, sql: str = None, params=None):
+    """Спрашивает путь и запускает ExportWorker; прогресс уходит в notify родителя"""
+    if sql is None and (df is None or df.empty):
+        _notify(parent, "No data for export")
         return
-    path, _ = QFileDialog.getSaveFileName(parent, "Save Excel", default_name, "Excel Files (*.xlsx)")
+    worker = getattr(parent, "_export_worker", None)
+    if worker is not None and worker.isRunning():
+        _notify(parent, "Export is already running")
+        return
+    filters = ";;".join(exporter.EXPORT_FORMATS[f] for f in formats)
+    path, _ = QFileDialog.getSaveFileName(parent, "Export", default_name, filters)
     if not path:
         return
+    if not os.path.splitext(path)[1]:
+        path += "." + formats[0]
     try:
-        import openpyxl
-        from openpyxl.styles import Font, PatternFill, Alignment
-        
-        with pd().ExcelWriter(path, engine='openpyxl') as writer:
-            df.to_excel(writer, index=False, sheet_name='Films')
-            worksheet = writer.sheets['Films']
-            
-            # Форматирование заголовков
-            header_font = Font(bold=True, color="FFFFFF")
-            header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-            header_alignment = Alignment(horizontal="center", vertical="center")
-            
-            for cell in worksheet[1]:
-                cell.font = header_font
-                cell.fill = header_fill
-                cell.alignment = header_alignment
-            
-            # Автоширина колонок
-            for column in worksheet.columns:
-                max_length = 0
-                column_letter = column[0].column_letter
-                for cell in column:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = min(max_length + 2, 50)
-                worksheet.column_dimensions[column_letter].width = adjusted_width
-        
-        if callable(notify := getattr(parent, "notify", None)):
-            notify("Excel file saved")
-    except ImportError:
-        QMessageBox.warning(parent, "Error", "Install openpyxl for export in Excel:\npip install openpyxl")
-    except Exception as e:
-        QMessageBox.critical(parent, "Error", f"Error экспорта: {str(e)}")
+        exporter.format_from_path(path)
+    except exporter.ExportError as e:
+        QMessageBox.warning(parent, "Error", str(e))
+        return
+    
+    worker = ExportWorker(path, db=db, sql=sql, params=params, df=df)
+    worker.progress.connect(lambda n: _notify(parent, f"Exporting… {n:,} rows"))
+    worker.finished_ok.connect(lambda p, n: _notify(parent, f"Saved {n:,} rows to {os.path.basename(p)}"))
+    worker.failed.connect(lambda msg: QMessageBox.warning(parent, "Export error", msg))
+    parent._export_worker = worker
+    worker.start()
+
+def save_df_to_csv(parent, df, default_name="data.csv"):
+    start_export(parent, default_name, ("csv",), df=df)
+
+def save_df_to_excel(parent, df, default_name="data.xlsx"):
+    """Export в Excel с форматированием (write-only, в фоне)"""
+    start_export(parent, default_name, ("xlsx",), df=df)
 
 def set_dark_palette(app: QApplication):
     app.setStyle("Fusion")
@@ -264,40 +319,71 @@ def set_dark_palette(app: QApplication):
     """)
 
 # ---------- Кеш для поиска ----------
+def _refill_combo(combo: QComboBox, items: List[str], head: Optional[str] = None):
+    """Перезаполняет комбобокс, сохраняя текущий выбор (без лишних сигналов)"""
+    current = combo.currentText()
+    combo.blockSignals(True)
+    combo.clear()
+    if head is not None:
+        combo.addItem(head)
+    combo.addItems(items)
+    idx = combo.findText(current)
+    combo.setCurrentIndex(idx if idx >= 0 else 0)
+    combo.blockSignals(False)
+
+def _pixmap_bytes(pixmap) -> int:
+    """Память под QPixmap (None — закэшированный промах загрузки)"""
+    if pixmap is None or pixmap.isNull():
+        return 16
+    return pixmap.width() * pixmap.height() * max(pixmap.depth(), 8) // 8
+
 class SearchCache:
+    """
+    Результаты поиска по ключу: LRU с бюджетом памяти (memory_budget "search_cache").
+    Запись хранит штамп таблиц, из которых прочитана (change_detector), и
+    отбрасывается при чтении, если они с тех пор изменились — в том числе
+    между запусками приложения.
+    """
     def __init__(self, max_size=100):
         self.max_size = max_size
-        self.cache = {}
+        self.cache = BoundedCache("search_cache", max_items=max_size)
         self.load()
     
     def get(self, key: str) -> Optional[Any]:
-        return self.cache.get(key)
-    
-    def set(self, key: str, value: Any):
-        if len(self.cache) >= self.max_size:
-            # Удаляем старые записи
-            oldest = sorted(self.cache.keys())[:10]
-            for k in oldest:
-                del self.cache[k]
-        self.cache[key] = value
+        entry = self.cache.get(key)
+        if entry is None:
+            return None
+        stamp, value = entry
+        if not change_detector.is_fresh(stamp):
+            self.cache.pop(key)
+            return None
+        return value
+    
+    def set(self, key: str, value: Any, tables=change_detector.CAST_TABLES):
+        self.cache.set(key, (change_detector.stamp(tables), value))
         self.save()
     
     def save(self):
         try:
             with open(CACHE_FILE, 'wb') as f:
-                pickle.dump(self.cache, f)
+                pickle.dump(dict(self.cache.items()), f)
         except Exception:
             pass
     
     def load(self):
+        self.cache.clear()
         try:
             if os.path.exists(CACHE_FILE):
                 with open(CACHE_FILE, 'rb') as f:
-                    self.cache = pickle.load(f)
+                    for key, entry in pickle.load(f).items():
+                        if isinstance(entry, tuple) and len(entry) == 2:  # (штамп, значение)
+                            self.cache.set(key, entry)
         except Exception:
-            self.cache = {}
+            self.cache.clear()
 
 # ---------- Загрузчик постеров ----------
+_NOT_CACHED = object()  # отличает «нет в кэше» от закэшированного промаха (None)
+
 class PosterLoader(QThread):
     posterLoaded = pyqtSignal(int, QPixmap)
     
@@ -305,6 +391,9 @@ class PosterLoader(QThread):
         super().__init__()
         self.queue = []
         self.running = True
+        # (title, year) -> QPixmap или None (промах); читается только из потока загрузчика.
+        # От таблиц каталога не зависит: другое название или год — другой ключ
+        self._cache = BoundedCache("poster_downloads", sizeof=_pixmap_bytes)
     
     def add_request(self, film_id: int, title: str, year: Optional[int]):
         self.queue.append((film_id, title, year))
@@ -313,14 +402,24 @@ class PosterLoader(QThread):
         while self.running:
             if self.queue:
                 film_id, title, year = self.queue.pop(0)
-                pixmap = self.load_poster(title, year)
+                with span("poster.load", film_id=film_id):
+                    pixmap = self.load_poster(title, year)
                 if pixmap:
                     self.posterLoaded.emit(film_id, pixmap)
             else:
                 self.msleep(100)
     
-    @lru_cache(maxsize=200)
     def load_poster(self, title: str, year: Optional[int]) -> Optional[QPixmap]:
+        key = (title, year)
+        # Одно обращение: между проверкой и чтением запись могла быть вытеснена
+        cached = self._cache.get(key, _NOT_CACHED)
+        if cached is not _NOT_CACHED:
+            return cached
+        pixmap = self._download_poster(title, year)
+        self._cache.set(key, pixmap)
+        return pixmap
+    
+    def _download_poster(self, title: str, year: Optional[int]) -> Optional[QPixmap]:
         if not TMDB_API_KEY:
             return None
         try:
@@ -331,14 +430,14 @@ class PosterLoader(QThread):
                 'query': title,
                 'year': year if year else ''
             }
-            resp = requests.get(search_url, params=params, timeout=5)
+            resp = requests().get(search_url, params=params, timeout=5)
             data = resp.json()
             
             if data.get('results'):
                 poster_path = data['results'][0].get('poster_path')
                 if poster_path:
                     img_url = f"{TMDB_IMG_BASE}{poster_path}"
-                    img_resp = requests.get(img_url, timeout=5)
+                    img_resp = requests().get(img_url, timeout=5)
                     pixmap = QPixmap()
                     pixmap.loadFromData(img_resp.content)
                     return pixmap.scaled(100, 150, Qt.AspectRatioMode.KeepAspectRatio, 
@@ -373,45 +472,169 @@ class AnimatedButton(QPushButton):
         super().leaveEvent(event)
 
 # ---------- Модель для DataFrame с постерами ----------
+_LIVE_MODELS: "weakref.WeakSet[DataFrameModel]" = weakref.WeakSet()
+
+def _result_tables_memory() -> Tuple[int, int]:
+    """Память всех живых табличных моделей: (байты, строки)"""
+    models = list(_LIVE_MODELS)
+    return sum(m.memory_bytes() for m in models), sum(m.rowCount() for m in models)
+
+memory_budget.register_probe("result_tables", _result_tables_memory)
+
 class DataFrameModel(QAbstractTableModel):
+    """
+    Табличная модель поверх DataFrame.
+    
+    DataFrame не копируется: модель и вызывающий код разделяют один объект,
+    поэтому снаружи его нужно только читать. Строки для отображения
+    считаются один раз на колонку и кешируются, постеры обновляются
+    пачками через таймер. Через set_stream() строки подгружаются
+    из итератора по мере прокрутки (canFetchMore/fetchMore).
+    """
+    POSTER_FLUSH_MS = 50
+    streamError = pyqtSignal(str)
+    
     def __init__(self, df=None):
         super().__init__()
+        self.posters = BoundedCache("posters", sizeof=_pixmap_bytes)  # film_id -> QPixmap
+        _LIVE_MODELS.add(self)
+        self._pending_posters = set()
+        self._poster_timer = QTimer(self)
+        self._poster_timer.setSingleShot(True)
+        self._poster_timer.timeout.connect(self._flush_posters)
+        self._stream = None
+        self._batch_size = RESULT_FETCH_BATCH
         self.set_dataframe(df if df is not None else pd().DataFrame())
-        self.posters = {}  # film_id -> QPixmap
         
     def set_dataframe(self, df):
         self.beginResetModel()
-        self._df = df.copy()
+        self._close_stream()
+        self._df = df
+        self._pending_rows: List[Dict] = []  # догруженные строки, ещё не слитые в DataFrame
+        self._keys = list(df.columns)
+        self._columns = [str(c) for c in self._keys]
+        self._display: Dict[int, List[str]] = {}  # колонка -> строки для отображения
+        self._row_by_id: Dict[Any, List[int]] = {}  # film_id -> номера строк
+        self._film_ids: List[Any] = df['film_id'].tolist() if 'film_id' in self._columns else []
+        for row, fid in enumerate(self._film_ids):
+            self._row_by_id.setdefault(fid, []).append(row)
+        self._pending_posters.clear()
         self.endResetModel()
     
-    def add_poster(self, film_id: int, pixmap: QPixmap):
-        self.posters[film_id] = pixmap
-        # Обновляем только строку с этим film_id
-        if 'film_id' in self._df.columns:
-            rows = self._df[self._df['film_id'] == film_id].index.tolist()
-            for row in rows:
-                self.dataChanged.emit(self.index(row, 0), self.index(row, self.columnCount() - 1))
+    # --- потоковая подгрузка ---
+    def set_stream(self, rows, first_batch: int = RESULT_FIRST_BATCH,
+                   batch_size: int = RESULT_FETCH_BATCH):
+        """Первая пачка строк показывается сразу, остальные — при прокрутке"""
+        self._close_stream()
+        rows = iter(rows)
+        with span("sql", rows=first_batch):
+            head = list(islice(rows, first_batch))
+        with span("dataframe", rows=len(head)):
+            self.set_dataframe(pd().DataFrame(head))
+        if len(head) == first_batch:
+            self._stream = rows
+            self._batch_size = batch_size
+    
+    def _close_stream(self):
+        stream, self._stream = self._stream, None
+        close = getattr(stream, "close", None)
+        if callable(close):
+            try:
+                close()
+            except Exception:
+                pass
     
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._stream is not None
+    
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._stream is None:
+            return
+        try:
+            with span("fetch_more", rows=self._batch_size):
+                batch = list(islice(self._stream, self._batch_size))
+        except Exception as e:
+            self._stream = None
+            self.streamError.emit(str(e))
+            return
+        if len(batch) < self._batch_size:
+            self._close_stream()
+        if batch:
+            self._append_rows(batch)
+    
+    def _append_rows(self, batch: List[Dict]):
+        first = self.rowCount()
+        self.beginInsertRows(QModelIndex(), first, first + len(batch) - 1)
+        self._pending_rows.extend(batch)
+        for col, cached in self._display.items():
+            key = self._keys[col]
+            cached.extend("" if r.get(key) is None else str(r.get(key)) for r in batch)
+        if 'film_id' in self._columns:
+            for row, item in enumerate(batch, first):
+                fid = item.get('film_id')
+                self._film_ids.append(fid)
+                self._row_by_id.setdefault(fid, []).append(row)
+        self.endInsertRows()
+    
+    def _materialize(self):
+        """Сливает догруженные строки в DataFrame (только по требованию)"""
+        if self._pending_rows:
+            with span("dataframe", rows=len(self._pending_rows)):
+                tail = pd().DataFrame(self._pending_rows, columns=self._keys)
+                self._df = pd().concat([self._df, tail], ignore_index=True)
+            self._pending_rows = []
+        return self._df
+    
+    def _display_column(self, col: int) -> List[str]:
+        cached = self._display.get(col)
+        if cached is None:
+            values = self._materialize().iloc[:, col].tolist()
+            cached = ["" if v is None else str(v) for v in values]
+            self._display[col] = cached
+        return cached
+    
+    # --- постеры ---
+    def add_poster(self, film_id: int, pixmap: QPixmap):
+        self.posters.set(film_id, pixmap)
+        if film_id in self._row_by_id:
+            self._pending_posters.add(film_id)
+            if not self._poster_timer.isActive():
+                self._poster_timer.start(self.POSTER_FLUSH_MS)
+    
+    def _flush_posters(self):
+        """Одно событие dataChanged на каждый непрерывный диапазон строк"""
+        rows = sorted(r for fid in self._pending_posters for r in self._row_by_id.get(fid, ()))
+        self._pending_posters.clear()
+        if not rows:
+            return
+        start = prev = rows[0]
+        for r in rows[1:] + [None]:
+            if r is not None and r == prev + 1:
+                prev = r
+                continue
+            self.dataChanged.emit(self.index(start, 0), self.index(prev, 0),
+                                  [Qt.ItemDataRole.DecorationRole])
+            if r is not None:
+                start = prev = r
+    
+    # --- интерфейс Qt ---
     def rowCount(self, parent=QModelIndex()):
-        return 0 if self._df is None else len(self._df)
+        return 0 if self._df is None else len(self._df) + len(self._pending_rows)
     
     def columnCount(self, parent=QModelIndex()):
-        return 0 if self._df is None else len(self._df.columns)
+        return len(self._columns)
     
     def data(self, index, role=Qt.ItemDataRole.DisplayRole):
         if not index.isValid():
             return None
         
         if role == Qt.ItemDataRole.DisplayRole or role == Qt.ItemDataRole.ToolTipRole:
-            val = self._df.iat[index.row(), index.column()]
-            return "" if val is None else str(val)
+            return self._display_column(index.column())[index.row()]
         
         elif role == Qt.ItemDataRole.DecorationRole:
             # Показываем постер в первой колонке если есть
-            if index.column() == 0 and 'film_id' in self._df.columns:
-                film_id = self._df.iat[index.row(), self._df.columns.get_loc('film_id')]
-                if film_id in self.posters:
-                    return self.posters[film_id]
+            if index.column() == 0 and self._film_ids and self.posters:
+                return self.posters.get(self._film_ids[index.row()])
         
         return None
     
@@ -419,11 +642,21 @@ class DataFrameModel(QAbstractTableModel):
         if role != Qt.ItemDataRole.DisplayRole:
             return None
         if orientation == Qt.Orientation.Horizontal:
-            return str(self._df.columns[section]) if self._df is not None else ""
+            return self._columns[section] if section < len(self._columns) else ""
         return str(section + 1)
     
+    def row_dict(self, row: int) -> Dict:
+        return self._materialize().iloc[row].to_dict()
+    
+    def memory_bytes(self) -> int:
+        """DataFrame + ещё не слитые строки + кэш строк отображения (постеры — отдельный кэш)"""
+        return (memory_budget.estimate_size(self._df)
+                + memory_budget.estimate_size(self._pending_rows)
+                + memory_budget.estimate_size(self._display))
+    
     def dataframe(self):
-        return self._df.copy()
+        # Без копии: результат только для чтения (загруженные на данный момент строки)
+        return self._materialize()
 
 # ---------- Карточка фильма с постером ----------
 class FilmDialog(QDialog):
@@ -582,13 +815,18 @@ class FilmDialog(QDialog):
 
 # ---------- Вкладка: Advanced search ----------
 class AdvancedSearchTab(QWidget):
-    def __init__(self, db, lw, favorites_sink, notify=lambda msg: None):
+    def __init__(self, db, lw, favorites_sink, notify=lambda msg: None, ref: Optional[ReferenceData] = None):
         super().__init__()
         self.db, self.lw = db, lw
+        if ref is None:
+            ref = ReferenceData(db)
+            ref.load_now(["genres", "ratings"])
+        self.ref = ref
         self.favorites_sink = favorites_sink
         self.notify = notify
         self.on_fav_changed = lambda: None
         self.cache = SearchCache()
+        self.last_query = None  # (sql без LIMIT, params) последнего поиска
         
         main = QVBoxLayout(self)
         
@@ -610,18 +848,12 @@ class AdvancedSearchTab(QWidget):
         # Строка 2
         filters_layout.addWidget(QLabel("Genre:"), 1, 0)
         self.cb_genre = QComboBox()
-        self.cb_genre.addItem("Any")
-        try:
-            genres = self.db.get_available_genres()
-            for g in genres:
-                self.cb_genre.addItem(g['name'])
-        except:
-            pass
+        _refill_combo(self.cb_genre, self.ref.genres, head="Any")
         filters_layout.addWidget(self.cb_genre, 1, 1)
         
         filters_layout.addWidget(QLabel("Rating:"), 1, 2)
         self.cb_rating = QComboBox()
-        self.cb_rating.addItems(["Any","G","PG","PG-13","R","NC-17"])
+        _refill_combo(self.cb_rating, self.ref.ratings, head="Any")
         filters_layout.addWidget(self.cb_rating, 1, 3)
         
         # Строка 3
@@ -667,7 +899,7 @@ class AdvancedSearchTab(QWidget):
         
         filters_layout.addWidget(QLabel("Limit:"), 4, 2)
         self.sb_limit = QSpinBox()
-        self.sb_limit.setRange(1, 1000)
+        self.sb_limit.setRange(1, RESULT_LIMIT_MAX)
         self.sb_limit.setValue(100)
         filters_layout.addWidget(self.sb_limit, 4, 3)
         
@@ -699,18 +931,20 @@ class AdvancedSearchTab(QWidget):
         # Таблица
         self.table = QTableView()
         self.model = DataFrameModel()
+        self.model.streamError.connect(lambda msg: self.notify(f"Loading stopped: {msg}"))
         self.table.setModel(self.model)
         self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
         self.table.setSelectionMode(QTableView.SelectionMode.ExtendedSelection)
         self.table.setAlternatingRowColors(True)
         self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.horizontalHeader().setResizeContentsPrecision(RESIZE_SAMPLE_ROWS)
         self.table.doubleClicked.connect(self.open_details)
         self.table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.table.customContextMenuRequested.connect(self._context_menu)
         main.addWidget(self.table, 1)
         
         # Обработчики
-        self.btn_search.clicked.connect(self.on_search)
+        self.btn_search.clicked.connect(lambda: self.on_search())
         self.btn_reset.clicked.connect(self.reset_filters)
         self.btn_details.clicked.connect(self.open_details)
         self.btn_add_fav.clicked.connect(self.on_add_favorite)
@@ -721,6 +955,13 @@ class AdvancedSearchTab(QWidget):
         self.btn_search.setShortcut(QKeySequence("Ctrl+Return"))
         self.btn_reset.setShortcut(QKeySequence("Ctrl+R"))
     
+    def apply_reference(self, key: str):
+        """Справочник обновился в фоне"""
+        if key == "genres":
+            _refill_combo(self.cb_genre, self.ref.genres, head="Any")
+        elif key == "ratings":
+            _refill_combo(self.cb_rating, self.ref.ratings, head="Any")
+    
     def reset_filters(self):
         self.ed_title.clear()
         self.ed_actor.clear()
@@ -792,6 +1033,7 @@ class AdvancedSearchTab(QWidget):
         if data:
             dialog._find_similar(data)
     
+    @traced("search.advanced")
     def on_search(self):
         # Показываем прогресс
         self.progress.setVisible(True)
@@ -814,8 +1056,12 @@ class AdvancedSearchTab(QWidget):
         # Проверяем кеш
         cached_result = self.cache.get(cache_key)
         if cached_result:
-            self.model.set_dataframe(pd().DataFrame(cached_result))
-            self.table.resizeColumnsToContents()
+            # В кеше только полные результаты — экспортируем загруженную таблицу
+            self.last_query = None
+            with span("dataframe", cached=True):
+                self.model.set_dataframe(pd().DataFrame(cached_result))
+            with span("resize"):
+                self.table.resizeColumnsToContents()
             self.progress.setVisible(False)
             self.notify("Results loaded from cache")
             return
@@ -823,6 +1069,7 @@ class AdvancedSearchTab(QWidget):
         # Строим запрос
         sql_parts = ["SELECT DISTINCT f.film_id, f.title, f.description, f.release_year, f.length, f.rating"]
         from_parts = ["FROM film f"]
+        tables = ["film"]  # от чего зависит результат — для инвалидации кеша
         where_parts = ["WHERE 1=1"]
         params = {}
         
@@ -836,6 +1083,7 @@ class AdvancedSearchTab(QWidget):
             from_parts.append("JOIN film_actor fa ON fa.film_id = f.film_id")
             from_parts.append("JOIN actor a ON a.actor_id = fa.actor_id")
             where_parts.append("AND (a.first_name LIKE %(actor)s OR a.last_name LIKE %(actor)s)")
+            tables += ["film_actor", "actor"]
             params['actor'] = f"%{self.ed_actor.text().strip()}%"
         
         # Жанр
@@ -843,6 +1091,7 @@ class AdvancedSearchTab(QWidget):
             from_parts.append("JOIN film_category fc ON fc.film_id = f.film_id")
             from_parts.append("JOIN category c ON c.category_id = fc.category_id")
             where_parts.append("AND c.name = %(genre)s")
+            tables += ["film_category", "category"]
             params['genre'] = self.cb_genre.currentText()
         
         # Rating
@@ -879,30 +1128,34 @@ class AdvancedSearchTab(QWidget):
         order_by = order_map.get(self.cb_sort.currentText(), "f.release_year DESC, f.title")
         
         # Собираем запрос
-        sql = f"{' '.join(sql_parts)} {' '.join(from_parts)} {' '.join(where_parts)} ORDER BY {order_by} LIMIT %(limit)s"
+        sql = f"{' '.join(sql_parts)} {' '.join(from_parts)} {' '.join(where_parts)} ORDER BY {order_by}"
+        # Тот же запрос без LIMIT — для экспорта полного результата
+        self.last_query = (sql, dict(params))
+        sql += " LIMIT %(limit)s"
         params['limit'] = self.sb_limit.value()
         
         try:
-            rows = self.db.select(sql, params)
-            df = pd().DataFrame(rows) if rows else pd().DataFrame()
+            self.model.set_stream(self.db.select_iter(sql, params))
+            with span("resize"):
+                self.table.resizeColumnsToContents()
+            loaded, more = self.model.rowCount(), self.model.canFetchMore()
             
-            # Сохраняем в кеш
-            if rows:
-                self.cache.set(cache_key, rows)
-            
-            self.model.set_dataframe(df)
-            self.table.resizeColumnsToContents()
+            # Сохраняем в кеш только результаты, полностью уместившиеся в первую пачку
+            if loaded and not more:
+                with span("cache"):
+                    self.cache.set(cache_key, self.model.dataframe().to_dict('records'), tables)
             
             # Логируем
             try:
-                self.lw.log_search("advanced", params, len(df))
+                with span("log_search"):
+                    self.lw.log_search("advanced", params, loaded)
             except:
                 pass
             
-            if df.empty:
+            if not loaded:
                 self.notify("Nothing found")
             else:
-                self.notify(f"Found movies: {len(df)}")
+                self.notify(f"Found movies: {loaded}{'+' if more else ''}")
         
         except Exception as e:
             QMessageBox.critical(self, "Search error", str(e))
@@ -915,7 +1168,7 @@ class AdvancedSearchTab(QWidget):
             self.notify("Select a row")
             return
         r = sel[0].row()
-        row = self.model.dataframe().iloc[r].to_dict()
+        row = self.model.row_dict(r)
         fid = row.get("film_id")
         if fid is None:
             self.notify("Could not determine film_id")
@@ -949,6 +1202,7 @@ class AnalyticsTab(QWidget):
     def __init__(self, db: MySQLConnector):
         super().__init__()
         self.db = db
+        self.source = db   # MySQL или снимок analytics_snapshot (выбирается при каждом обновлении)
         
         main = QVBoxLayout(self)
         
@@ -956,7 +1210,10 @@ class AnalyticsTab(QWidget):
         control_panel = QHBoxLayout()
         self.btn_refresh = AnimatedButton("🔄 Update all charts")
         self.btn_export = AnimatedButton("💾 Save charts")
+        self.source_label = QLabel()
+        self.source_label.setStyleSheet("color: #8b93a7;")
         control_panel.addWidget(self.btn_refresh)
+        control_panel.addWidget(self.source_label)
         control_panel.addStretch()
         control_panel.addWidget(self.btn_export)
         main.addLayout(control_panel)
@@ -1011,6 +1268,7 @@ class AnalyticsTab(QWidget):
         label.setFont(font)
         layout.addWidget(label)
         
+        Figure, FigureCanvas = mpl_canvas()
         figure = Figure(figsize=(5, 4), dpi=80)
         canvas = FigureCanvas(figure)
         canvas.setStyleSheet("border: 1px solid #2b2f3a; border-radius: 10px;")
@@ -1021,7 +1279,18 @@ class AnalyticsTab(QWidget):
         
         return widget
     
+    def _switch_source(self):
+        """Берём свежий снимок, если он появился/обновился; иначе — живую базу"""
+        if self.source is not self.db:
+            self.source.close()
+        self.source = analytics_source(self.db)
+        if self.source is self.db:
+            self.source_label.setText("Source: live MySQL")
+        else:
+            self.source_label.setText(f"Source: {self.source.describe()}")
+    
     def refresh_all(self):
+        self._switch_source()
         self._plot_years()
         self._plot_genres()
         self._plot_ratings()
@@ -1036,7 +1305,7 @@ class AnalyticsTab(QWidget):
                 GROUP BY YEAR(release_date)
                 ORDER BY release_year
             """
-            data = self.db.select(sql)
+            data = self.source.select(sql)
             if not data:
                 return
             
@@ -1076,7 +1345,7 @@ class AnalyticsTab(QWidget):
                 ORDER BY count DESC
                 LIMIT 10
             """
-            data = self.db.select(sql)
+            data = self.source.select(sql)
             if not data:
                 return
             
@@ -1127,7 +1396,7 @@ class AnalyticsTab(QWidget):
                 GROUP BY rating_range
                 ORDER BY rating_range
             """
-            data = self.db.select(sql)
+            data = self.source.select(sql)
             if not data:
                 return
             
@@ -1181,7 +1450,7 @@ class AnalyticsTab(QWidget):
                 GROUP BY g.name
                 ORDER BY avg_length DESC
             """
-            data = self.db.select(sql)
+            data = self.source.select(sql)
             if not data:
                 return
             
@@ -1250,12 +1519,17 @@ class AnalyticsTab(QWidget):
 
 # ---------- Вкладка: Search (оригинальная, но улучшенная) ----------
 class SearchTab(QWidget):
-    def __init__(self, db, lw, favorites_sink, notify=lambda msg: None):
+    def __init__(self, db, lw, favorites_sink, notify=lambda msg: None, ref: Optional[ReferenceData] = None):
         super().__init__()
         self.db, self.lw = db, lw
+        if ref is None:
+            ref = ReferenceData(db)
+            ref.load_now(["titles", "ratings"])
+        self.ref = ref
         self.favorites_sink = favorites_sink
         self.notify = notify
         self.on_fav_changed = lambda: None
+        self.last_query = None  # (sql без LIMIT, params) последнего поиска
         
         main = QVBoxLayout(self)
         
@@ -1267,16 +1541,16 @@ class SearchTab(QWidget):
         self.ed_keyword.setPlaceholderText("Start typing a title...")
         
         # Автодополнение
-        self.completer = QCompleter()
+        self.completer = QCompleter(QStringListModel(self))
         self.completer.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
         self.ed_keyword.setCompleter(self.completer)
         self._update_completer()
         
         self.cb_rating = QComboBox()
-        self.cb_rating.addItems(["All","G","PG","PG-13","R","NC-17"])
+        _refill_combo(self.cb_rating, self.ref.ratings, head="All")
         
         self.sb_limit = QSpinBox()
-        self.sb_limit.setRange(1, 500)
+        self.sb_limit.setRange(1, RESULT_LIMIT_MAX)
         self.sb_limit.setValue(50)
         
         self.cb_mode = QComboBox()
@@ -1315,11 +1589,13 @@ class SearchTab(QWidget):
         
         self.table = QTableView()
         self.model = DataFrameModel()
+        self.model.streamError.connect(lambda msg: self.notify(f"Loading stopped: {msg}"))
         self.table.setModel(self.model)
         self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
         self.table.setSelectionMode(QTableView.SelectionMode.ExtendedSelection)
         self.table.setAlternatingRowColors(True)
         self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.horizontalHeader().setResizeContentsPrecision(RESIZE_SAMPLE_ROWS)
         self.table.doubleClicked.connect(self.open_details)
         self.table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.table.customContextMenuRequested.connect(self._context_menu)
@@ -1329,7 +1605,7 @@ class SearchTab(QWidget):
         
         main.addWidget(self.table, 1)
         
-        self.btn_search.clicked.connect(self.on_search)
+        self.btn_search.clicked.connect(lambda: self.on_search())
         self.btn_export.clicked.connect(lambda: save_df_to_csv(self, self.model.dataframe(), "search_results.csv"))
         self.btn_add_fav.clicked.connect(self.on_add_favorite)
         self.btn_details.clicked.connect(self.open_details)
@@ -1339,15 +1615,15 @@ class SearchTab(QWidget):
         self.poster_loader.posterLoaded.connect(self.model.add_poster)
     
     def _update_completer(self):
-        """Обновляет список автодополнения"""
-        try:
-            sql = "SELECT DISTINCT title FROM film ORDER BY title LIMIT 500"
-            rows = self.db.select(sql)
-            titles = [r['title'] for r in rows]
-            self.completer.setModel(self.completer.model())
-            self.completer.model().setStringList(titles)
-        except:
-            pass
+        """Обновляет список автодополнения из общего кэша справочников"""
+        self.completer.model().setStringList(self.ref.titles)
+    
+    def apply_reference(self, key: str):
+        """Справочник обновился в фоне"""
+        if key == "titles":
+            self._update_completer()
+        elif key == "ratings":
+            _refill_combo(self.cb_rating, self.ref.ratings, head="All")
     
     def _context_menu(self, pos):
         idx = self.table.indexAt(pos)
@@ -1398,13 +1674,14 @@ class SearchTab(QWidget):
             self.notify("Select a row")
             return
         r = sel[0].row()
-        row = self.model.dataframe().iloc[r].to_dict()
+        row = self.model.row_dict(r)
         fid = row.get("film_id")
         if fid is None:
             self.notify("Could not determine film_id")
             return
         FilmDialog(self.db, int(fid), self).exec()
     
+    @traced("search.keyword")
     def on_search(self):
         kw = self.ed_keyword.text().strip()
         if not kw:
@@ -1433,14 +1710,18 @@ class SearchTab(QWidget):
             params["rating"] = self.cb_rating.currentText()
         
         sql += " GROUP BY f.film_id, f.title, f.description, f.release_year, f.length, f.rating"
-        sql += " ORDER BY f.release_year DESC, f.title ASC LIMIT %(lim)s"
+        sql += " ORDER BY f.release_year DESC, f.title ASC"
+        # Тот же запрос без LIMIT — для экспорта полного результата
+        self.last_query = (sql, dict(params))
+        sql += " LIMIT %(lim)s"
         params["lim"] = int(self.sb_limit.value())
         
         try:
-            rows = self.db.select(sql, params)
-            df = pd().DataFrame(rows) if rows else pd().DataFrame()
-            self.model.set_dataframe(df)
-            self.table.resizeColumnsToContents()
+            self.model.set_stream(self.db.select_iter(sql, params))
+            with span("resize"):
+                self.table.resizeColumnsToContents()
+            df = self.model.dataframe()
+            more = self.model.canFetchMore()
             
             # Загружаем постеры если включено
             if self.cb_load_posters.isChecked() and not df.empty and TMDB_API_KEY:
@@ -1448,25 +1729,27 @@ class SearchTab(QWidget):
                 self.poster_progress.setRange(0, len(df))
                 self.poster_progress.setValue(0)
                 
-                for i, row in df.iterrows():
-                    self.poster_loader.add_request(
-                        row['film_id'], 
-                        row['title'], 
-                        row.get('release_year')
-                    )
-                    self.poster_progress.setValue(i + 1)
+                with span("posters.queue", count=len(df)):
+                    for i, row in df.iterrows():
+                        self.poster_loader.add_request(
+                            row['film_id'], 
+                            row['title'], 
+                            row.get('release_year')
+                        )
+                        self.poster_progress.setValue(i + 1)
                 
                 QTimer.singleShot(2000, lambda: self.poster_progress.setVisible(False))
             
             try:
-                self.lw.log_search("keyword", {"keyword": kw, "rating": self.cb_rating.currentText()}, len(df))
+                with span("log_search"):
+                    self.lw.log_search("keyword", {"keyword": kw, "rating": self.cb_rating.currentText()}, len(df))
             except:
                 pass
             
             if df.empty:
                 self.notify("Nothing found")
             else:
-                self.notify(f"Found: {len(df)} movies")
+                self.notify(f"Found: {len(df)}{'+' if more else ''} movies")
         
         except Exception as e:
             QMessageBox.critical(self, "Search error", str(e))
@@ -1494,49 +1777,138 @@ class SearchTab(QWidget):
         self._add_rows_to_fav(rows)
 
 # ---------- Favorites с сохранением ----------
+def _split_tags(tags) -> List[str]:
+    """Разбивает строку тегов "a, b, c" на список без пустых значений"""
+    if not tags:
+        return []
+    return [t.strip() for t in str(tags).split(',') if t.strip()]
+
 class FavoritesStore:
     def __init__(self):
         self._items: List[Dict] = []
         self._user_data: Dict[int, Dict] = {}  # film_id -> {rating, notes, tags}
+        # Индексы поддерживаются инкрементально при каждом изменении
+        self._by_id: Dict[Any, Dict] = {}           # film_id -> item
+        self._tag_index: Dict[str, set] = {}        # tag -> {film_id}
+        self._columns: Dict[str, None] = {}         # упорядоченное множество колонок
         self.load()
     
+    # --- индексы ---
+    def _index_columns(self, keys):
+        for k in keys:
+            if k not in self._columns:
+                self._columns[k] = None
+    
+    def _index_tags(self, film_id, tags):
+        for tag in _split_tags(tags):
+            self._tag_index.setdefault(tag, set()).add(film_id)
+    
+    def _unindex_tags(self, film_id, tags):
+        for tag in _split_tags(tags):
+            ids = self._tag_index.get(tag)
+            if ids is not None:
+                ids.discard(film_id)
+                if not ids:
+                    del self._tag_index[tag]
+    
+    def _rebuild_indexes(self):
+        self._by_id = {}
+        self._tag_index = {}
+        self._columns = {}
+        for item in self._items:
+            fid = item.get("film_id")
+            if fid is not None:
+                self._by_id[fid] = item
+            self._index_columns(item.keys())
+        for fid, data in self._user_data.items():
+            self._index_columns(data.keys())
+            self._index_tags(fid, data.get('tags'))
+    
+    # --- изменение ---
     def add(self, item: Dict) -> int:
         fid = item.get("film_id")
-        if fid is not None and any(x.get("film_id")==fid for x in self._items):
+        if fid is not None and fid in self._by_id:
             return 0
         self._items.append(item)
+        if fid is not None:
+            self._by_id[fid] = item
+        self._index_columns(item.keys())
         self.save()
         return 1
     
     def remove(self, film_id: int):
-        self._items = [x for x in self._items if x.get("film_id") != film_id]
-        if film_id in self._user_data:
-            del self._user_data[film_id]
+        self.remove_many([film_id])
+    
+    def remove_many(self, film_ids) -> int:
+        """Удаляет несколько фильмов за один проход и одну запись на диск"""
+        ids = {fid for fid in film_ids if fid in self._by_id}
+        if not ids:
+            return 0
+        self._items = [x for x in self._items if x.get("film_id") not in ids]
+        for fid in ids:
+            del self._by_id[fid]
+            data = self._user_data.pop(fid, None)
+            if data:
+                self._unindex_tags(fid, data.get('tags'))
         self.save()
+        return len(ids)
     
     def set_user_data(self, film_id: int, data: Dict):
+        old = self._user_data.get(film_id)
+        if old:
+            self._unindex_tags(film_id, old.get('tags'))
         self._user_data[film_id] = data
+        self._index_tags(film_id, data.get('tags'))
+        self._index_columns(data.keys())
+        self.save()
+    
+    def replace(self, items: List[Dict], user_data: Dict[int, Dict]):
+        """Полностью заменяет содержимое (восстановление из резервной копии)"""
+        self._items = list(items)
+        self._user_data = dict(user_data)
+        self._rebuild_indexes()
         self.save()
     
     def get_user_data(self, film_id: int) -> Dict:
         return self._user_data.get(film_id, {})
     
+    # --- чтение без копирования ---
+    def tags(self) -> List[str]:
+        """Все теги, отсортированные по имени"""
+        return sorted(self._tag_index)
+    
+    def ids_with_tag(self, tag: str) -> set:
+        """Множество film_id с указанным тегом"""
+        return set(self._tag_index.get(tag, ()))
+    
+    def columns(self) -> List[str]:
+        return list(self._columns)
+    
+    def items(self, ids: Optional[set] = None) -> List[Dict]:
+        """Элементы (по ссылке, в порядке добавления); ids=None — все"""
+        if ids is None:
+            return list(self._items)
+        return [x for x in self._items if x.get("film_id") in ids]
+    
+    def merged(self, item: Dict) -> Dict:
+        """Копия элемента с наложенными пользовательскими данными"""
+        result = item.copy()
+        fid = item.get("film_id")
+        if fid is not None and fid in self._user_data:
+            result.update(self._user_data[fid])
+        return result
+    
     def all(self) -> List[Dict]:
         # Добавляем пользовательские данные к элементам
-        result = []
-        for item in self._items:
-            fid = item.get("film_id")
-            if fid and fid in self._user_data:
-                item_copy = item.copy()
-                item_copy.update(self._user_data[fid])
-                result.append(item_copy)
-            else:
-                result.append(item.copy())
-        return result
+        return [self.merged(item) for item in self._items]
+    
+    def __len__(self):
+        return len(self._items)
     
     def clear(self):
         self._items.clear()
         self._user_data.clear()
+        self._rebuild_indexes()
         self.save()
     
     def save(self):
@@ -1562,6 +1934,60 @@ class FavoritesStore:
             print(f"Error downolad selected: {e}")
             self._items = []
             self._user_data = {}
+        self._rebuild_indexes()
+
+# ---------- Лёгкая модель для избранного ----------
+class FavoritesModel(QAbstractTableModel):
+    """Строки хранятся по ссылке и собираются только для видимых ячеек"""
+    def __init__(self, store: FavoritesStore):
+        super().__init__()
+        self.store = store
+        self._rows: List[Dict] = []
+        self._columns: List[str] = []
+    
+    def set_rows(self, rows: List[Dict], columns: List[str]):
+        self.beginResetModel()
+        self._rows = rows
+        self._columns = columns
+        self.endResetModel()
+    
+    def rowCount(self, parent=QModelIndex()):
+        return len(self._rows)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return len(self._columns)
+    
+    def _value(self, row: int, col: int):
+        item = self._rows[row]
+        key = self._columns[col]
+        fid = item.get("film_id")
+        if fid is not None:
+            user = self.store.get_user_data(fid)
+            if key in user:
+                return user[key]
+        return item.get(key)
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole or role == Qt.ItemDataRole.ToolTipRole:
+            val = self._value(index.row(), index.column())
+            return "" if val is None else str(val)
+        return None
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return str(self._columns[section])
+        return str(section + 1)
+    
+    def row_dict(self, row: int) -> Dict:
+        return self.store.merged(self._rows[row])
+    
+    def dataframe(self):
+        # Материализуем всё только для экспорта
+        return pd().DataFrame([self.store.merged(x) for x in self._rows], columns=self._columns)
 
 class FavoritesTab(QWidget):
     def __init__(self, store: FavoritesStore, notify=lambda msg: None):
@@ -1598,12 +2024,15 @@ class FavoritesTab(QWidget):
         
         # Таблица
         self.table = QTableView()
-        self.model = DataFrameModel()
+        self.model = FavoritesModel(self.store)
+        self._sized_columns: List[str] = []
         self.table.setModel(self.model)
         self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
         self.table.setSelectionMode(QTableView.SelectionMode.ExtendedSelection)
         self.table.setAlternatingRowColors(True)
         self.table.horizontalHeader().setStretchLastSection(True)
+        # Ширину колонок меряем по выборке строк, а не по всем
+        self.table.horizontalHeader().setResizeContentsPrecision(RESIZE_SAMPLE_ROWS)
         self.table.doubleClicked.connect(self.edit_item)
         main.addWidget(self.table, 1)
         
@@ -1617,44 +2046,36 @@ class FavoritesTab(QWidget):
         self.refresh()
     
     def refresh(self):
-        items = self.store.all()
-        
-        # Обновляем список тегов
-        all_tags = set()
-        for item in items:
-            tags = item.get('tags', '')
-            if tags:
-                all_tags.update(tag.strip() for tag in tags.split(','))
-        
+        # Обновляем список тегов из индекса (без копирования элементов)
         current_tag = self.tag_filter.currentText()
+        self.tag_filter.blockSignals(True)
         self.tag_filter.clear()
         self.tag_filter.addItem("All tags")
-        self.tag_filter.addItems(sorted(all_tags))
+        self.tag_filter.addItems(self.store.tags())
         
         # Восстанавливаем выбор
         idx = self.tag_filter.findText(current_tag)
         if idx >= 0:
             self.tag_filter.setCurrentIndex(idx)
+        self.tag_filter.blockSignals(False)
         
         # Применяем фильтр
         self.apply_tag_filter()
     
     def apply_tag_filter(self):
-        items = self.store.all()
         current_tag = self.tag_filter.currentText()
         
-        if current_tag == "All теги":
-            filtered_items = items
+        if not current_tag or current_tag == "All tags":
+            rows = self.store.items()
         else:
-            filtered_items = []
-            for item in items:
-                tags = item.get('tags', '')
-                if tags and current_tag in [t.strip() for t in tags.split(',')]:
-                    filtered_items.append(item)
+            rows = self.store.items(self.store.ids_with_tag(current_tag))
         
-        df = pd().DataFrame(filtered_items) if filtered_items else pd().DataFrame(columns=["No data"])
-        self.model.set_dataframe(df)
-        self.table.resizeColumnsToContents()
+        columns = self.store.columns() or ["No data"]
+        self.model.set_rows(rows, columns)
+        # Пересчитываем ширину только при изменении набора колонок
+        if columns != self._sized_columns:
+            self.table.resizeColumnsToContents()
+            self._sized_columns = columns
     
     def edit_item(self):
         sel = self.table.selectionModel().selectedRows()
@@ -1663,7 +2084,7 @@ class FavoritesTab(QWidget):
             return
         
         r = sel[0].row()
-        row = self.model.dataframe().iloc[r].to_dict()
+        row = self.model.row_dict(r)
         film_id = row.get("film_id")
         if not film_id:
             return
@@ -1736,11 +2157,8 @@ class FavoritesTab(QWidget):
                                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         
         if reply == QMessageBox.StandardButton.Yes:
-            df = self.model.dataframe()
-            for r in rows:
-                film_id = df.iloc[r].get('film_id')
-                if film_id:
-                    self.store.remove(film_id)
+            ids = [self.model.row_dict(r).get('film_id') for r in rows]
+            self.store.remove_many([fid for fid in ids if fid])
             self.refresh()
             self.notify(f"Удалено movies: {len(rows)}")
     
@@ -1758,11 +2176,112 @@ class FavoritesTab(QWidget):
             self.notify("Favorites list cleared")
 
 # ---------- Settings ----------
+class QueryPerformanceDialog(QDialog):
+    """Tools → Query performance: время запросов по отпечаткам SQL"""
+    COLUMNS = [("fingerprint", "Query"), ("count", "Calls"), ("rows", "Rows"), ("total_ms", "Total ms"),
+               ("p50_ms", "p50 ms"), ("p95_ms", "p95 ms"), ("p99_ms", "p99 ms"), ("max_ms", "Max ms"),
+               ("avg_connect_ms", "Connect ms"), ("avg_execute_ms", "Execute ms"),
+               ("avg_fetch_ms", "Fetch ms"), ("errors", "Errors")]
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Query performance")
+        self.resize(1000, 500)
+        
+        layout = QVBoxLayout(self)
+        info = QLabel(f"Slow query threshold: {QUERY_STATS.slow_ms} ms · log: {SLOW_QUERY_LOG}")
+        info.setWordWrap(True)
+        layout.addWidget(info)
+        
+        self.table = QTableView()
+        self.model = DataFrameModel()
+        self.table.setModel(self.model)
+        self.table.setAlternatingRowColors(True)
+        self.table.setSortingEnabled(False)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.doubleClicked.connect(self._copy_query)
+        layout.addWidget(self.table, 1)
+        
+        row = QHBoxLayout()
+        btn_refresh = QPushButton("🔄 Refresh")
+        btn_reset = QPushButton("🗑 Reset")
+        btn_close = QPushButton("Close")
+        btn_refresh.clicked.connect(self.refresh)
+        btn_reset.clicked.connect(self._reset)
+        btn_close.clicked.connect(self.accept)
+        row.addWidget(btn_refresh)
+        row.addWidget(btn_reset)
+        row.addStretch(1)
+        row.addWidget(btn_close)
+        layout.addLayout(row)
+        
+        self.refresh()
+    
+    def refresh(self):
+        rows = QUERY_STATS.summary()
+        df = pd().DataFrame(rows, columns=[key for key, _ in self.COLUMNS])
+        for key in df.columns:
+            if key.endswith("_ms"):
+                df[key] = df[key].round(1)
+        df.columns = [title for _, title in self.COLUMNS]
+        self.model.set_dataframe(df)
+        self.table.resizeColumnsToContents()
+        self.table.setColumnWidth(0, min(self.table.columnWidth(0), 420))
+    
+    def _reset(self):
+        QUERY_STATS.reset()
+        self.refresh()
+    
+    def _copy_query(self, index: QModelIndex):
+        QApplication.clipboard().setText(str(self.model.row_dict(index.row()).get("Query", "")))
+
+class ProfilesDialog(QDialog):
+    """Tools → Profiles: сохранённые профили действий и топ функций"""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Profiles")
+        self.resize(1000, 600)
+        
+        layout = QVBoxLayout(self)
+        splitter = QSplitter(Qt.Orientation.Horizontal)
+        self.list = QListWidget()
+        self.text = QTextEdit()
+        self.text.setReadOnly(True)
+        self.text.setFont(QFont("Consolas", 9))
+        splitter.addWidget(self.list)
+        splitter.addWidget(self.text)
+        splitter.setSizes([300, 700])
+        layout.addWidget(splitter, 1)
+        
+        row = QHBoxLayout()
+        info = QLabel(f"Folder: {profiling.PROFILE_DIR}")
+        info.setWordWrap(True)
+        btn_close = QPushButton("Close")
+        btn_close.clicked.connect(self.accept)
+        row.addWidget(info, 1)
+        row.addWidget(btn_close)
+        layout.addLayout(row)
+        
+        self._paths = profiling.list_profiles()
+        self.list.addItems([os.path.basename(p) for p in self._paths])
+        self.list.currentRowChanged.connect(self._show)
+        if self._paths:
+            self.list.setCurrentRow(0)
+        else:
+            self.text.setPlainText("No profiles yet. Enable Tools → Profiling and run a search.")
+    
+    def _show(self, row: int):
+        if 0 <= row < len(self._paths):
+            try:
+                self.text.setPlainText(profiling.summarize(self._paths[row]))
+            except Exception as e:
+                self.text.setPlainText(f"Failed to read profile: {e}")
+
 class SettingsDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setWindowTitle("Settings")
-        self.resize(500, 400)
+        self.resize(600, 700)
         
         self.settings = self._load_settings()
         
@@ -1806,6 +2325,36 @@ class SettingsDialog(QDialog):
         cache_layout.addWidget(cache_info)
         layout.addWidget(cache_group)
         
+        # Память: бюджеты кэшей и текущее потребление
+        mem_group = QGroupBox("Memory")
+        mem_layout = QFormLayout(mem_group)
+        budgets = {**memory_budget.budgets_mb(), **self.settings.get('memory_budgets_mb', {})}
+        self.budget_spins: Dict[str, QSpinBox] = {}
+        for name in memory_budget.DEFAULT_BUDGETS_MB:
+            sb = QSpinBox()
+            sb.setRange(1, 4096)
+            sb.setSuffix(" MB")
+            sb.setValue(int(budgets[name]))
+            mem_layout.addRow(f"{name}:", sb)
+            self.budget_spins[name] = sb
+        self.mem_report = QTextEdit()
+        self.mem_report.setReadOnly(True)
+        self.mem_report.setFont(QFont("Consolas", 9))
+        self.mem_report.setMinimumHeight(140)
+        mem_layout.addRow(self.mem_report)
+        mem_row = QHBoxLayout()
+        self.cb_tracemalloc = QCheckBox("Track allocations (tracemalloc, slower)")
+        self.cb_tracemalloc.setChecked(memory_budget.tracemalloc.is_tracing())
+        self.cb_tracemalloc.toggled.connect(self._toggle_tracemalloc)
+        btn_mem_refresh = QPushButton("Refresh")
+        btn_mem_refresh.clicked.connect(self._refresh_memory)
+        mem_row.addWidget(self.cb_tracemalloc)
+        mem_row.addStretch()
+        mem_row.addWidget(btn_mem_refresh)
+        mem_layout.addRow(mem_row)
+        layout.addWidget(mem_group)
+        self._refresh_memory()
+        
         # Кнопки
         buttons = QHBoxLayout()
         btn_save = QPushButton("Save")
@@ -1827,17 +2376,29 @@ class SettingsDialog(QDialog):
             pass
         return {}
     
+    def _refresh_memory(self):
+        self.mem_report.setPlainText(memory_budget.format_report())
+    
+    def _toggle_tracemalloc(self, on: bool):
+        if on:
+            memory_budget.start_tracemalloc()
+        else:
+            memory_budget.stop_tracemalloc()
+        self._refresh_memory()
+    
     def save_settings(self):
         global TMDB_API_KEY
         
-        self.settings = {
+        # Обновляем, а не перезаписываем: в файле есть и другие ключи (lazy_tabs, ...)
+        self.settings.update({
             'tmdb_api_key': self.api_key_edit.text().strip(),
             'db_host': self.db_host.text().strip(),
             'db_port': self.db_port.text().strip(),
             'db_user': self.db_user.text().strip(),
             'db_pass': self.db_pass.text().strip(),
-            'db_name': self.db_name.text().strip()
-        }
+            'db_name': self.db_name.text().strip(),
+            'memory_budgets_mb': {name: sb.value() for name, sb in self.budget_spins.items()},
+        })
         
         ensure_cache_dir()
         try:
@@ -1845,6 +2406,7 @@ class SettingsDialog(QDialog):
                 json.dump(self.settings, f, indent=2)
             
             TMDB_API_KEY = self.settings['tmdb_api_key']
+            memory_budget.apply_budgets(self.settings['memory_budgets_mb'])
             
             QMessageBox.information(self, "Success", "Settings saving!")
             self.accept()
@@ -1859,6 +2421,49 @@ class SettingsDialog(QDialog):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Error cash clearing: {str(e)}")
 
+# ---------- Отложенное создание вкладок ----------
+class LazyTab(QWidget):
+    """Заглушка вкладки: настоящий виджет строится при первом показе"""
+    def __init__(self, factory: Callable[[], QWidget], on_built: Callable[[QWidget], None] = lambda w: None):
+        super().__init__()
+        self._factory = factory
+        self._on_built = on_built
+        self.built: Optional[QWidget] = None
+        
+        lay = QVBoxLayout(self)
+        lay.setContentsMargins(0, 0, 0, 0)
+        self._placeholder = QLabel("Loading…")
+        self._placeholder.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        lay.addWidget(self._placeholder)
+    
+    def ensure(self) -> QWidget:
+        if self.built is None:
+            self.built = self._factory()
+            self.layout().removeWidget(self._placeholder)
+            self._placeholder.deleteLater()
+            self.layout().addWidget(self.built)
+            self._on_built(self.built)
+        return self.built
+    
+    def showEvent(self, e):
+        super().showEvent(e)
+        if self.built is None:
+            # Сначала даём окну отрисоваться, потом строим вкладку
+            QTimer.singleShot(0, self.ensure)
+
+class HealthReporter(QObject):
+    """Переносит результаты фоновых проверок в GUI-поток"""
+    result = pyqtSignal(dict)
+
+class TraceReporter(QObject):
+    """Переносит итоги трассированных действий в GUI-поток"""
+    finished = pyqtSignal(dict)
+
+class WarmupReporter(QObject):
+    """Переносит события фонового прогрева справочников в GUI-поток"""
+    item = pyqtSignal(str)
+    done = pyqtSignal(dict)
+
 # ---------- Главное окно ----------
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -1877,9 +2482,18 @@ class MainWindow(QMainWindow):
         self._load_app_settings()
         
         self.db = MySQLConnector()
+        # Локальная реплика (SAKILA_REPLICA=fallback|prefer): поиск без MySQL, синхронизация в фоне
+        self.replica_syncer = local_replica.setup_from_config(self.db)
+        # Детектор изменений каталога: кэши сбрасываются по изменившимся таблицам
+        self.change_detector = change_detector.setup_from_config(self.db)
         self.lw = LogWriter()
         self.ls = LogStats()
         self.favorites = FavoritesStore()
+        memory_budget.register_probe("favorites", lambda: (
+            memory_budget.estimate_size(self.favorites._items)
+            + memory_budget.estimate_size(self.favorites._user_data), len(self.favorites)))
+        # Справочники: сразу из снимка прошлого запуска, обновление — в фоне
+        self.ref = ReferenceData(self.db, REFERENCE_FILE)
         
         # Баннер с анимацией
         banner = QFrame()
@@ -1927,28 +2541,29 @@ class MainWindow(QMainWindow):
         # Уведомления
         notify = lambda msg: self.statusBar().showMessage(msg, 3000)
         
-        # Создаём вкладки
-        self.tab_search = SearchTab(self.db, self.lw, self.favorites, notify=notify)
-        self.tab_advanced = AdvancedSearchTab(self.db, self.lw, self.favorites, notify=notify)
-        self.tab_gy = GenreYearTab(self.db, self.lw, self.favorites, notify=notify)
-        self.tab_analytics = AnalyticsTab(self.db)
-        #self.tab_popular = PopularRecentTab(self.ls, "popular")
-        #self.tab_recent = PopularRecentTab(self.ls, "recent")
-        self.tab_fav = FavoritesTab(self.favorites, notify=notify)
-        
-        # Добавляем вкладки
-        tabs.addTab(self.tab_search, "🔍 Quick search")
-        tabs.addTab(self.tab_advanced, "🔎 Advanced search")
-        tabs.addTab(self.tab_gy, "🎭 Genres / Years")
-        tabs.addTab(self.tab_analytics, "📊 Analytics")
-        #tabs.addTab(self.tab_popular, "🔥 Популярные")
-        #tabs.addTab(self.tab_recent, "🕐 Recent")
-        tabs.addTab(self.tab_fav, "⭐ Favorites")
+        # Вкладки строятся при первом показе (или сразу, если lazy_tabs выключен)
+        self.tabs = tabs
+        self.tab_search = self.tab_advanced = self.tab_gy = None
+        self.tab_analytics = self.tab_fav = None
+        specs = [
+            ("tab_search", "🔍 Quick search",
+             lambda: SearchTab(self.db, self.lw, self.favorites, notify=notify, ref=self.ref)),
+            ("tab_advanced", "🔎 Advanced search",
+             lambda: AdvancedSearchTab(self.db, self.lw, self.favorites, notify=notify, ref=self.ref)),
+            ("tab_gy", "🎭 Genres / Years",
+             lambda: GenreYearTab(self.db, self.lw, self.favorites, notify=notify, ref=self.ref)),
+            ("tab_analytics", "📊 Analytics", lambda: AnalyticsTab(self.db)),
+            #("tab_popular", "🔥 Популярные", lambda: PopularRecentTab(self.ls, "popular")),
+            #("tab_recent", "🕐 Recent", lambda: PopularRecentTab(self.ls, "recent")),
+            ("tab_fav", "⭐ Favorites", lambda: FavoritesTab(self.favorites, notify=notify)),
+        ]
+        for attr, title, factory in specs:
+            holder = LazyTab(factory, on_built=lambda w, attr=attr: self._on_tab_built(attr, w))
+            tabs.addTab(holder, title)
+        if not LAZY_TABS:
+            for i in range(tabs.count()):
+                tabs.widget(i).ensure()
         
-        # Хук на обновление «Избранного»
-        self.tab_search.on_fav_changed = self.tab_fav.refresh
-        self.tab_advanced.on_fav_changed = self.tab_fav.refresh
-        self.tab_gy.on_fav_changed = self.tab_fav.refresh
         tabs.currentChanged.connect(lambda i: self.on_tab_changed(tabs, i))
         
         # Основной layout
@@ -1974,12 +2589,115 @@ class MainWindow(QMainWindow):
         tabs.setCurrentIndex(int(self.settings.value("tab_index", 0)))
         tabs.currentChanged.connect(lambda i: self.settings.setValue("tab_index", i))
         
-        # Проверка подключения
-        QTimer.singleShot(300, self._ping)
-        
+        # Статус подключений: проверки идут в фоне и не задерживают окно
+        self._health: Dict[str, Optional[Dict]] = {}
+        self.health_label = QLabel()
+        self.statusBar().addPermanentWidget(self.health_label)
+        self.health_reporter = HealthReporter()
+        self.health_reporter.result.connect(self._on_health_result)
+        QTimer.singleShot(0, self._ping)
+        
+        # Разбивка последнего действия по стадиям (tracing)
+        self.trace_label = QLabel()
+        self.statusBar().addPermanentWidget(self.trace_label)
+        self.trace_reporter = TraceReporter()
+        self.trace_reporter.finished.connect(self._on_action_traced)
+        self._trace_listener = self.trace_reporter.finished.emit
+        TRACER.listeners.append(self._trace_listener)
+        
+        # Детектор зависаний: удары из цикла событий, слежка — из отдельного потока
+        self.stall_watchdog = StallWatchdog(log_path=STALLS_FILE)
+        self._heartbeat = QTimer(self)
+        self._heartbeat.setInterval(HEARTBEAT_MS)
+        self._heartbeat.timeout.connect(self.stall_watchdog.beat)
+        self._heartbeat.start()
+        self.stall_watchdog.start()
+        
+        self.warmup_reporter = WarmupReporter()
+        self.warmup_reporter.item.connect(self._on_reference_item)
+        self.warmup_reporter.done.connect(self._on_warmup_done)
+        QTimer.singleShot(0, lambda: self.ref.warmup(self.warmup_reporter.item.emit,
+                                                     self.warmup_reporter.done.emit))
+        if self.change_detector is not None:
+            self.change_detector.watch(change_detector.CATALOG_TABLES, self._on_catalog_changed)
+            if self.replica_syncer is not None:
+                self.change_detector.watch(change_detector.FILM_TABLES,
+                                           lambda changed: self.replica_syncer.request_sync())
+        
+    def _on_tab_built(self, attr: str, widget: QWidget):
+        setattr(self, attr, widget)
+        # Хук на обновление «Избранного»
+        if hasattr(widget, 'on_fav_changed'):
+            widget.on_fav_changed = self._favorites_changed
         # Запускаем загрузчик постеров
-        if hasattr(self.tab_search, 'poster_loader'):
-            self.tab_search.poster_loader.start()
+        if attr == "tab_search" and hasattr(widget, 'poster_loader'):
+            widget.poster_loader.start()
+    
+    def _on_action_traced(self, result: Dict):
+        self.trace_label.setText(f"⏱ {result['name']} {result['total_ms']:.0f} ms")
+        self.trace_label.setToolTip(format_breakdown(result, limit=20).replace(": ", ":\n", 1).replace(" · ", "\n"))
+        self.statusBar().showMessage(format_breakdown(result), 8000)
+    
+    def set_profiling(self, mode: Optional[str]):
+        """None — выключить, иначе режим из profiling.PROFILE_MODES"""
+        if mode is None:
+            profiling.PROFILER.disable()
+            saved = len(profiling.PROFILER.records)
+            self.statusBar().showMessage(f"Profiling off ({saved} profiles this session)", 3000)
+        else:
+            profiling.PROFILER.enable(mode)
+            self.statusBar().showMessage(f"🔬 Profiling every action ({mode}) → {profiling.PROFILE_DIR}", 5000)
+        self.profile_actions[mode].setChecked(True)
+    
+    def show_stalls_report(self):
+        dlg = QDialog(self)
+        dlg.setWindowTitle("UI stalls")
+        dlg.resize(900, 600)
+        lay = QVBoxLayout(dlg)
+        text = QTextEdit()
+        text.setReadOnly(True)
+        text.setFont(QFont("Consolas", 9))
+        text.setPlainText(self.stall_watchdog.format_report(limit=20) + f"\n\nFull log: {STALLS_FILE}")
+        lay.addWidget(text)
+        btn = QPushButton("Close")
+        btn.clicked.connect(dlg.accept)
+        lay.addWidget(btn)
+        dlg.exec()
+    
+    def export_trace(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export trace", "sakila_trace.json",
+                                              "Chrome trace (*.json)")
+        if not path:
+            return
+        try:
+            n = TRACER.export_chrome(path)
+            self.statusBar().showMessage(f"✅ Trace exported: {n} spans (open in chrome://tracing or Perfetto)", 5000)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to export trace: {e}")
+    
+    def _on_reference_item(self, key: str):
+        """Раздаёт обновлённый справочник уже построенным вкладкам"""
+        for i in range(self.tabs.count()):
+            widget = self.tabs.widget(i).built
+            if widget is not None and hasattr(widget, 'apply_reference'):
+                widget.apply_reference(key)
+    
+    def _on_catalog_changed(self, changed: set):
+        """Из потока детектора: перезагружаем только справочники, зависящие от изменившихся таблиц"""
+        keys = keys_for(changed)
+        if keys:
+            self.ref.warmup(self.warmup_reporter.item.emit, self.warmup_reporter.done.emit, keys=keys)
+    
+    def _on_warmup_done(self, errors: Dict):
+        if errors:
+            print(f"⚠️ Reference data not refreshed: {', '.join(errors)}")
+    
+    def _favorites_changed(self):
+        if self.tab_fav is not None:
+            self.tab_fav.refresh()
+    
+    def _current_tab(self) -> QWidget:
+        return self.tabs.currentWidget().ensure()
     
     def _create_menu(self):
         # Меню File
@@ -1993,6 +2711,10 @@ class MainWindow(QMainWindow):
         act_export_excel.setShortcut(QKeySequence("Ctrl+Shift+E"))
         act_export_excel.triggered.connect(self.export_current_excel)
         
+        act_export_full = QAction("📦 Export full result (no limit)…", self)
+        act_export_full.setShortcut(QKeySequence("Ctrl+Alt+E"))
+        act_export_full.triggered.connect(self.export_full_result)
+        
         act_import = QAction("📥 Import list of movies", self)
         act_import.triggered.connect(self.import_films)
         
@@ -2006,6 +2728,7 @@ class MainWindow(QMainWindow):
         
         file_menu.addAction(act_export_csv)
         file_menu.addAction(act_export_excel)
+        file_menu.addAction(act_export_full)
         file_menu.addSeparator()
         file_menu.addAction(act_import)
         file_menu.addSeparator()
@@ -2040,7 +2763,41 @@ class MainWindow(QMainWindow):
         act_restore = QAction("📂 Restore favorites", self)
         act_restore.triggered.connect(self.restore_favorites)
         
+        act_health = QAction("🩺 Check connections", self)
+        act_health.triggered.connect(self._ping)
+        
+        act_query_perf = QAction("⏱️ Query performance", self)
+        act_query_perf.triggered.connect(lambda: QueryPerformanceDialog(self).exec())
+        
         tools_menu.addAction(act_stats)
+        tools_menu.addAction(act_health)
+        act_trace = QAction("🧵 Export trace (Chrome JSON)...", self)
+        act_trace.triggered.connect(self.export_trace)
+        
+        act_stalls = QAction("🐢 UI stalls report", self)
+        act_stalls.triggered.connect(self.show_stalls_report)
+        
+        # Профилирование действий: выкл / cProfile / сэмплирование
+        profile_menu = QMenu("🔬 Profiling", self)
+        group = QActionGroup(self)
+        self.profile_actions = {}
+        for mode, title in ((None, "Off"), ("cprofile", "cProfile (exact)"),
+                            ("sample", "Sampling (low overhead)")):
+            act = QAction(title, self, checkable=True)
+            act.setChecked(mode == (profiling.PROFILER.mode if profiling.PROFILER.enabled else None))
+            act.triggered.connect(lambda _, m=mode: self.set_profiling(m))
+            group.addAction(act)
+            profile_menu.addAction(act)
+            self.profile_actions[mode] = act
+        profile_menu.addSeparator()
+        act_profiles = QAction("Profiles...", self)
+        act_profiles.triggered.connect(lambda: ProfilesDialog(self).exec())
+        profile_menu.addAction(act_profiles)
+        
+        tools_menu.addAction(act_query_perf)
+        tools_menu.addAction(act_trace)
+        tools_menu.addAction(act_stalls)
+        tools_menu.addMenu(profile_menu)
         tools_menu.addSeparator()
         #tools_menu.addAction(act_backup)
         tools_menu.addAction(act_restore)
@@ -2059,11 +2816,15 @@ class MainWindow(QMainWindow):
         help_menu.addAction(act_about)
     
     def on_tab_changed(self, tabs: QTabWidget, index: int):
+        # Ещё не построенная вкладка загрузит данные сама при создании
+        widget = tabs.widget(index).built
+        if widget is None:
+            return
         # Обновляем избранное при переходе
-        if tabs.widget(index) is self.tab_fav:
+        if widget is self.tab_fav:
             self.tab_fav.refresh()
         # Обновляем аналитику при переходе
-        elif tabs.widget(index) is self.tab_analytics:
+        elif widget is self.tab_analytics:
             self.tab_analytics.refresh_all()
     
     def closeEvent(self, e):
@@ -2072,26 +2833,78 @@ class MainWindow(QMainWindow):
         if hasattr(self.tab_search, 'poster_loader'):
             self.tab_search.poster_loader.stop()
             self.tab_search.poster_loader.wait()
+        # Прерываем незавершённый экспорт
+        for owner in (self, self.tab_search, self.tab_advanced, self.tab_gy, self.tab_fav):
+            worker = getattr(owner, "_export_worker", None) if owner is not None else None
+            if worker is not None and worker.isRunning():
+                worker.cancel()
+                worker.wait()
+        if self._trace_listener in TRACER.listeners:
+            TRACER.listeners.remove(self._trace_listener)
+        self._heartbeat.stop()
+        self.stall_watchdog.stop()
+        if self.replica_syncer is not None:
+            self.replica_syncer.stop()
+        if self.change_detector is not None:
+            self.change_detector.stop()
+        if self.stall_watchdog.stalls:
+            print(self.stall_watchdog.format_report(limit=5))
         super().closeEvent(e)
     
     def _ping(self):
-        ok_mysql = self.db.test_connection()
-        ok_mongo = self.lw.test_connection()
-        
-        if ok_mysql and ok_mongo:
-            self.statusBar().showMessage("✅ All системы работают", 3000)
-        else:
-            msg = f"MySQL: {'✅ OK' if ok_mysql else '❌ Error'} | MongoDB: {'✅ OK' if ok_mongo else '❌ Error'}"
-            QMessageBox.warning(self, "Подключение", msg)
+        """Запускает параллельные фоновые проверки MySQL / MongoDB / TMDB"""
+        probes = {
+            "MySQL": lambda: health_checks.check_mysql(self.db),
+            "MongoDB": health_checks.check_mongo,
+        }
+        if TMDB_API_KEY:
+            probes["TMDB"] = lambda key=TMDB_API_KEY: health_checks.check_tmdb(key)
+        self._health = {name: None for name in probes}
+        self._render_health()
+        health_checks.run_checks(probes, self.health_reporter.result.emit)
+    
+    def _on_health_result(self, result: Dict):
+        self._health[result["name"]] = result
+        if result["name"] == "MySQL" and self.replica_syncer is not None:
+            # Проба говорит о MySQL раньше, чем первый упавший поиск
+            if result["ok"]:
+                local_replica.mark_mysql_up()
+            else:
+                local_replica.mark_mysql_down()
+        self._render_health()
+        if all(r is not None for r in self._health.values()):
+            failed = [name for name, r in self._health.items() if not r["ok"]]
+            if failed:
+                self.statusBar().showMessage(f"❌ Unavailable: {', '.join(failed)}", 5000)
+            else:
+                self.statusBar().showMessage("✅ All systems operational", 3000)
+    
+    def _render_health(self):
+        parts, tips = [], []
+        for name, r in self._health.items():
+            icon = "⏳" if r is None else ("✅" if r["ok"] else "❌")
+            parts.append(f"{name} {icon}")
+            if r is not None:
+                tips.append(f"{name}: {r['message']} ({r['elapsed'] * 1000:.0f} ms)")
+        if self.replica_syncer is not None:
+            replica = self.replica_syncer.replica
+            if local_replica.serving_from_replica():
+                parts.append("📀 Offline search")
+            tips.append(f"Search: {replica.describe()}"
+                        + (f"; last sync failed: {self.replica_syncer.last_error}" if self.replica_syncer.last_error else ""))
+        self.health_label.setText("  ".join(parts))
+        self.health_label.setToolTip("\n".join(tips))
     
     def _load_app_settings(self):
         """Загружает настройки приложения"""
-        global TMDB_API_KEY
+        global TMDB_API_KEY, LAZY_TABS
         try:
             if os.path.exists(SETTINGS_FILE):
                 with open(SETTINGS_FILE, 'r') as f:
                     settings = json.load(f)
                     TMDB_API_KEY = settings.get('tmdb_api_key', '')
+                    LAZY_TABS = bool(settings.get('lazy_tabs', True))
+                    memory_budget.apply_budgets(settings.get('memory_budgets_mb'))
         except:
             pass
     
@@ -2111,7 +2924,7 @@ class MainWindow(QMainWindow):
     
     def refresh_current_tab(self):
         """Обновляет текущую активную вкладку"""
-        current_widget = self.centralWidget().findChild(QTabWidget).currentWidget()
+        current_widget = self._current_tab()
         
         # Ищем метод refresh или reload
         for method_name in ['refresh', 'reload', 'on_search']:
@@ -2126,7 +2939,7 @@ class MainWindow(QMainWindow):
     
     def export_current_table(self):
         """Exportирует текущую таблицу в CSV"""
-        w = self.centralWidget().findChild(QTabWidget).currentWidget()
+        w = self._current_tab()
         for child in w.findChildren(QTableView):
             model: DataFrameModel = child.model()
             if hasattr(model, 'dataframe'):
@@ -2136,7 +2949,7 @@ class MainWindow(QMainWindow):
     
     def export_current_excel(self):
         """Exportирует текущую таблицу в Excel"""
-        w = self.centralWidget().findChild(QTabWidget).currentWidget()
+        w = self._current_tab()
         for child in w.findChildren(QTableView):
             model: DataFrameModel = child.model()
             if hasattr(model, 'dataframe'):
@@ -2144,6 +2957,23 @@ class MainWindow(QMainWindow):
                 return
         self.statusBar().showMessage("No table found on current tab", 2500)
     
+    def export_full_result(self):
+        """Повторяет последний запрос вкладки без LIMIT и пишет его потоково в CSV/Excel/Parquet"""
+        w = self._current_tab()
+        formats = ("csv", "xlsx", "parquet")
+        query = getattr(w, "last_query", None)
+        if query:
+            sql, params = query
+            start_export(self, "export_full.csv", formats, db=self.db, sql=sql, params=params)
+            return
+        # Вкладки без SQL-запроса: экспортируем загруженную таблицу
+        for child in w.findChildren(QTableView):
+            model = child.model()
+            if hasattr(model, 'dataframe'):
+                start_export(self, "export_full.csv", formats, df=model.dataframe())
+                return
+        self.statusBar().showMessage("No table found on current tab", 2500)
+    
     def import_films(self):
         """Import списка movies из CSV"""
         path, _ = QFileDialog.getOpenFileName(self, "Choose CSV file", "", "CSV Files (*.csv)")
@@ -2169,7 +2999,7 @@ class MainWindow(QMainWindow):
                     item['film_id'] = hash(item['title']) % 1000000
                 imported += self.favorites.add(item)
             
-            self.tab_fav.refresh()
+            self._favorites_changed()
             QMessageBox.information(self, "Import", 
                 f"Importировано movies: {imported}\nDuplicates skipped: {len(df) - imported}")
         
@@ -2180,72 +3010,80 @@ class MainWindow(QMainWindow):
         """Показывает статистику базы данных TMDB"""
         try:
             stats = {}
+            # Агрегаты по всей базе — из локального снимка, если он свежий
+            source = analytics_source(self.db)
+            try:
+                # Общее количество movies
+                rows = source.select("SELECT COUNT(*) as cnt FROM movies")
+                stats['total_films'] = rows[0]['cnt'] if rows else 0
+                
+                # Количество актёров
+                rows = source.select("SELECT COUNT(*) as cnt FROM people")
+                stats['total_people'] = rows[0]['cnt'] if rows else 0
+                
+                # Количество жанров
+                rows = source.select("SELECT COUNT(*) as cnt FROM genres")
+                stats['total_genres'] = rows[0]['cnt'] if rows else 0
+                
+                # Средняя длительность
+                rows = source.select("SELECT AVG(runtime) as avg_len FROM movies WHERE runtime IS NOT NULL AND runtime > 0")
+                stats['avg_length'] = round(rows[0]['avg_len'], 1) if rows and rows[0]['avg_len'] else 0
+                
+                # Средний рейтинг
+                rows = source.select("SELECT AVG(vote_average) as avg_rating FROM movies WHERE vote_average IS NOT NULL AND vote_average > 0")
+                stats['avg_rating'] = round(rows[0]['avg_rating'], 1) if rows and rows[0]['avg_rating'] else 0
+                
+                # Самый продуктивный год
+                rows = source.select("""
+                    SELECT YEAR(release_date) as year, COUNT(*) as cnt 
+                    FROM movies 
+                    WHERE release_date IS NOT NULL 
+                    GROUP BY YEAR(release_date) 
+                    ORDER BY cnt DESC 
+                    LIMIT 1
+                """)
+                if rows:
+                    stats['most_productive_year'] = f"{rows[0]['year']} ({rows[0]['cnt']} movies)"
+                else:
+                    stats['most_productive_year'] = "Н/Д"
+                
+                # Самый популярный жанр
+                rows = source.select("""
+                    SELECT g.name, COUNT(*) as cnt 
+                    FROM movie_genres mg 
+                    JOIN genres g ON g.genre_id = mg.genre_id 
+                    GROUP BY g.name 
+                    ORDER BY cnt DESC 
+                    LIMIT 1
+                """)
+                if rows:
+                    stats['most_popular_genre'] = f"{rows[0]['name']} ({rows[0]['cnt']} movies)"
+                else:
+                    stats['most_popular_genre'] = "Н/Д"
+                
+                # Топ актёр по количеству movies
+                rows = source.select("""
+                    SELECT p.name, COUNT(DISTINCT cc.tmdb_id) as cnt
+                    FROM cast_credits cc
+                    JOIN people p ON p.person_id = cc.person_id
+                    GROUP BY p.person_id, p.name
+                    ORDER BY cnt DESC
+                    LIMIT 1
+                """)
+                if rows:
+                    stats['top_actor'] = f"{rows[0]['name']} ({rows[0]['cnt']} movies)"
+                else:
+                    stats['top_actor'] = "Н/Д"
+            finally:
+                # Снимок DuckDB держит файлы открытыми — закрываем и при ошибке запроса
+                if source is not self.db:
+                    source.close()
             
-            # Общее количество movies
-            rows = self.db.select("SELECT COUNT(*) as cnt FROM movies")
-            stats['total_films'] = rows[0]['cnt'] if rows else 0
-            
-            # Количество актёров
-            rows = self.db.select("SELECT COUNT(*) as cnt FROM people")
-            stats['total_people'] = rows[0]['cnt'] if rows else 0
-            
-            # Количество жанров
-            rows = self.db.select("SELECT COUNT(*) as cnt FROM genres")
-            stats['total_genres'] = rows[0]['cnt'] if rows else 0
-            
-            # Средняя длительность
-            rows = self.db.select("SELECT AVG(runtime) as avg_len FROM movies WHERE runtime IS NOT NULL AND runtime > 0")
-            stats['avg_length'] = round(rows[0]['avg_len'], 1) if rows and rows[0]['avg_len'] else 0
-            
-            # Средний рейтинг
-            rows = self.db.select("SELECT AVG(vote_average) as avg_rating FROM movies WHERE vote_average IS NOT NULL AND vote_average > 0")
-            stats['avg_rating'] = round(rows[0]['avg_rating'], 1) if rows and rows[0]['avg_rating'] else 0
-            
-            # Самый продуктивный год
-            rows = self.db.select("""
-                SELECT YEAR(release_date) as year, COUNT(*) as cnt 
-                FROM movies 
-                WHERE release_date IS NOT NULL 
-                GROUP BY YEAR(release_date) 
-                ORDER BY cnt DESC 
-                LIMIT 1
-            """)
-            if rows:
-                stats['most_productive_year'] = f"{rows[0]['year']} ({rows[0]['cnt']} movies)"
-            else:
-                stats['most_productive_year'] = "Н/Д"
-            
-            # Самый популярный жанр
-            rows = self.db.select("""
-                SELECT g.name, COUNT(*) as cnt 
-                FROM movie_genres mg 
-                JOIN genres g ON g.genre_id = mg.genre_id 
-                GROUP BY g.name 
-                ORDER BY cnt DESC 
-                LIMIT 1
-            """)
-            if rows:
-                stats['most_popular_genre'] = f"{rows[0]['name']} ({rows[0]['cnt']} movies)"
-            else:
-                stats['most_popular_genre'] = "Н/Д"
-            
-            # Топ актёр по количеству movies
-            rows = self.db.select("""
-                SELECT p.name, COUNT(DISTINCT cc.tmdb_id) as cnt
-                FROM cast_credits cc
-                JOIN people p ON p.person_id = cc.person_id
-                GROUP BY p.person_id, p.name
-                ORDER BY cnt DESC
-                LIMIT 1
-            """)
-            if rows:
-                stats['top_actor'] = f"{rows[0]['name']} ({rows[0]['cnt']} movies)"
-            else:
-                stats['top_actor'] = "Н/Д"
+            origin = "live MySQL" if source is self.db else source.describe()
             
             # Формируем сообщение
             msg = f"""
-            📊 TMDB database statistics (moviesdb):
+            📊 TMDB database statistics (moviesdb), source: {origin}
 
             🎬 Total movies: {stats['total_films']:,}
             👥 Total people (actors/directors): {stats['total_people']:,}
@@ -2307,10 +3145,11 @@ class MainWindow(QMainWindow):
                 QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
             
             if reply == QMessageBox.StandardButton.Yes:
-                self.favorites._items = data['items']
-                self.favorites._user_data = {int(k): v for k, v in data.get('user_data', {}).items()}
-                self.favorites.save()
-                self.tab_fav.refresh()
+                self.favorites.replace(
+                    data['items'],
+                    {int(k): v for k, v in data.get('user_data', {}).items()}
+                )
+                self._favorites_changed()
                 
                 QMessageBox.information(self, "Restore", 
                     f"Favorites восстановлено!\nФильмов: {len(data['items'])}")
@@ -2330,6 +3169,7 @@ class MainWindow(QMainWindow):
         
         Ctrl+E - Export to CSV
         Ctrl+Shift+E - Export to Excel
+        Ctrl+Alt+E - Export full result (CSV/Excel/Parquet)
         Ctrl+, - Settings
         Ctrl+Q - Exit
         
@@ -2368,9 +3208,13 @@ class MainWindow(QMainWindow):
 
 # ---------- Жанр/Yearы (оригинальная вкладка) ----------
 class GenreYearTab(QWidget):
-    def __init__(self, db, lw, favorites_sink, notify=lambda msg: None):
+    def __init__(self, db, lw, favorites_sink, notify=lambda msg: None, ref: Optional[ReferenceData] = None):
         super().__init__()
         self.db, self.lw = db, lw
+        if ref is None:
+            ref = ReferenceData(db)
+            ref.load_now(["genres", "year_range"])
+        self.ref = ref
         self.favorites_sink = favorites_sink
         self.notify = notify
         self.on_fav_changed = lambda: None
@@ -2385,7 +3229,7 @@ class GenreYearTab(QWidget):
         self.sb_year_from.setRange(1900, 2100)
         self.sb_year_to.setRange(1900, 2100)
         self.sb_limit = QSpinBox()
-        self.sb_limit.setRange(1, 500)
+        self.sb_limit.setRange(1, RESULT_LIMIT_MAX)
         self.sb_limit.setValue(100)
         
         form.addRow("Genre:", self.cb_genre)
@@ -2409,34 +3253,38 @@ class GenreYearTab(QWidget):
         
         self.table = QTableView()
         self.model = DataFrameModel()
+        self.model.streamError.connect(lambda msg: self.notify(f"Loading stopped: {msg}"))
         self.table.setModel(self.model)
         self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
         self.table.setSelectionMode(QTableView.SelectionMode.ExtendedSelection)
         self.table.setAlternatingRowColors(True)
         self.table.doubleClicked.connect(self.open_details)
         self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.horizontalHeader().setResizeContentsPrecision(RESIZE_SAMPLE_ROWS)
         main.addWidget(self.table, 1)
         
-        self.btn_search.clicked.connect(self.on_search)
+        self.btn_search.clicked.connect(lambda: self.on_search())
         self.btn_export.clicked.connect(lambda: save_df_to_csv(self, self.model.dataframe(), "genre_year_results.csv"))
         self.btn_add_fav.clicked.connect(self.on_add_favorite)
         self.btn_details.clicked.connect(self.open_details)
         
-        # Загружаем жанры
-        try:
-            genres = self.db.get_available_genres()
-            names = [g["name"] for g in genres] if genres else []
-            self.cb_genre.addItems(names or ["Comedy","Action","Drama"])
-        except Exception:
-            self.cb_genre.addItems(["Comedy","Action","Drama"])
-        
-        # Загружаем диапазон годов
-        try:
-            y_min, y_max = self.db.get_year_range()
-        except Exception:
-            y_min, y_max = 1980, 2025
-        self.sb_year_from.setValue(y_min)
-        self.sb_year_to.setValue(y_max)
+        # Жанры и диапазон годов — из общего кэша справочников
+        _refill_combo(self.cb_genre, self.ref.genres)
+        self._year_range = tuple(self.ref.year_range)
+        self.sb_year_from.setValue(self._year_range[0])
+        self.sb_year_to.setValue(self._year_range[1])
+    
+    def apply_reference(self, key: str):
+        """Справочник обновился в фоне"""
+        if key == "genres":
+            _refill_combo(self.cb_genre, self.ref.genres)
+        elif key == "year_range":
+            # Не трогаем годы, если пользователь их уже поменял
+            old, self._year_range = self._year_range, tuple(self.ref.year_range)
+            if self.sb_year_from.value() == old[0]:
+                self.sb_year_from.setValue(self._year_range[0])
+            if self.sb_year_to.value() == old[1]:
+                self.sb_year_to.setValue(self._year_range[1])
     
     def open_details(self):
         sel = self.table.selectionModel().selectedRows()
@@ -2444,13 +3292,14 @@ class GenreYearTab(QWidget):
             self.notify("Select a row")
             return
         r = sel[0].row()
-        row = self.model.dataframe().iloc[r].to_dict()
+        row = self.model.row_dict(r)
         fid = row.get("film_id")
         if fid is None:
             self.notify("Could not determine film_id")
             return
         FilmDialog(self.db, int(fid), self).exec()
     
+    @traced("search.genre_year")
     def on_search(self):
         genre = self.cb_genre.currentText()
         y1, y2 = int(self.sb_year_from.value()), int(self.sb_year_to.value())
@@ -2458,21 +3307,38 @@ class GenreYearTab(QWidget):
             self.notify("The starting year is more important than the end year")
             return
         try:
-            films, total = self.db.search_by_genre_and_years(genre, y1, y2, 0, int(self.sb_limit.value()))
-            df = pd().DataFrame(films) if films else pd().DataFrame()
-            self.model.set_dataframe(df)
-            self.table.resizeColumnsToContents()
+            self._total = 0
+            self.model.set_stream(self._iter_pages(genre, y1, y2, int(self.sb_limit.value())))
+            with span("resize"):
+                self.table.resizeColumnsToContents()
+            total = self._total
             try:
-                self.lw.log_search("genre_year", {"genre": genre, "start_year": y1, "end_year": y2}, int(total))
+                with span("log_search"):
+                    self.lw.log_search("genre_year", {"genre": genre, "start_year": y1, "end_year": y2}, int(total))
             except Exception:
                 pass
-            if not films:
+            if not self.model.rowCount():
                 self.notify("Nothing found")
             else:
                 self.notify(f"Found: {total} movies")
         except Exception as e:
             QMessageBox.critical(self, "Search error", str(e))
     
+    def _iter_pages(self, genre: str, y1: int, y2: int, limit: int):
+        """Постранично читает результаты search_by_genre_and_years по мере прокрутки"""
+        offset = 0
+        while offset < limit:
+            page = min(RESULT_FETCH_BATCH, limit - offset)
+            # Общее число нужно один раз: следующие страницы идут без COUNT
+            films, total = self.db.search_by_genre_and_years(genre, y1, y2, offset, page,
+                                                             count_mode="exact" if offset == 0 else "skip")
+            if offset == 0:
+                self._total = total
+            yield from films
+            if len(films) < page:
+                return
+            offset += page
+    
     def on_add_favorite(self):
         df = self.model.dataframe()
         if df.empty:
@@ -2493,7 +3359,12 @@ class GenreYearTab(QWidget):
             self.notify("These films are already in favorites")
 
 # ---------- main ----------
-def main():
+def main(profile: Optional[str] = None):
+    """profile — режим профилирования действий с самого старта (см. profiling.PROFILE_MODES)"""
+    if profile:
+        profiling.PROFILER.enable(profile)
+    if os.getenv("SAKILA_TRACEMALLOC"):
+        memory_budget.start_tracemalloc()
     set_app_id()
     app = QApplication(sys.argv)
     app.setApplicationName("TMDB base Desktop")
@@ -2516,7 +3387,17 @@ def main():
     w.show()
     splash.finish(w)
     
+    # Замер времени до первого окна (см. startup_budget.py)
+    if os.getenv("SAKILA_STARTUP_PROBE"):
+        QTimer.singleShot(0, lambda: (print("FIRST_WINDOW", flush=True), w.close()))
+    
     sys.exit(app.exec())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser(description="TMDB base Desktop")
+    parser.add_argument("--profile", nargs="?", const="cprofile", choices=profiling.PROFILE_MODES,
+                        help="профилировать каждое действие (cprofile по умолчанию или sample)")
+    # Остальные аргументы (например, Qt-шные) остаются для QApplication
+    args, _ = parser.parse_known_args()
+    main(profile=args.profile)
\ No newline at end of file
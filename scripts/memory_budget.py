@@ -0,0 +1,247 @@
+# memory_budget.py - Учёт памяти по подсистемам: кэши с бюджетом в байтах, оценки размеров, tracemalloc
+import sys
+import weakref
+import threading
+import tracemalloc
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+MB = 1024 * 1024
+SAMPLE_ITEMS = 256   # крупнее — размер оценивается по равномерной выборке элементов
+
+# Бюджеты по умолчанию (МБ) для именованных кэшей; переопределяются из settings.json
+DEFAULT_BUDGETS_MB: Dict[str, float] = {
+    "search_cache": 32,       # SearchCache: результаты расширенного поиска
+    "posters": 64,            # DataFrameModel.posters: постеры в таблице (на модель)
+    "poster_downloads": 32,   # PosterLoader: скачанные постеры по (title, year)
+}
+
+_budgets: Dict[str, int] = {name: int(mb * MB) for name, mb in DEFAULT_BUDGETS_MB.items()}
+_caches: Dict[str, "weakref.WeakSet[BoundedCache]"] = {}
+_probes: Dict[str, Callable[[], Tuple[int, int]]] = {}
+
+
+def estimate_size(obj: Any, _seen: Optional[set] = None) -> int:
+    """
+    Приблизительный размер объекта вместе с содержимым (байты).
+    DataFrame считается через memory_usage(deep=True), контейнеры — рекурсивно;
+    у больших (больше SAMPLE_ITEMS строк/элементов) меряется равномерная выборка
+    и масштабируется, чтобы отчёт по крупным результатам не подвешивал GUI.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    memory_usage = getattr(obj, "memory_usage", None)
+    if callable(memory_usage) and hasattr(obj, "columns"):
+        try:
+            rows = len(obj)
+            if rows <= SAMPLE_ITEMS:
+                return int(memory_usage(deep=True).sum())
+            part = obj.iloc[::rows // SAMPLE_ITEMS]
+            fixed = int(obj.memory_usage(index=True, deep=False).sum())
+            return fixed + int((part.memory_usage(deep=True).sum()
+                                - part.memory_usage(deep=False).sum()) * rows / len(part))
+        except Exception:
+            pass
+    size = sys.getsizeof(obj, 0)
+    if isinstance(obj, dict):
+        size += _sampled(list(obj.keys()), _seen) + _sampled(list(obj.values()), _seen)
+    elif isinstance(obj, (list, tuple)):
+        size += _sampled(obj, _seen)
+    elif isinstance(obj, (set, frozenset)):
+        size += _sampled(list(obj), _seen)
+    return size
+
+
+def _sampled(items, _seen: set) -> int:
+    """Сумма размеров элементов; для больших последовательностей — по выборке"""
+    n = len(items)
+    if n <= SAMPLE_ITEMS:
+        return sum(estimate_size(item, _seen) for item in items)
+    part = items[::n // SAMPLE_ITEMS]
+    return int(sum(estimate_size(item, _seen) for item in part) * n / len(part))
+
+
+def format_bytes(n: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if abs(n) < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.2f} GB"
+
+
+class BoundedCache:
+    """
+    LRU-кэш с бюджетом в байтах. Размер значения считает sizeof; при превышении
+    бюджета вытесняются давно не использованные записи. Значение крупнее всего
+    бюджета не сохраняется. Потокобезопасен: бюджет меняется из GUI-потока,
+    пока кэшем пользуются фоновые загрузчики.
+    """
+
+    def __init__(self, name: str, sizeof: Callable[[Any], int] = estimate_size,
+                 max_items: Optional[int] = None):
+        self.name = name
+        self.sizeof = sizeof
+        self.max_items = max_items
+        self.max_bytes = _budgets.get(name, 16 * MB)
+        self.bytes_used = 0
+        self.hits = self.misses = self.evictions = 0
+        self._data: "OrderedDict[Any, Any]" = OrderedDict()
+        self._sizes: Dict[Any, int] = {}
+        self._lock = threading.RLock()
+        _caches.setdefault(name, weakref.WeakSet()).add(self)
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def set(self, key, value) -> bool:
+        size = self.sizeof(value)  # вне блокировки: оценка размера может быть долгой
+        with self._lock:
+            self.pop(key)
+            if size > self.max_bytes:
+                return False
+            self._data[key] = value
+            self._sizes[key] = size
+            self.bytes_used += size
+            self._evict()
+            return True
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            self.bytes_used -= self._sizes.pop(key)
+            return self._data.pop(key)
+
+    def set_budget(self, max_bytes: int):
+        with self._lock:
+            self.max_bytes = max_bytes
+            self._evict()
+
+    def _evict(self):
+        # Вызывается под self._lock
+        while self._data and (self.bytes_used > self.max_bytes or
+                              (self.max_items is not None and len(self._data) > self.max_items)):
+            key, _ = self._data.popitem(last=False)
+            self.bytes_used -= self._sizes.pop(key)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._sizes.clear()
+            self.bytes_used = 0
+
+    def items(self):
+        with self._lock:
+            return list(self._data.items())
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._data
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+# ---------- Бюджеты ----------
+def budgets_mb() -> Dict[str, float]:
+    return {name: b / MB for name, b in _budgets.items()}
+
+
+def set_budget(name: str, mb: float):
+    """Меняет бюджет кэша и сразу применяет его ко всем живым экземплярам"""
+    _budgets[name] = int(mb * MB)
+    for cache in list(_caches.get(name, ())):
+        cache.set_budget(_budgets[name])
+
+
+def apply_budgets(budgets: Dict[str, float]):
+    for name, mb in (budgets or {}).items():
+        if name in DEFAULT_BUDGETS_MB:
+            set_budget(name, float(mb))
+
+
+# ---------- Отчёт ----------
+def register_probe(name: str, probe: Callable[[], Tuple[int, int]]):
+    """Подсистема без собственного кэша: probe() -> (байты, элементы)"""
+    _probes[name] = probe
+
+
+def report() -> List[Dict[str, Any]]:
+    """Память по подсистемам: name, items, bytes, budget (None — без бюджета), evictions, hit_rate"""
+    rows = []
+    for name in sorted(set(_caches) | set(_budgets)):
+        caches = list(_caches.get(name, ()))
+        hits = sum(c.hits for c in caches)
+        lookups = hits + sum(c.misses for c in caches)
+        rows.append({
+            "name": name,
+            "instances": len(caches),
+            "items": sum(len(c) for c in caches),
+            "bytes": sum(c.bytes_used for c in caches),
+            "budget": _budgets.get(name),
+            "evictions": sum(c.evictions for c in caches),
+            "hit_rate": hits / lookups if lookups else None,
+        })
+    for name, probe in _probes.items():
+        try:
+            size, items = probe()
+        except Exception:
+            size, items = 0, 0
+        rows.append({"name": name, "instances": None, "items": items, "bytes": size,
+                     "budget": None, "evictions": None, "hit_rate": None})
+    return rows
+
+
+def start_tracemalloc(frames: int = 1):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def stop_tracemalloc():
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+
+
+def tracemalloc_summary(limit: int = 10) -> Optional[Dict[str, Any]]:
+    """Текущий/пиковый объём и топ мест выделения памяти; None, если tracemalloc выключен"""
+    if not tracemalloc.is_tracing():
+        return None
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    top = [(str(stat.traceback[0]), stat.size, stat.count)
+           for stat in snapshot.statistics("lineno")[:limit]]
+    return {"current": current, "peak": peak, "top": top}
+
+
+def format_report(limit: int = 10) -> str:
+    lines = []
+    for row in report():
+        budget = f" / {format_bytes(row['budget'])}" if row["budget"] is not None else ""
+        extra = []
+        if row["evictions"]:
+            extra.append(f"evicted {row['evictions']}")
+        if row["hit_rate"] is not None:
+            extra.append(f"hit rate {row['hit_rate']:.0%}")
+        lines.append(f"{row['name']}: {format_bytes(row['bytes'])}{budget}, {row['items']} items"
+                     + (f" ({', '.join(extra)})" if extra else ""))
+    tm = tracemalloc_summary(limit)
+    if tm is None:
+        lines += ["", "tracemalloc: off"]
+    else:
+        lines += ["", f"tracemalloc: current {format_bytes(tm['current'])}, peak {format_bytes(tm['peak'])}"]
+        lines += [f"  {format_bytes(size):>10}  {count:>7}  {where}" for where, size, count in tm["top"]]
+    return "\n".join(lines)
@@ -1,9 +1,193 @@
 # mysql_connector.py - Работа с MySQL базой данных (исправленная версия)
+import time
 import pymysql
 import logging
-from typing import List, Dict, Tuple, Optional
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Tuple, Optional, Iterator, Callable
 from contextlib import contextmanager
-from config import MYSQL_CONFIG
+from config import MYSQL_CONFIG, APP_CONFIG
+from query_stats import QUERY_STATS, QueryTimer
+from tracing import span
+
+# Таймаут записи на стороне сервера для потоковых запросов (секунды)
+STREAM_NET_WRITE_TIMEOUT = 600
+POOL_ACQUIRE_TIMEOUT = 10.0   # ожидание свободного соединения в пуле (секунды)
+POOL_PING_AFTER = 30.0        # соединение, простоявшее дольше, проверяется ping() перед выдачей
+
+# Подсчёт результатов в поиске: exact — точный COUNT, skip — без подсчёта (total = None),
+# bounded — считается не дальше count_bound строк (total == count_bound значит «не меньше»)
+COUNT_MODES = ("exact", "skip", "bounded")
+DEFAULT_COUNT_BOUND = 1000
+COUNT_WORKERS = 8             # потоков для COUNT, идущих параллельно со страницей
+
+# Сортировки расширенного поиска (ключ API -> ORDER BY)
+ADVANCED_SORTS = {
+    "year_desc": "f.release_year DESC, f.title",
+    "year_asc": "f.release_year ASC, f.title",
+    "title_asc": "f.title ASC",
+    "title_desc": "f.title DESC",
+    "length_asc": "f.length ASC, f.title",
+    "length_desc": "f.length DESC, f.title",
+    "rating": "f.rating DESC, f.title",
+}
+
+# ---------- Запросы (общие для MySQLConnector и async_data.AsyncMySQLConnector) ----------
+KEYWORD_COUNT_SQL = """
+    SELECT COUNT(*) as total
+    FROM film f
+    WHERE f.title LIKE %s
+"""
+KEYWORD_PAGE_SQL = """
+    SELECT 
+        f.film_id,
+        f.title,
+        f.release_year AS release_year,
+        f.length,
+        f.rating,
+        f.description,
+        GROUP_CONCAT(DISTINCT c.name ORDER BY c.name SEPARATOR ', ') as genres
+    FROM film f
+    LEFT JOIN film_category fc ON f.film_id = fc.film_id
+    LEFT JOIN category c ON fc.category_id = c.category_id
+    WHERE f.title LIKE %s
+    GROUP BY f.film_id, f.title, f.release_year, f.length, f.rating, f.description
+    ORDER BY f.title
+    LIMIT %s OFFSET %s
+"""
+KEYWORD_BOUNDED_COUNT_SQL = """
+    SELECT COUNT(*) as total
+    FROM (SELECT 1 FROM film f WHERE f.title LIKE %s LIMIT %s) t
+"""
+GENRES_SQL = """
+    SELECT 
+        c.category_id,
+        c.name,
+        COUNT(fc.film_id) as film_count
+    FROM category c
+    LEFT JOIN film_category fc ON c.category_id = fc.category_id
+    GROUP BY c.category_id, c.name
+    ORDER BY c.name
+"""
+YEAR_RANGE_SQL = """
+    SELECT 
+        MIN(release_year) as min_year,
+        MAX(release_year) as max_year
+    FROM film
+    WHERE release_year IS NOT NULL
+"""
+GENRE_YEAR_COUNT_SQL = """
+    SELECT COUNT(DISTINCT f.film_id) as total
+    FROM film f
+    JOIN film_category fc ON f.film_id = fc.film_id
+    JOIN category c ON fc.category_id = c.category_id
+    WHERE c.name = %s 
+    AND f.release_year BETWEEN %s AND %s
+"""
+GENRE_YEAR_BOUNDED_COUNT_SQL = """
+    SELECT COUNT(*) as total
+    FROM (
+        SELECT DISTINCT f.film_id
+        FROM film f
+        JOIN film_category fc ON f.film_id = fc.film_id
+        JOIN category c ON fc.category_id = c.category_id
+        WHERE c.name = %s 
+        AND f.release_year BETWEEN %s AND %s
+        LIMIT %s
+    ) t
+"""
+GENRE_YEAR_PAGE_SQL = """
+    SELECT DISTINCT
+        f.film_id,
+        f.title,
+        f.release_year AS release_year,
+        f.length,
+        f.rating,
+        f.description,
+        GROUP_CONCAT(DISTINCT cat.name ORDER BY cat.name SEPARATOR ', ') as genres
+    FROM film f
+    JOIN film_category fc ON f.film_id = fc.film_id
+    JOIN category c ON fc.category_id = c.category_id
+    LEFT JOIN film_category fc2 ON f.film_id = fc2.film_id
+    LEFT JOIN category cat ON fc2.category_id = cat.category_id
+    WHERE c.name = %s 
+    AND f.release_year BETWEEN %s AND %s
+    GROUP BY f.film_id, f.title, f.release_year, f.length, f.rating, f.description
+    ORDER BY f.release_year DESC, f.title
+    LIMIT %s OFFSET %s
+"""
+FILM_DETAILS_SQL = """
+    SELECT f.film_id, f.title, f.description, f.release_year, f.length, f.rating,
+           GROUP_CONCAT(DISTINCT c.name ORDER BY c.name SEPARATOR ', ') AS genres,
+           GROUP_CONCAT(DISTINCT CONCAT(a.first_name,' ',a.last_name) ORDER BY a.first_name SEPARATOR ', ') AS actors
+    FROM film f
+    LEFT JOIN film_category fc ON fc.film_id = f.film_id
+    LEFT JOIN category c ON c.category_id = fc.category_id
+    LEFT JOIN film_actor fa ON fa.film_id = f.film_id
+    LEFT JOIN actor a ON a.actor_id = fa.actor_id
+    WHERE f.film_id = %(fid)s
+    GROUP BY f.film_id, f.title, f.description, f.release_year, f.length, f.rating
+"""
+# {placeholders} — по одному %s на жанр
+SIMILAR_FILMS_SQL = """
+    SELECT DISTINCT f.film_id, f.title, f.release_year, f.rating,
+           GROUP_CONCAT(DISTINCT c.name ORDER BY c.name SEPARATOR ', ') as genres
+    FROM film f
+    JOIN film_category fc ON fc.film_id = f.film_id
+    JOIN category c ON c.category_id = fc.category_id
+    WHERE c.name IN ({placeholders})
+      AND f.film_id != %s
+      AND ABS(f.release_year - %s) <= 5
+    GROUP BY f.film_id, f.title, f.release_year, f.rating
+    ORDER BY COUNT(DISTINCT c.name) DESC, f.rating DESC
+    LIMIT %s
+"""
+
+def build_advanced_query(title: Optional[str] = None, actor: Optional[str] = None,
+                         genre: Optional[str] = None, rating: Optional[str] = None,
+                         year_from: Optional[int] = None, year_to: Optional[int] = None,
+                         length_from: Optional[int] = None, length_to: Optional[int] = None,
+                         sort: str = "year_desc", limit: int = 100) -> Tuple[str, Dict]:
+    """SQL и параметры расширенного поиска (фильтры вкладки Advanced; None — фильтр не задан)"""
+    if sort not in ADVANCED_SORTS:
+        raise ValueError(f"Неизвестная сортировка: {sort}")
+    from_parts = ["FROM film f"]
+    where_parts = ["WHERE 1=1"]
+    params: Dict = {}
+    if title:
+        where_parts.append("AND f.title LIKE %(title)s")
+        params['title'] = f"%{title}%"
+    if actor:
+        from_parts.append("JOIN film_actor fa ON fa.film_id = f.film_id")
+        from_parts.append("JOIN actor a ON a.actor_id = fa.actor_id")
+        where_parts.append("AND (a.first_name LIKE %(actor)s OR a.last_name LIKE %(actor)s)")
+        params['actor'] = f"%{actor}%"
+    if genre:
+        from_parts.append("JOIN film_category fc ON fc.film_id = f.film_id")
+        from_parts.append("JOIN category c ON c.category_id = fc.category_id")
+        where_parts.append("AND c.name = %(genre)s")
+        params['genre'] = genre
+    if rating:
+        where_parts.append("AND f.rating = %(rating)s")
+        params['rating'] = rating
+    if year_from is not None:
+        where_parts.append("AND f.release_year >= %(year_from)s")
+        params['year_from'] = year_from
+    if year_to is not None:
+        where_parts.append("AND f.release_year <= %(year_to)s")
+        params['year_to'] = year_to
+    if length_from is not None:
+        where_parts.append("AND f.length >= %(length_from)s")
+        params['length_from'] = length_from
+    if length_to is not None:
+        where_parts.append("AND f.length <= %(length_to)s")
+        params['length_to'] = length_to
+    params['limit'] = limit
+    sql = (f"SELECT DISTINCT f.film_id, f.title, f.description, f.release_year, f.length, f.rating "
+           f"{' '.join(from_parts)} {' '.join(where_parts)} "
+           f"ORDER BY {ADVANCED_SORTS[sort]} LIMIT %(limit)s")
+    return sql, params
+
 
 class MySQLConnectionError(Exception):
     """Ошибки подключения к MySQL"""
@@ -13,10 +197,99 @@ class MySQLQueryError(Exception):
     """Ошибки выполнения запросов MySQL"""
     pass
 
+# Общий для всех коннекторов: COUNT выполняется на своём соединении, пока текущий поток читает страницу
+_COUNT_EXECUTOR = ThreadPoolExecutor(max_workers=COUNT_WORKERS, thread_name_prefix="mysql-count")
+
+
+class ConnectionPool:
+    """
+    Потокобезопасный пул соединений pymysql. Соединения создаются по требованию
+    до size штук; если все заняты, acquire() ждёт до timeout секунд.
+    Сломанные соединения (OperationalError/InterfaceError) не возвращаются в пул.
+    """
+
+    def __init__(self, config: Dict, size: int = 8, timeout: float = POOL_ACQUIRE_TIMEOUT):
+        self.config = config
+        self.size = size
+        self.timeout = timeout
+        self._idle: List[Tuple[object, float]] = []   # (соединение, когда вернулось), LIFO
+        self._in_use = 0
+        self._cond = threading.Condition()
+        self.created = 0
+        self.waits = 0
+        self._closed = False
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise MySQLConnectionError("Пул соединений закрыт")
+                if self._idle:
+                    conn, since = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._in_use < self.size:
+                    conn, since = None, 0.0
+                    self._in_use += 1
+                    break
+                self.waits += 1
+                left = deadline - time.monotonic()
+                if left <= 0 or not self._cond.wait(left):
+                    raise MySQLConnectionError(f"Нет свободных соединений в пуле за {self.timeout:.0f} с")
+        # Подключение и ping — вне блокировки
+        try:
+            if conn is not None and time.monotonic() - since > POOL_PING_AFTER:
+                try:
+                    conn.ping(reconnect=False)
+                except pymysql.Error:
+                    self._close_quietly(conn)
+                    conn = None
+            if conn is None:
+                conn = pymysql.connect(**self.config)
+                with self._cond:
+                    self.created += 1
+            return conn
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn, broken: bool = False):
+        with self._cond:
+            self._in_use -= 1
+            if broken or self._closed or not conn.open:
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            return {"size": self.size, "in_use": self._in_use, "idle": len(self._idle),
+                    "created": self.created, "waits": self.waits}
+
+
 class MySQLConnector:
     """Класс для работы с базой данных MySQL Sakila"""
 
-    def __init__(self):
+    def __init__(self, pool_size: int = 0):
         # Добавляем charset в конфиг если его нет
         self.config = MYSQL_CONFIG.copy()
         if 'charset' not in self.config:
@@ -26,23 +299,54 @@ class MySQLConnector:
             
         self.logger = logging.getLogger(__name__)
         self.connection = None
+        self.stats = QUERY_STATS
+        self._tls = threading.local()  # время подключения для первого запроса на соединении
+        # pool_size > 0 — соединения переиспользуются (сервис); 0 — новое соединение на запрос, как раньше
+        self.pool = ConnectionPool(self.config, pool_size) if pool_size > 0 else None
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+
+    @contextmanager
+    def _pooled(self):
+        start = time.perf_counter()
+        connection = self.pool.acquire()
+        self._tls.connect_time = time.perf_counter() - start
+        broken = False
+        try:
+            yield connection
+        except pymysql.Error as e:
+            broken = isinstance(e, (pymysql.err.OperationalError, pymysql.err.InterfaceError))
+            self.logger.error("Ошибка подключения MySQL: %s", e)
+            raise MySQLConnectionError(f"Не удалось подключиться к MySQL: {e}") from e
+        finally:
+            self.pool.release(connection, broken=broken)
 
     @contextmanager
-    def get_connection(self):
+    def get_connection(self, **overrides):
+        if self.pool is not None and not overrides:
+            with self._pooled() as connection:
+                yield connection
+            return
         connection = None
         try:
-            connection = pymysql.connect(**self.config)
+            start = time.perf_counter()
+            connection = pymysql.connect(**{**self.config, **overrides})
+            self._tls.connect_time = time.perf_counter() - start
             yield connection
         except pymysql.Error as e:
             self.logger.error("Ошибка подключения MySQL: %s", e)
-            raise MySQLConnectionError(f"Не удалось подключиться к MySQL: {e}")
+            raise MySQLConnectionError(f"Не удалось подключиться к MySQL: {e}") from e
         finally:
             if connection:
                 connection.close()
 
-    def test_connection(self) -> bool:
+    def test_connection(self, timeout: Optional[float] = None) -> bool:
+        """Проверка подключения; timeout (сек) ограничивает connect/read для быстрых проб"""
+        overrides = {"connect_timeout": timeout, "read_timeout": timeout} if timeout else {}
         try:
-            with self.get_connection() as conn:
+            with self.get_connection(**overrides) as conn:
                 with conn.cursor() as cur:
                     cur.execute("SELECT 1")
                     cur.fetchone()
@@ -50,6 +354,33 @@ class MySQLConnector:
         except Exception as e:
             self.logger.exception("Тест подключения провален: %s", e)
             return False
+        finally:
+            # Время соединения пробы не относится ни к одному запросу — не даём ему попасть в _timed
+            self._tls.connect_time = 0.0
+
+    def _timed(self, cursor, sql: str, args=None, one: bool = False):
+        """
+        execute + fetchall/fetchone с замером по стадиям (QueryStats).
+        Время подключения из get_connection относится к первому запросу соединения.
+        """
+        timer = QueryTimer(sql, self.stats)
+        timer.stages["connect"] = getattr(self._tls, "connect_time", 0.0)
+        self._tls.connect_time = 0.0
+        try:
+            with span("sql"):
+                cursor.execute(sql, args)
+                timer.mark("execute")
+                if one:
+                    result = cursor.fetchone()
+                    timer.mark("fetch", rows=1 if result is not None else 0)
+                else:
+                    result = cursor.fetchall()
+                    timer.mark("fetch", rows=len(result))
+            timer.finish()
+            return result
+        except Exception as e:
+            timer.finish(error=str(e))
+            raise
 
     def select(self, sql: str, params=None, args=None):
         """
@@ -61,146 +392,171 @@ class MySQLConnector:
             # Создаём новое соединение для каждого запроса с правильной кодировкой
             with self.get_connection() as conn:
                 with conn.cursor(pymysql.cursors.DictCursor) as cur:
-                    if args is not None:
-                        # Позиционные параметры
-                        cur.execute(sql, args)
-                    elif params is not None:
-                        # Именованные параметры
-                        cur.execute(sql, params)
-                    else:
-                        # Без параметров
-                        cur.execute(sql)
-                    return cur.fetchall()
+                    # Позиционные параметры, именованные или без параметров
+                    return self._timed(cur, sql, args if args is not None else params)
         except Exception as e:
             self.logger.error(f"Ошибка выполнения запроса: {e}")
             self.logger.error(f"SQL: {sql}")
             self.logger.error(f"Params: {params}, Args: {args}")
-            raise MySQLQueryError(f"Ошибка выполнения запроса: {e}")
+            raise MySQLQueryError(f"Ошибка выполнения запроса: {e}") from e
 
-    def search_by_keyword(self, keyword: str, offset: int = 0, limit: int = 10) -> Tuple[List[Dict], int]:
-        """Поиск фильмов по ключевому слову в названии"""
+    def select_chunks(self, sql: str, params=None, args=None, batch_size: Optional[int] = None,
+                      as_tuples: bool = False,
+                      on_columns: Optional[Callable[[List[str]], None]] = None) -> Iterator[List]:
+        """
+        Потоковый SELECT через серверный курсор (SSDictCursor / SSCursor).
+        Отдаёт результат пачками (списками) по batch_size строк, не буферизуя
+        весь набор на клиенте. Соединение держится открытым, пока генератор
+        не исчерпан или не закрыт.
+        
+        as_tuples - строки-кортежи вместо словарей (без аллокации dict на строку)
+        on_columns - вызывается один раз с именами колонок до первой пачки
+        """
+        batch_size = batch_size or APP_CONFIG.get("stream_batch_size", 1000)
+        cursor_class = pymysql.cursors.SSCursor if as_tuples else pymysql.cursors.SSDictCursor
+        connection = None
+        timer = QueryTimer(sql, self.stats)
+        error = None
         try:
+            connection = pymysql.connect(**self.config)
+            cur = connection.cursor(cursor_class)
+            # Потребитель может читать медленно (прокрутка таблицы, запись файла)
+            cur.execute("SET SESSION net_write_timeout = %s", (STREAM_NET_WRITE_TIMEOUT,))
+            timer.mark("connect")
+            if args is not None:
+                cur.execute(sql, args)
+            elif params is not None:
+                cur.execute(sql, params)
+            else:
+                cur.execute(sql)
+            timer.mark("execute")
+            if on_columns is not None:
+                on_columns([d[0] for d in cur.description or ()])
+            timer.resume()
+            while True:
+                rows = cur.fetchmany(batch_size)
+                timer.mark("fetch", rows=len(rows))
+                if not rows:
+                    break
+                # Время, пока потребитель обрабатывает пачку, в замер не входит
+                timer.pause()
+                yield list(rows)
+                timer.resume()
+        except pymysql.Error as e:
+            error = str(e)
+            self.logger.error(f"Ошибка выполнения потокового запроса: {e}")
+            self.logger.error(f"SQL: {sql}")
+            self.logger.error(f"Params: {params}, Args: {args}")
+            raise MySQLQueryError(f"Ошибка выполнения запроса: {e}") from e
+        finally:
+            timer.finish(error)
+            # Закрываем соединение, не дочитывая остаток результата курсором
+            if connection:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+
+    def select_iter(self, sql: str, params=None, args=None, batch_size: Optional[int] = None,
+                    as_tuples: bool = False,
+                    on_columns: Optional[Callable[[List[str]], None]] = None) -> Iterator:
+        """Потоковый SELECT построчно (обёртка над select_chunks)"""
+        for chunk in self.select_chunks(sql, params, args, batch_size, as_tuples, on_columns):
+            yield from chunk
+
+    def _count(self, sql: str, args) -> int:
+        with self.get_connection() as conn:
+            with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+                return self._timed(cursor, sql, args, one=True)['total']
+    
+    def _search_page(self, page_sql: str, page_args, count_sql: str, bounded_sql: str, count_args,
+                     count_mode: str, count_bound: int) -> Tuple[List[Dict], Optional[int]]:
+        """
+        Страница результатов и подсчёт по count_mode. С пулом COUNT идёт параллельно
+        на втором соединении из пула, так что задержка поиска — максимум из двух
+        запросов, а не их сумма. Без пула второе соединение стоило бы лишнего
+        TCP/auth-рукопожатия, поэтому COUNT выполняется следом на том же.
+        """
+        if count_mode not in COUNT_MODES:
+            raise ValueError(f"Неизвестный режим подсчёта: {count_mode}")
+        if self.pool is None:
             with self.get_connection() as conn:
                 with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-                    count_query = """
-                        SELECT COUNT(*) as total
-                        FROM film f
-                        WHERE f.title LIKE %s
-                    """
-                    cursor.execute(count_query, (f'%{keyword}%',))
-                    total_count = cursor.fetchone()['total']
-                    
-                    search_query = """
-                        SELECT 
-                            f.film_id,
-                            f.title,
-                            f.release_year,
-                            f.length,
-                            f.rating,
-                            f.description,
-                            GROUP_CONCAT(DISTINCT c.name ORDER BY c.name SEPARATOR ', ') as genres
-                        FROM film f
-                        LEFT JOIN film_category fc ON f.film_id = fc.film_id
-                        LEFT JOIN category c ON fc.category_id = c.category_id
-                        WHERE f.title LIKE %s
-                        GROUP BY f.film_id, f.title, f.release_year, f.length, f.rating, f.description
-                        ORDER BY f.title
-                        LIMIT %s OFFSET %s
-                    """
-                    cursor.execute(search_query, (f'%{keyword}%', limit, offset))
-                    films = cursor.fetchall()
-                    return films, total_count
-                    
+                    films = self._timed(cursor, page_sql, page_args)
+                    if count_mode == "skip":
+                        return films, None
+                    if count_mode == "bounded":
+                        count_sql, count_args = bounded_sql, (*count_args, count_bound)
+                    return films, self._timed(cursor, count_sql, count_args, one=True)['total']
+        count_future = None
+        if count_mode == "exact":
+            count_future = _COUNT_EXECUTOR.submit(self._count, count_sql, count_args)
+        elif count_mode == "bounded":
+            count_future = _COUNT_EXECUTOR.submit(self._count, bounded_sql, (*count_args, count_bound))
+        try:
+            with self.get_connection() as conn:
+                with conn.cursor(pymysql.cursors.DictCursor) as cursor:
+                    films = self._timed(cursor, page_sql, page_args)
+        except Exception:
+            if count_future is not None:
+                count_future.cancel()
+            raise
+        if count_future is None:
+            return films, None
+        with span("count_wait"):
+            return films, count_future.result()
+    
+    def search_by_keyword(self, keyword: str, offset: int = 0, limit: int = 10,
+                          count_mode: str = "exact",
+                          count_bound: int = DEFAULT_COUNT_BOUND) -> Tuple[List[Dict], Optional[int]]:
+        """Поиск фильмов по ключевому слову в названии (count_mode — см. COUNT_MODES)"""
+        pattern = f'%{keyword}%'
+        try:
+            return self._search_page(KEYWORD_PAGE_SQL, (pattern, limit, offset),
+                                     KEYWORD_COUNT_SQL, KEYWORD_BOUNDED_COUNT_SQL, (pattern,),
+                                     count_mode, count_bound)
+        except ValueError:
+            raise
         except Exception as e:
             self.logger.error(f"Ошибка поиска по ключевому слову '{keyword}': {e}")
-            raise MySQLQueryError(f"Ошибка выполнения запроса: {e}")
+            raise MySQLQueryError(f"Ошибка выполнения запроса: {e}") from e
     
     def get_available_genres(self) -> List[Dict]:
         """Получение списка всех доступных жанров"""
         try:
             with self.get_connection() as conn:
                 with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-                    query = """
-                        SELECT 
-                            c.category_id,
-                            c.name,
-                            COUNT(fc.film_id) as film_count
-                        FROM category c
-                        LEFT JOIN film_category fc ON c.category_id = fc.category_id
-                        GROUP BY c.category_id, c.name
-                        ORDER BY c.name
-                    """
-                    cursor.execute(query)
-                    return cursor.fetchall()
+                    return self._timed(cursor, GENRES_SQL)
                     
         except Exception as e:
             self.logger.error(f"Ошибка получения жанров: {e}")
-            raise MySQLQueryError(f"Ошибка получения списка жанров: {e}")
+            raise MySQLQueryError(f"Ошибка получения списка жанров: {e}") from e
     
     def get_year_range(self) -> Tuple[int, int]:
         """Получение диапазона годов выпуска фильмов"""
         try:
             with self.get_connection() as conn:
                 with conn.cursor() as cursor:
-                    query = """
-                        SELECT 
-                            MIN(release_year) as min_year,
-                            MAX(release_year) as max_year
-                        FROM film
-                        WHERE release_year IS NOT NULL
-                    """
-                    cursor.execute(query)
-                    result = cursor.fetchone()
+                    result = self._timed(cursor, YEAR_RANGE_SQL, one=True)
                     return result[0] or 1900, result[1] or 2025
                     
         except Exception as e:
             self.logger.error(f"Ошибка получения диапазона годов: {e}")
-            raise MySQLQueryError(f"Ошибка получения диапазона годов: {e}")
+            raise MySQLQueryError(f"Ошибка получения диапазона годов: {e}") from e
     
     def search_by_genre_and_years(self, genre: str, start_year: int, end_year: int, 
-                                 offset: int = 0, limit: int = 10) -> Tuple[List[Dict], int]:
-        """Поиск фильмов по жанру и диапазону годов"""
+                                 offset: int = 0, limit: int = 10, count_mode: str = "exact",
+                                 count_bound: int = DEFAULT_COUNT_BOUND) -> Tuple[List[Dict], Optional[int]]:
+        """Поиск фильмов по жанру и диапазону годов (count_mode — см. COUNT_MODES)"""
         try:
-            with self.get_connection() as conn:
-                with conn.cursor(pymysql.cursors.DictCursor) as cursor:
-                    count_query = """
-                        SELECT COUNT(DISTINCT f.film_id) as total
-                        FROM film f
-                        JOIN film_category fc ON f.film_id = fc.film_id
-                        JOIN category c ON fc.category_id = c.category_id
-                        WHERE c.name = %s 
-                        AND f.release_year BETWEEN %s AND %s
-                    """
-                    cursor.execute(count_query, (genre, start_year, end_year))
-                    total_count = cursor.fetchone()['total']
-                    
-                    search_query = """
-                        SELECT DISTINCT
-                            f.film_id,
-                            f.title,
-                            f.release_year,
-                            f.length,
-                            f.rating,
-                            f.description,
-                            GROUP_CONCAT(DISTINCT cat.name ORDER BY cat.name SEPARATOR ', ') as genres
-                        FROM film f
-                        JOIN film_category fc ON f.film_id = fc.film_id
-                        JOIN category c ON fc.category_id = c.category_id
-                        LEFT JOIN film_category fc2 ON f.film_id = fc2.film_id
-                        LEFT JOIN category cat ON fc2.category_id = cat.category_id
-                        WHERE c.name = %s 
-                        AND f.release_year BETWEEN %s AND %s
-                        GROUP BY f.film_id, f.title, f.release_year, f.length, f.rating, f.description
-                        ORDER BY f.release_year DESC, f.title
-                        LIMIT %s OFFSET %s
-                    """
-                    cursor.execute(search_query, (genre, start_year, end_year, limit, offset))
-                    films = cursor.fetchall()
-                    return films, total_count
-                    
+            return self._search_page(GENRE_YEAR_PAGE_SQL, (genre, start_year, end_year, limit, offset),
+                                     GENRE_YEAR_COUNT_SQL, GENRE_YEAR_BOUNDED_COUNT_SQL,
+                                     (genre, start_year, end_year), count_mode, count_bound)
+        except ValueError:
+            raise
         except Exception as e:
             self.logger.error(f"Ошибка поиска по жанру '{genre}' и годам {start_year}-{end_year}: {e}")
-            raise MySQLQueryError(f"Ошибка выполнения запроса: {e}")
+            raise MySQLQueryError(f"Ошибка выполнения запроса: {e}") from e
     
     def find_similar_films(self, film_id: int, genres: List[str], year: int, limit: int = 10) -> List[Dict]:
         """Поиск похожих фильмов по жанрам и году"""
@@ -213,25 +569,27 @@ class MySQLConnector:
                     # Создаём плейсхолдеры для жанров
                     placeholders = ', '.join(['%s'] * len(genres))
                     
-                    query = f"""
-                        SELECT DISTINCT f.film_id, f.title, f.release_year, f.rating,
-                               GROUP_CONCAT(DISTINCT c.name ORDER BY c.name SEPARATOR ', ') as genres
-                        FROM film f
-                        JOIN film_category fc ON fc.film_id = f.film_id
-                        JOIN category c ON c.category_id = fc.category_id
-                        WHERE c.name IN ({placeholders})
-                          AND f.film_id != %s
-                          AND ABS(f.release_year - %s) <= 5
-                        GROUP BY f.film_id, f.title, f.release_year, f.rating
-                        ORDER BY COUNT(DISTINCT c.name) DESC, f.rating DESC
-                        LIMIT %s
-                    """
+                    query = SIMILAR_FILMS_SQL.format(placeholders=placeholders)
                     
                     # Параметры: жанры + film_id + year + limit
                     params = genres + [film_id, year, limit]
-                    cursor.execute(query, params)
-                    return cursor.fetchall()
+                    return self._timed(cursor, query, params)
                     
         except Exception as e:
             self.logger.error(f"Ошибка поиска похожих фильмов для film_id={film_id}: {e}")
-            raise MySQLQueryError(f"Ошибка выполнения запроса: {e}")
\ No newline at end of file
+            raise MySQLQueryError(f"Ошибка выполнения запроса: {e}") from e
+    
+    def get_film_details(self, film_id: int) -> Optional[Dict]:
+        """Карточка фильма: поля, жанры и актёры одной строкой (None — нет такого фильма)"""
+        rows = self.select(FILM_DETAILS_SQL, {"fid": film_id})
+        return rows[0] if rows else None
+    
+    def search_advanced(self, title: Optional[str] = None, actor: Optional[str] = None,
+                        genre: Optional[str] = None, rating: Optional[str] = None,
+                        year_from: Optional[int] = None, year_to: Optional[int] = None,
+                        length_from: Optional[int] = None, length_to: Optional[int] = None,
+                        sort: str = "year_desc", limit: int = 100) -> List[Dict]:
+        """Расширенный поиск с теми же фильтрами, что вкладка Advanced в GUI (None — фильтр не задан)"""
+        sql, params = build_advanced_query(title, actor, genre, rating, year_from, year_to,
+                                           length_from, length_to, sort, limit)
+        return self.select(sql, params)
@@ -0,0 +1,193 @@
+# profiling.py - Профилирование действий пользователя (cProfile или сэмплирование), по файлу на действие
+"""
+Profiler подключается к tracing как хук: каждое корневое действие (поиск,
+экспорт, ...) профилируется отдельно и сохраняется в PROFILE_DIR:
+
+    cprofile — детерминированный cProfile, файл .prof (pstats, snakeviz)
+    sample   — сэмплирующий профилировщик на потоке-наблюдателе, файл .folded
+               (collapsed stacks для flamegraph.pl / speedscope); накладные
+               расходы почти не зависят от числа вызовов — подходит для «боевых» сессий
+"""
+import io
+import os
+import re
+import sys
+import time
+import pstats
+import cProfile
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+from tracing import TRACER
+
+PROFILE_DIR = os.path.join(os.path.expanduser("~"), ".sakila_cache", "profiles")
+PROFILE_MODES = ("cprofile", "sample")
+SAMPLE_INTERVAL_MS = 5
+SUMMARY_LIMIT = 25
+
+
+class _Sampler:
+    """Снимает стек одного потока каждые SAMPLE_INTERVAL_MS мс"""
+
+    def __init__(self, thread_id: int, interval_ms: float = SAMPLE_INTERVAL_MS):
+        self.thread_id = thread_id
+        self.interval = interval_ms / 1000
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=1)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            if names:
+                self.stacks[";".join(reversed(names))] += 1
+
+    def dump(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Profiler:
+    """Хук tracing: профилирует каждое действие, пока включён"""
+
+    def __init__(self, mode: str = "cprofile", out_dir: str = PROFILE_DIR):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Неизвестный режим профилирования: {mode}")
+        self.mode = mode
+        self.out_dir = out_dir
+        self.enabled = False
+        self.records: List[Dict[str, Any]] = []  # сохранённые профили этой сессии
+        self._active: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    # ---------- Включение ----------
+    def enable(self, mode: Optional[str] = None):
+        if mode:
+            if mode not in PROFILE_MODES:
+                raise ValueError(f"Неизвестный режим профилирования: {mode}")
+            self.mode = mode
+        if self not in TRACER.hooks:
+            TRACER.hooks.append(self)
+        self.enabled = True
+
+    def disable(self):
+        with self._lock:
+            self.enabled = False
+            # Действие ещё идёт: хук снимет action_finished, иначе профилировщик останется включённым
+            if self._active is None:
+                self._unhook()
+
+    def _unhook(self):
+        if self in TRACER.hooks:
+            TRACER.hooks.remove(self)
+
+    # ---------- Хуки tracing ----------
+    def action_started(self, name: str):
+        with self._lock:
+            # Одно действие за раз: cProfile не вкладывается и не делится между потоками
+            if not self.enabled or self._active is not None:
+                return
+            mode = self.mode
+            self._active = {"name": name, "mode": mode, "thread": threading.get_ident(),
+                            "start": time.perf_counter()}
+        try:
+            if mode == "cprofile":
+                prof = cProfile.Profile()
+                prof.enable()  # ValueError, если уже работает другой профилировщик
+            else:
+                prof = _Sampler(threading.get_ident())
+                prof.start()
+        except Exception:
+            with self._lock:
+                self._active = None
+            raise
+        self._active["profiler"] = prof
+
+    def action_finished(self, name: str):
+        active = self._active
+        if active is None or active["thread"] != threading.get_ident() or active["name"] != name:
+            return
+        prof, mode = active["profiler"], active["mode"]
+        if mode == "cprofile":
+            prof.disable()
+        else:
+            prof.stop()
+        elapsed = time.perf_counter() - active["start"]
+        with self._lock:
+            self._active = None
+            if not self.enabled:
+                self._unhook()
+        self._save(name, mode, prof, elapsed)
+
+    def _save(self, name: str, mode: str, prof, elapsed: float):
+        os.makedirs(self.out_dir, exist_ok=True)
+        safe = re.sub(r"[^\w.-]+", "_", name)
+        ext = ".prof" if mode == "cprofile" else ".folded"
+        stamp = f"{time.strftime('%Y%m%d_%H%M%S')}_{int(time.time() * 1000) % 1000:03d}"
+        path = os.path.join(self.out_dir, f"{stamp}_{safe}{ext}")
+        if mode == "cprofile":
+            prof.dump_stats(path)
+        else:
+            prof.dump(path)
+        self.records.append({"name": name, "path": path, "mode": mode,
+                             "elapsed_ms": elapsed * 1000, "at": time.time()})
+
+
+# ---------- Сводка ----------
+def summarize(path: str, limit: int = SUMMARY_LIMIT) -> str:
+    """Текстовая сводка по сохранённому профилю: топ функций по кумулятивному времени"""
+    if path.endswith(".folded"):
+        return _summarize_folded(path, limit)
+    out = io.StringIO()
+    stats = pstats.Stats(path, stream=out)
+    stats.strip_dirs().sort_stats("cumulative").print_stats(limit)
+    return out.getvalue()
+
+
+def _summarize_folded(path: str, limit: int) -> str:
+    inclusive: Counter = Counter()
+    own: Counter = Counter()
+    total = 0
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            stack, _, count = line.rstrip("\n").rpartition(" ")
+            if not stack:
+                continue
+            n = int(count)
+            total += n
+            frames = stack.split(";")
+            for fn in set(frames):  # рекурсия не считается дважды
+                inclusive[fn] += n
+            own[frames[-1]] += n
+    if not total:
+        return "No samples."
+    lines = [f"{total} samples ({SAMPLE_INTERVAL_MS} ms interval)", "",
+             f"{'cumulative':>10} {'own':>8}  function"]
+    for fn, n in inclusive.most_common(limit):
+        lines.append(f"{n / total:>10.1%} {own[fn] / total:>8.1%}  {fn}")
+    return "\n".join(lines)
+
+
+def list_profiles(out_dir: str = PROFILE_DIR) -> List[str]:
+    """Профили на диске, новые первыми"""
+    if not os.path.isdir(out_dir):
+        return []
+    files = [os.path.join(out_dir, f) for f in os.listdir(out_dir) if f.endswith((".prof", ".folded"))]
+    return sorted(files, key=os.path.getmtime, reverse=True)
+
+
+PROFILER = Profiler()
@@ -0,0 +1,181 @@
+# query_stats.py - Замеры времени SQL-запросов: отпечатки, перцентили, журнал медленных запросов
+import os
+import re
+import json
+import time
+import logging
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Any
+from config import APP_CONFIG
+
+STATS_WINDOW = 200          # последних замеров на отпечаток (для перцентилей)
+SLOW_QUERY_MS = APP_CONFIG.get("slow_query_ms", 500)
+SLOW_QUERY_LOG = APP_CONFIG.get(
+    "slow_query_log", os.path.join(os.path.expanduser("~"), ".sakila_cache", "slow_queries.log"))
+
+logger = logging.getLogger(__name__)
+
+_RE_COMMENT = re.compile(r"(--[^\n]*|/\*.*?\*/)", re.S)
+_RE_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_RE_PARAM = re.compile(r"%\(\w+\)s|%s")
+_RE_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_RE_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_RE_SPACE = re.compile(r"\s+")
+
+
+def fingerprint(sql: str) -> str:
+    """
+    Нормализованный SQL: литералы и плейсхолдеры -> ?, списки IN (...) -> (?+),
+    пробелы схлопнуты. Запросы, отличающиеся только параметрами, совпадают.
+    """
+    s = _RE_COMMENT.sub(" ", sql)
+    s = _RE_STRING.sub("?", s)
+    s = _RE_PARAM.sub("?", s)
+    s = _RE_NUMBER.sub("?", s)
+    s = _RE_IN_LIST.sub("(?+)", s)
+    return _RE_SPACE.sub(" ", s).strip()
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+class _Fingerprint:
+    """Накопленная статистика одного отпечатка"""
+    __slots__ = ("count", "errors", "rows", "total", "connect", "execute", "fetch", "recent", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.rows = 0
+        self.total = 0.0
+        self.connect = 0.0
+        self.execute = 0.0
+        self.fetch = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=STATS_WINDOW)
+
+
+class QueryStats:
+    """Потокобезопасный сборщик замеров запросов (один на процесс)"""
+
+    def __init__(self, slow_ms: float = SLOW_QUERY_MS, slow_log: Optional[str] = SLOW_QUERY_LOG):
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self._by_fp: Dict[str, _Fingerprint] = {}
+        self.slow_log = slow_log
+        self._log_lock = threading.Lock()
+
+    def _log_slow(self, entry: Dict[str, Any]):
+        """Дописывает строку JSON в журнал медленных запросов"""
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._log_lock:
+            try:
+                os.makedirs(os.path.dirname(self.slow_log) or ".", exist_ok=True)
+                with open(self.slow_log, "a", encoding="utf-8") as f:
+                    f.write(line)
+            except OSError as e:
+                logger.warning("Журнал медленных запросов недоступен: %s", e)
+
+    def record(self, sql: str, connect: float, execute: float, fetch: float, rows: int,
+               error: Optional[str] = None):
+        """Добавляет один замер (секунды)"""
+        fp = fingerprint(sql)
+        total = connect + execute + fetch
+        with self._lock:
+            st = self._by_fp.get(fp)
+            if st is None:
+                st = self._by_fp[fp] = _Fingerprint()
+            st.count += 1
+            st.rows += rows
+            st.total += total
+            st.connect += connect
+            st.execute += execute
+            st.fetch += fetch
+            st.max = max(st.max, total)
+            st.recent.append(total)
+            if error:
+                st.errors += 1
+        if self.slow_log and total * 1000 >= self.slow_ms:
+            self._log_slow({
+                "ts": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "total_ms": round(total * 1000, 1),
+                "connect_ms": round(connect * 1000, 1),
+                "execute_ms": round(execute * 1000, 1),
+                "fetch_ms": round(fetch * 1000, 1),
+                "rows": rows,
+                "error": error,
+                "fingerprint": fp,
+            })
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Сводка по отпечаткам, отсортированная по суммарному времени (мс)"""
+        with self._lock:
+            items = [(fp, st, sorted(st.recent)) for fp, st in self._by_fp.items()]
+        out = []
+        for fp, st, recent in items:
+            n = st.count or 1
+            out.append({
+                "fingerprint": fp,
+                "count": st.count,
+                "errors": st.errors,
+                "rows": st.rows,
+                "total_ms": st.total * 1000,
+                "avg_connect_ms": st.connect / n * 1000,
+                "avg_execute_ms": st.execute / n * 1000,
+                "avg_fetch_ms": st.fetch / n * 1000,
+                "p50_ms": _percentile(recent, 0.50) * 1000,
+                "p95_ms": _percentile(recent, 0.95) * 1000,
+                "p99_ms": _percentile(recent, 0.99) * 1000,
+                "max_ms": st.max * 1000,
+            })
+        return sorted(out, key=lambda r: r["total_ms"], reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self._by_fp.clear()
+
+
+class QueryTimer:
+    """
+    Замер одного запроса по стадиям:
+        t = QueryTimer(sql); ...connect...; t.mark("connect"); ...execute...; t.mark("execute")
+        ...fetch...; t.mark("fetch", rows=n); t.finish()
+    Время между mark() добавляется к указанной стадии; pause() исключает время
+    потребителя (для потокового чтения).
+    """
+
+    def __init__(self, sql: str, stats: Optional[QueryStats] = None):
+        self.sql = sql
+        self.stats = stats or QUERY_STATS
+        self.stages = {"connect": 0.0, "execute": 0.0, "fetch": 0.0}
+        self.rows = 0
+        self._last = time.perf_counter()
+        self._done = False
+
+    def mark(self, stage: str, rows: int = 0):
+        now = time.perf_counter()
+        self.stages[stage] += now - self._last
+        self.rows += rows
+        self._last = now
+
+    def pause(self):
+        """Время до следующего resume() ни к одной стадии не относится"""
+        self._last = None
+
+    def resume(self):
+        self._last = time.perf_counter()
+
+    def finish(self, error: Optional[str] = None):
+        if self._done:
+            return
+        self._done = True
+        self.stats.record(self.sql, self.stages["connect"], self.stages["execute"],
+                          self.stages["fetch"], self.rows, error)
+
+
+QUERY_STATS = QueryStats()
@@ -0,0 +1,194 @@
+# reference_data.py - Справочные данные для вкладок (жанры, годы, рейтинги, названия) с фоновым прогревом
+import os
+import json
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, Optional, List
+
+SNAPSHOT_VERSION = 1
+COMPLETION_LIMIT = 500  # названий для автодополнения
+RATING_ORDER = ["G", "PG", "PG-13", "R", "NC-17"]
+
+# Значения до первой загрузки (и если БД недоступна)
+DEFAULTS: Dict[str, Any] = {
+    "genres": ["Comedy", "Action", "Drama"],
+    "year_range": [1980, 2025],
+    "ratings": list(RATING_ORDER),
+    "titles": [],
+}
+
+logger = logging.getLogger(__name__)
+
+
+# ---------- Загрузчики (по одному запросу на ключ) ----------
+def load_genres(db) -> List[str]:
+    return [g["name"] for g in db.get_available_genres() or [] if g.get("name")]
+
+
+def load_year_range(db) -> List[int]:
+    y_min, y_max = db.get_year_range()
+    return [int(y_min), int(y_max)]
+
+
+def load_ratings(db) -> List[str]:
+    rows = db.select("SELECT DISTINCT rating FROM film WHERE rating IS NOT NULL")
+    found = {str(r["rating"]) for r in rows if r.get("rating") is not None}
+    # Известные рейтинги — в привычном порядке, остальные — по алфавиту
+    return [r for r in RATING_ORDER if r in found] + sorted(found - set(RATING_ORDER))
+
+
+def load_titles(db, limit: int = COMPLETION_LIMIT) -> List[str]:
+    rows = db.select(f"SELECT DISTINCT title FROM film ORDER BY title LIMIT {int(limit)}")
+    return [r["title"] for r in rows if r.get("title")]
+
+
+LOADERS: Dict[str, Callable[[Any], Any]] = {
+    "genres": load_genres,
+    "year_range": load_year_range,
+    "ratings": load_ratings,
+    "titles": load_titles,
+}
+
+# Таблицы каталога, от которых зависит каждый справочник (см. change_detector)
+DEPENDS: Dict[str, tuple] = {
+    "genres": ("category", "film_category"),
+    "year_range": ("film",),
+    "ratings": ("film",),
+    "titles": ("film",),
+}
+
+
+def keys_for(tables) -> List[str]:
+    """Справочники, которые нужно перезагрузить после изменения таблиц tables"""
+    return [key for key, deps in DEPENDS.items() if set(deps) & set(tables)]
+
+
+class ReferenceData:
+    """
+    Общий для всех вкладок кэш справочных данных.
+
+    При создании читает снимок с прошлого запуска (если есть), чтобы интерфейс
+    сразу рисовался с реальными значениями; warmup() обновляет данные в фоне
+    и сохраняет новый снимок.
+    """
+
+    def __init__(self, db, snapshot_path: Optional[str] = None):
+        self.db = db
+        self.snapshot_path = snapshot_path
+        self._data: Dict[str, Any] = {k: list(v) for k, v in DEFAULTS.items()}
+        self.source = "defaults"  # defaults / snapshot / live
+        self.snapshot_time: Optional[float] = None
+        if snapshot_path:
+            self.load_snapshot()
+
+    # ---------- Доступ ----------
+    def get(self, key: str) -> Any:
+        return self._data.get(key, DEFAULTS.get(key))
+
+    @property
+    def genres(self) -> List[str]:
+        return self.get("genres")
+
+    @property
+    def year_range(self) -> List[int]:
+        return self.get("year_range")
+
+    @property
+    def ratings(self) -> List[str]:
+        return self.get("ratings")
+
+    @property
+    def titles(self) -> List[str]:
+        return self.get("titles")
+
+    # ---------- Снимок ----------
+    def load_snapshot(self) -> bool:
+        """Читает снимок с диска; False, если его нет или он повреждён"""
+        try:
+            with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                snap = json.load(f)
+            if snap.get("version") != SNAPSHOT_VERSION:
+                return False
+            for key, value in snap.get("data", {}).items():
+                if key in DEFAULTS and value:
+                    self._data[key] = value
+            self.source = "snapshot"
+            self.snapshot_time = snap.get("saved_at")
+            return True
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning("Снимок справочных данных не прочитан: %s", e)
+            return False
+
+    def save_snapshot(self):
+        if not self.snapshot_path:
+            return
+        snap = {"version": SNAPSHOT_VERSION, "saved_at": time.time(), "data": dict(self._data)}
+        tmp = self.snapshot_path + ".tmp"
+        try:
+            os.makedirs(os.path.dirname(self.snapshot_path) or ".", exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(snap, f, ensure_ascii=False)
+            os.replace(tmp, self.snapshot_path)  # атомарно: читатель не увидит половину файла
+        except Exception as e:
+            logger.warning("Снимок справочных данных не сохранён: %s", e)
+
+    # ---------- Загрузка ----------
+    def load_now(self, keys: Optional[List[str]] = None) -> Dict[str, str]:
+        """Синхронная загрузка (для вкладок, созданных без общего кэша); возвращает ошибки"""
+        errors = {}
+        for key in keys or LOADERS:
+            try:
+                self._data[key] = LOADERS[key](self.db)
+                self.source = "live"
+            except Exception as e:
+                errors[key] = str(e)
+        return errors
+
+    def warmup(self, on_item: Callable[[str], None],
+               on_done: Optional[Callable[[Dict[str, str]], None]] = None,
+               keys: Optional[List[str]] = None) -> ThreadPoolExecutor:
+        """
+        Параллельно загружает справочники и сразу возвращает управление.
+
+        Args:
+            on_item: Вызывается из рабочего потока с ключом, как только значение обновлено
+            on_done: Вызывается один раз в конце со словарем ошибок {ключ: текст};
+                снимок к этому моменту уже сохранён
+            keys: Какие справочники загружать (по умолчанию все)
+
+        Returns:
+            ThreadPoolExecutor: Пул (уже переведён в shutdown без ожидания)
+        """
+        lock = threading.Lock()
+        errors: Dict[str, str] = {}
+        loaders = {key: LOADERS[key] for key in keys or LOADERS}
+        pending = set(loaders)
+
+        def _run(key: str, loader: Callable):
+            try:
+                value = loader(self.db)
+            except Exception as e:
+                value = None
+                errors[key] = str(e)
+            if value:
+                self._data[key] = value
+                on_item(key)
+            with lock:
+                pending.discard(key)
+                last = not pending
+            if last:
+                if len(errors) < len(loaders):
+                    self.source = "live"
+                    self.save_snapshot()
+                if on_done:
+                    on_done(errors)
+
+        executor = ThreadPoolExecutor(max_workers=len(loaders), thread_name_prefix="warmup")
+        for key, loader in loaders.items():
+            executor.submit(_run, key, loader)
+        executor.shutdown(wait=False)
+        return executor
@@ -0,0 +1,395 @@
+# service.py - Безголовый HTTP-сервис поиска (JSON): общий тёплый бэкенд для тонких клиентов
+"""
+Один процесс держит пул соединений MySQL, клиентов MongoDB и кэш готовых
+ответов; запросы обслуживаются параллельно (поток на запрос, обращения к БД
+ограничены размером пула). Логи поиска пишутся в MongoDB в фоне и не
+задерживают ответ.
+
+Эндпоинты (GET, ответы JSON):
+    /health                                   пул, кэш, время работы
+    /genres                                   жанры с числом фильмов
+    /search/keyword?q=love&page=1&per_page=10[&count=exact|skip|bounded&count_bound=1000]
+    /search/genre?genre=Drama&from=2000&to=2010&page=1&per_page=10[&count=...]
+    /search/advanced?title=&actor=&genre=&rating=&year_from=&year_to=&length_from=&length_to=&sort=year_desc&limit=100
+    /films/<id>                               карточка фильма
+    /films/<id>/similar?limit=10
+    /stats/popular?limit=5
+    /stats/recent?limit=5
+
+Ответы из MySQL кэшируются вместе со штампом таблиц, из которых прочитаны
+(change_detector): изменение каталога сбрасывает только зависящие от него
+ответы, поэтому при включённом детекторе TTL поиска можно делать длинным.
+
+Использование:
+    python service.py --port 8080 --pool-size 8
+    python service.py --tmdb --cache-ttl 120 --cache-mb 128
+    python service.py --cache-ttl 3600 --change-poll-s 10
+"""
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+import threading
+from datetime import date, datetime
+from decimal import Decimal
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+import memory_budget
+import change_detector
+from memory_budget import BoundedCache
+from change_detector import CAST_TABLES, FILM_TABLES, GENRE_TABLES
+
+DEFAULT_PORT = 8080
+DEFAULT_POOL_SIZE = 8
+DEFAULT_CACHE_TTL = 60        # секунд для результатов поиска
+DEFAULT_CACHE_MB = 64
+DEFAULT_CHANGE_POLL_S = change_detector.POLL_INTERVAL_S
+MAX_PER_PAGE = 100
+MAX_LIMIT = 1000
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceError(Exception):
+    """Ошибка запроса с HTTP-статусом"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _json_default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+def _encode(payload: Any) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, default=_json_default).encode("utf-8")
+
+
+# ---------- Разбор параметров ----------
+def _str(args: Dict[str, str], name: str, required: bool = False) -> Optional[str]:
+    value = (args.get(name) or "").strip()
+    if required and not value:
+        raise ServiceError(400, f"parameter '{name}' is required")
+    return value or None
+
+
+def _int(args: Dict[str, str], name: str, default: Optional[int] = None,
+         lo: Optional[int] = None, hi: Optional[int] = None) -> Optional[int]:
+    raw = (args.get(name) or "").strip()
+    if not raw:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ServiceError(400, f"parameter '{name}' must be an integer")
+    if lo is not None and value < lo:
+        raise ServiceError(400, f"parameter '{name}' must be >= {lo}")
+    if hi is not None and value > hi:
+        raise ServiceError(400, f"parameter '{name}' must be <= {hi}")
+    return value
+
+
+class ResponseCache:
+    """
+    Готовые JSON-ответы с TTL и штампом таблиц (change_detector); память
+    ограничена бюджетом "service_responses" (memory_budget)
+    """
+
+    def __init__(self):
+        self._cache = BoundedCache("service_responses", sizeof=lambda entry: len(entry[1]) + 100)
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, threading.Event] = {}
+
+    def get(self, key: str) -> Optional[Tuple[bytes, int]]:
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                return None
+            expires, body, count, stamp = entry
+            if expires < time.monotonic() or not change_detector.is_fresh(stamp):
+                self._cache.pop(key)
+                return None
+            return body, count
+
+    def set(self, key: str, body: bytes, count: int, ttl: float, stamp: change_detector.Stamp = ()):
+        with self._lock:
+            self._cache.set(key, (time.monotonic() + ttl, body, count, stamp))
+
+    def compute(self, key: str, ttl: float, produce: Callable[[], Tuple[bytes, int]],
+                tables: Tuple[str, ...] = ()) -> Tuple[bytes, int, str]:
+        """
+        Ответ из кэша или produce(); одновременные промахи по одному ключу
+        ждут первый запрос, а не идут в БД каждый (single-flight).
+        Штамп tables снимается до produce(): изменение во время запроса
+        сделает ответ устаревшим при следующем опросе детектора.
+        """
+        while True:
+            hit = self.get(key)
+            if hit is not None:
+                return hit[0], hit[1], "HIT"
+            with self._lock:
+                event = self._inflight.get(key)
+                leader = event is None
+                if leader:
+                    event = self._inflight[key] = threading.Event()
+            if leader:
+                break
+            event.wait()
+        try:
+            stamp = change_detector.stamp(tables)
+            body, count = produce()
+            if ttl > 0:
+                self.set(key, body, count, ttl, stamp)
+            return body, count, "MISS"
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._cache.hits + self._cache.misses
+            return {"items": len(self._cache), "bytes": self._cache.bytes_used,
+                    "budget": self._cache.max_bytes, "evictions": self._cache.evictions,
+                    "hit_rate": self._cache.hits / lookups if lookups else None}
+
+
+class Route:
+    def __init__(self, pattern: str, handler: Callable, ttl: float, search_type: Optional[str] = None,
+                 tables: Tuple[str, ...] = ()):
+        self.pattern = re.compile(pattern + r"$")
+        self.handler = handler
+        self.ttl = ttl
+        self.search_type = search_type   # логируется в MongoDB как поиск
+        self.tables = tables             # таблицы каталога, от которых зависит ответ
+
+
+class SearchService:
+    """Бэкенд сервиса: маршруты, кэш ответов, фоновое логирование"""
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE, cache_ttl: float = DEFAULT_CACHE_TTL,
+                 change_poll_s: float = DEFAULT_CHANGE_POLL_S):
+        from mysql_connector import MySQLConnector
+        from log_writer import LogWriter
+        from log_stats import LogStats
+        self.db = MySQLConnector(pool_size=pool_size)
+        self.log_writer = LogWriter()
+        self.log_stats = LogStats()
+        self.cache = ResponseCache()
+        self.changes: Optional[change_detector.ChangeDetector] = None
+        if change_poll_s > 0:
+            self.changes = change_detector.ChangeDetector(self.db, change_poll_s)
+            change_detector.install(self.changes)
+            self.changes.start()
+        self.started = time.time()
+        # Один поток записи: LogWriter не рассчитан на одновременную инициализацию
+        self._log_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="search-log")
+        self._stats_lock = threading.Lock()
+        self.routes: List[Route] = [
+            Route(r"/health", self.health, ttl=0),
+            Route(r"/genres", self.genres, ttl=3600, tables=GENRE_TABLES),
+            Route(r"/search/keyword", self.search_keyword, ttl=cache_ttl, search_type="keyword",
+                  tables=FILM_TABLES),
+            Route(r"/search/genre", self.search_genre, ttl=cache_ttl, search_type="genre_year",
+                  tables=FILM_TABLES),
+            Route(r"/search/advanced", self.search_advanced, ttl=cache_ttl, search_type="advanced",
+                  tables=CAST_TABLES),
+            Route(r"/films/(\d+)", self.film_details, ttl=cache_ttl * 5, tables=CAST_TABLES),
+            Route(r"/films/(\d+)/similar", self.similar, ttl=cache_ttl * 5, tables=CAST_TABLES),
+            Route(r"/stats/popular", self.popular, ttl=min(cache_ttl, 10)),
+            Route(r"/stats/recent", self.recent, ttl=min(cache_ttl, 5)),
+        ]
+
+    # ---------- Диспетчер ----------
+    def dispatch(self, path: str, args: Dict[str, str]) -> Tuple[int, bytes, str]:
+        """(HTTP-статус, тело, X-Cache)"""
+        path = path.rstrip("/") or "/"
+        for route in self.routes:
+            m = route.pattern.match(path)
+            if m is None:
+                continue
+            key = path + "?" + "&".join(f"{k}={v}" for k, v in sorted(args.items()))
+            try:
+                body, count, state = self.cache.compute(
+                    key, route.ttl, lambda: self._produce(route, args, m.groups()), route.tables)
+            except ServiceError as e:
+                return e.status, _encode({"error": str(e)}), "MISS"
+            except Exception as e:
+                logger.exception("Ошибка обработки %s", path)
+                status = 503 if type(e).__name__ in ("MySQLConnectionError", "MongoStatsError") else 500
+                return status, _encode({"error": str(e)}), "MISS"
+            if route.search_type:
+                # Логируем каждый поиск, в том числе из кэша, — статистика должна видеть спрос
+                self._log_pool.submit(self._log, route.search_type, args, count)
+            return 200, body, state
+        return 404, _encode({"error": f"unknown endpoint {path}"}), "MISS"
+
+    def _produce(self, route: Route, args: Dict[str, str], groups) -> Tuple[bytes, int]:
+        payload = route.handler(args, *groups)
+        count = payload.get("total") if isinstance(payload, dict) else 0
+        if count is None:
+            count = len(payload.get("results", ()))
+        return _encode(payload), count
+
+    def _log(self, search_type: str, params: Dict[str, Any], count: int):
+        try:
+            self.log_writer.log_search(search_type, params, count)
+        except Exception as e:
+            logger.warning("Лог поиска не записан: %s", e)
+
+    # ---------- Обработчики ----------
+    def health(self, args):
+        return {"status": "ok", "uptime_s": round(time.time() - self.started, 1),
+                "pool": self.db.pool.stats() if self.db.pool else None,
+                "cache": self.cache.stats(),
+                "changes": self.changes.status() if self.changes else None}
+
+    def genres(self, args):
+        return {"results": self.db.get_available_genres()}
+
+    def _page(self, args) -> Tuple[int, int]:
+        page = _int(args, "page", 1, lo=1)
+        per_page = _int(args, "per_page", 10, lo=1, hi=MAX_PER_PAGE)
+        return page, per_page
+
+    def _count(self, args) -> Dict[str, Any]:
+        """count=exact (по умолчанию) | skip | bounded (&count_bound=N): см. mysql_connector.COUNT_MODES"""
+        from mysql_connector import COUNT_MODES, DEFAULT_COUNT_BOUND
+        mode = _str(args, "count") or "exact"
+        if mode not in COUNT_MODES:
+            raise ServiceError(400, f"parameter 'count' must be one of {', '.join(COUNT_MODES)}")
+        return {"count_mode": mode,
+                "count_bound": _int(args, "count_bound", DEFAULT_COUNT_BOUND, lo=1, hi=1_000_000)}
+
+    def _paged(self, films, total, page, per_page, count) -> Dict[str, Any]:
+        result = {"results": films, "total": total, "page": page, "per_page": per_page}
+        if count["count_mode"] == "bounded":
+            result["total_is_lower_bound"] = total is not None and total >= count["count_bound"]
+        return result
+
+    def search_keyword(self, args):
+        q = _str(args, "q", required=True)
+        page, per_page = self._page(args)
+        count = self._count(args)
+        films, total = self.db.search_by_keyword(q, (page - 1) * per_page, per_page, **count)
+        return self._paged(films, total, page, per_page, count)
+
+    def search_genre(self, args):
+        genre = _str(args, "genre", required=True)
+        start = _int(args, "from", 1900, lo=1800, hi=2200)
+        end = _int(args, "to", start, lo=1800, hi=2200)
+        if end < start:
+            raise ServiceError(400, "'to' must not be less than 'from'")
+        page, per_page = self._page(args)
+        count = self._count(args)
+        films, total = self.db.search_by_genre_and_years(genre, start, end, (page - 1) * per_page, per_page,
+                                                         **count)
+        return self._paged(films, total, page, per_page, count)
+
+    def search_advanced(self, args):
+        filters = {name: _str(args, name) for name in ("title", "actor", "genre", "rating")}
+        filters.update({name: _int(args, name) for name in ("year_from", "year_to", "length_from", "length_to")})
+        try:
+            films = self.db.search_advanced(**filters, sort=_str(args, "sort") or "year_desc",
+                                            limit=_int(args, "limit", 100, lo=1, hi=MAX_LIMIT))
+        except ValueError as e:
+            raise ServiceError(400, str(e))
+        return {"results": films}
+
+    def film_details(self, args, film_id):
+        film = self.db.get_film_details(int(film_id))
+        if film is None:
+            raise ServiceError(404, f"film {film_id} not found")
+        return film
+
+    def similar(self, args, film_id):
+        film = self.db.get_film_details(int(film_id))
+        if film is None:
+            raise ServiceError(404, f"film {film_id} not found")
+        genres = [g.strip() for g in (film.get("genres") or "").split(",") if g.strip()]
+        limit = _int(args, "limit", 10, lo=1, hi=MAX_PER_PAGE)
+        return {"results": self.db.find_similar_films(int(film_id), genres, film.get("release_year") or 0, limit)}
+
+    def popular(self, args):
+        with self._stats_lock:
+            return {"results": self.log_stats.get_popular_searches(_int(args, "limit", 5, lo=1, hi=100))}
+
+    def recent(self, args):
+        with self._stats_lock:
+            return {"results": self.log_stats.get_recent_searches(_int(args, "limit", 5, lo=1, hi=100))}
+
+    def close(self):
+        if self.changes is not None:
+            self.changes.stop()
+        self._log_pool.shutdown(wait=True)
+        self.db.close()
+        self.log_writer.close_connection()
+        self.log_stats.close()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    service: SearchService = None
+    server_version = "SakilaSearch/1.0"
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        args = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+        start = time.perf_counter()
+        status, body, cache_state = self.service.dispatch(parts.path, args)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-Cache", cache_state)
+        self.send_header("X-Response-Time-ms", f"{(time.perf_counter() - start) * 1000:.1f}")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt, *args):
+        logger.info("%s %s", self.address_string(), fmt % args)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Headless JSON search service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE, help="соединений MySQL в пуле")
+    parser.add_argument("--cache-ttl", type=float, default=DEFAULT_CACHE_TTL, help="TTL кэша поиска (0 — без кэша)")
+    parser.add_argument("--cache-mb", type=float, default=DEFAULT_CACHE_MB, help="бюджет памяти кэша ответов")
+    parser.add_argument("--change-poll-s", type=float, default=DEFAULT_CHANGE_POLL_S,
+                        help="интервал опроса изменений каталога для инвалидации кэша (0 — выключить)")
+    parser.add_argument("--tmdb", action="store_true", help="база в схеме TMDB: включить Adapter_exe")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    if args.tmdb:
+        import Adapter_exe
+        Adapter_exe.install()
+    memory_budget.set_budget("service_responses", args.cache_mb)
+
+    service = SearchService(args.pool_size, args.cache_ttl, args.change_poll_s)
+    _Handler.service = service
+    server = ThreadingHTTPServer((args.host, args.port), _Handler)
+    server.daemon_threads = True
+    print(f"🌐 Search service on http://{args.host}:{args.port} (pool {args.pool_size}, cache ttl {args.cache_ttl:g}s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Stopping...")
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
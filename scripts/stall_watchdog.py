@@ -0,0 +1,154 @@
+# stall_watchdog.py - Детектор зависаний GUI-потока (задержка цикла событий + стек в момент зависания)
+"""
+GUI-поток регулярно вызывает beat() (таймер Qt, HEARTBEAT_MS). Отдельный поток
+следит за временем с последнего удара: если GUI молчит дольше порога, снимается
+Python-стек главного потока (sys._current_frames) вместе с именем текущего
+действия из tracing. Когда цикл событий оживает, зависание записывается в журнал
+и в отчёт сессии.
+"""
+import os
+import sys
+import time
+import json
+import logging
+import threading
+import traceback
+from typing import Any, Dict, List, Optional
+
+from tracing import TRACER
+
+HEARTBEAT_MS = 50         # период удара из GUI-потока
+STALL_THRESHOLD_MS = 250  # блокировка дольше этого — зависание
+POLL_MS = 25              # как часто сторожевой поток проверяет удары
+MAX_STACKS = 5            # снимков стека на одно зависание (длинные зависания снимаются повторно)
+STACK_DEPTH = 25          # кадров в снимке
+KEEP_STALLS = 200         # зависаний в отчёте сессии
+
+logger = logging.getLogger(__name__)
+
+
+def _main_stack(thread_id: int) -> List[str]:
+    frame = sys._current_frames().get(thread_id)
+    if frame is None:
+        return []
+    return [line.rstrip() for line in traceback.format_stack(frame)[-STACK_DEPTH:]]
+
+
+class StallWatchdog:
+    """Сторожевой поток для цикла событий"""
+
+    def __init__(self, threshold_ms: float = STALL_THRESHOLD_MS, log_path: Optional[str] = None):
+        self.threshold = threshold_ms / 1000
+        self.log_path = log_path
+        self.stalls: List[Dict[str, Any]] = []
+        self._main_id = threading.main_thread().ident
+        self._last_beat = time.monotonic()
+        self._current: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ---------- Управление ----------
+    def start(self):
+        if self._thread is not None:
+            return
+        self._last_beat = time.monotonic()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="stall-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+            self._thread = None
+
+    def beat(self):
+        """Вызывается из GUI-потока; закрывает текущее зависание, если оно было"""
+        now = time.monotonic()
+        with self._lock:
+            stall, self._current = self._current, None
+            gap = now - self._last_beat
+            self._last_beat = now
+        if stall is not None:
+            stall["duration_ms"] = gap * 1000
+            self._record(stall)
+
+    # ---------- Сторожевой поток ----------
+    def _watch(self):
+        while not self._stop.wait(POLL_MS / 1000):
+            now = time.monotonic()
+            with self._lock:
+                blocked = now - self._last_beat
+                if blocked < self.threshold:
+                    continue
+                stall = self._current
+                if stall is None:
+                    stall = self._current = {
+                        "at": time.time() - blocked,
+                        "action": TRACER.current_path(self._main_id),
+                        "stacks": [],
+                        "next_sample": 0.0,
+                    }
+                # Повторные снимки — каждые threshold мс, пока GUI не оживёт
+                if blocked < stall["next_sample"] or len(stall["stacks"]) >= MAX_STACKS:
+                    continue
+                stall["next_sample"] = blocked + self.threshold
+            stack = _main_stack(self._main_id)
+            with self._lock:
+                if self._current is stall:
+                    stall["stacks"].append({"after_ms": blocked * 1000, "stack": stack})
+                    # Действие могло начаться уже во время зависания
+                    stall["action"] = stall["action"] or TRACER.current_path(self._main_id)
+
+    def _record(self, stall: Dict[str, Any]):
+        stall.pop("next_sample", None)
+        first = stall["stacks"][0]["stack"] if stall["stacks"] else []
+        top = first[-1].strip().splitlines()[0] if first else "?"
+        stall["where"] = top
+        with self._lock:
+            self.stalls.append(stall)
+            if len(self.stalls) > KEEP_STALLS:
+                # Храним самые тяжёлые
+                self.stalls.sort(key=lambda s: s["duration_ms"], reverse=True)
+                del self.stalls[KEEP_STALLS:]
+        logger.warning("UI stall %.0f ms in %s at %s", stall["duration_ms"], stall["action"] or "idle", top)
+        if self.log_path:
+            try:
+                os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(stall, ensure_ascii=False) + "\n")
+            except OSError as e:
+                logger.warning("Журнал зависаний недоступен: %s", e)
+
+    # ---------- Отчёт ----------
+    def worst(self, limit: int = 10) -> List[Dict[str, Any]]:
+        with self._lock:
+            return sorted(self.stalls, key=lambda s: s["duration_ms"], reverse=True)[:limit]
+
+    def by_action(self) -> List[Dict[str, Any]]:
+        """Зависания, сгруппированные по действию: число, суммарно и максимум (мс)"""
+        groups: Dict[str, Dict[str, Any]] = {}
+        with self._lock:
+            stalls = list(self.stalls)
+        for st in stalls:
+            g = groups.setdefault(st["action"] or "idle",
+                                  {"action": st["action"] or "idle", "count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            g["count"] += 1
+            g["total_ms"] += st["duration_ms"]
+            g["max_ms"] = max(g["max_ms"], st["duration_ms"])
+        return sorted(groups.values(), key=lambda g: g["total_ms"], reverse=True)
+
+    def format_report(self, limit: int = 10) -> str:
+        if not self.stalls:
+            return "No UI stalls detected in this session."
+        lines = [f"UI stalls (threshold {self.threshold * 1000:.0f} ms): {len(self.stalls)}", "", "By action:"]
+        for g in self.by_action():
+            lines.append(f"  {g['action']}: {g['count']}×, total {g['total_ms']:.0f} ms, max {g['max_ms']:.0f} ms")
+        lines += ["", f"Worst {limit}:"]
+        for i, st in enumerate(self.worst(limit), 1):
+            when = time.strftime("%H:%M:%S", time.localtime(st["at"]))
+            lines.append(f"{i}. {st['duration_ms']:.0f} ms at {when} — {st['action'] or 'idle'}")
+            if st["stacks"]:
+                lines += ["     " + line for line in st["stacks"][0]["stack"][-6:]]
+        return "\n".join(lines)
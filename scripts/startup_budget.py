@@ -0,0 +1,123 @@
+# startup_budget.py - Замер времени холодного старта GUI (до первого окна)
+"""
+Запускает точки входа в отдельном процессе с SAKILA_STARTUP_PROBE=1 и меряет
+время до появления первого окна. Код возврата 1, если бюджет превышен.
+
+Использование:
+    python startup_budget.py                 # оба входа, бюджет по умолчанию
+    python startup_budget.py --budget 2.5 --runs 5
+    python startup_budget.py --importtime    # + топ медленных импортов
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+import tempfile
+import threading
+import subprocess
+from typing import Dict, List, Optional, Tuple
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Точка входа -> бюджет времени до первого окна (секунды)
+ENTRY_POINTS = {
+    "main_gui3.py": 3.0,
+    "Adapter_exe.py": 3.5,
+}
+
+
+def measure(script: str, importtime: bool = False, timeout: float = 60.0) -> Tuple[Optional[float], str]:
+    """Время от запуска процесса до строки FIRST_WINDOW; (None, stderr) при ошибке"""
+    env = dict(os.environ, SAKILA_STARTUP_PROBE="1")
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ["-X", "importtime"]
+    cmd.append(os.path.join(HERE, script))
+
+    # stderr (а с -X importtime он большой) — во временный файл: непрочитанная труба
+    # заполнится, и процесс встанет раньше, чем напечатает FIRST_WINDOW
+    with tempfile.TemporaryFile("w+") as err_file:
+        start = time.perf_counter()
+        proc = subprocess.Popen(cmd, cwd=HERE, env=env, stdin=subprocess.DEVNULL,
+                                stdout=subprocess.PIPE, stderr=err_file, text=True)
+        seen = threading.Event()
+        found: Dict[str, float] = {}
+
+        def _scan():
+            for line in proc.stdout:  # читаем до конца, чтобы stdout тоже не заполнился
+                if not seen.is_set() and line.strip() == "FIRST_WINDOW":
+                    found["elapsed"] = time.perf_counter() - start
+                    seen.set()
+
+        reader = threading.Thread(target=_scan, name="startup-probe", daemon=True)
+        reader.start()
+        deadline = start + timeout
+        # Ждём окно или выход процесса, но не дольше timeout
+        while not seen.is_set() and proc.poll() is None and time.perf_counter() < deadline:
+            seen.wait(0.05)
+        try:
+            proc.wait(timeout=max(0.0, deadline - time.perf_counter()))
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+        reader.join(timeout=5)
+        err_file.seek(0)
+        err = err_file.read()
+    return found.get("elapsed"), err
+
+
+def top_imports(stderr: str, limit: int = 10) -> List[Tuple[int, str]]:
+    """Самые дорогие импорты (кумулятивно, мкс) из вывода -X importtime"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        try:
+            cumulative = int(fields[1])
+        except ValueError:
+            continue  # строка заголовка
+        rows.append((cumulative, fields[2].strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Time-to-first-window budget check")
+    parser.add_argument("--runs", type=int, default=3, help="запусков на точку входа (берётся медиана)")
+    parser.add_argument("--budget", type=float, default=None, help="общий бюджет в секундах")
+    parser.add_argument("--importtime", action="store_true", help="показать топ импортов")
+    parser.add_argument("entry", nargs="*", default=list(ENTRY_POINTS), help="скрипты для замера")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for script in args.entry:
+        budget = args.budget if args.budget is not None else ENTRY_POINTS.get(script, 3.0)
+        times = []
+        for _ in range(args.runs):
+            elapsed, err = measure(script)
+            if elapsed is None:
+                print(f"❌ {script}: окно не появилось\n{err[-2000:]}")
+                failed = True
+                break
+            times.append(elapsed)
+        if not times:
+            continue
+        median = statistics.median(times)
+        ok = median <= budget
+        failed |= not ok
+        print(f"{'✅' if ok else '❌'} {script}: {median:.2f}s (budget {budget:.2f}s, runs: "
+              f"{', '.join(f'{t:.2f}' for t in times)})")
+
+        if args.importtime:
+            _, err = measure(script, importtime=True)
+            for cumulative, name in top_imports(err):
+                print(f"    {cumulative / 1000:8.1f} ms  {name}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
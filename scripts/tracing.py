@@ -0,0 +1,178 @@
+# tracing.py - Лёгкие спаны для разбора времени действий пользователя (экспорт в Chrome trace)
+"""
+Действие (action) — корневой спан, например «поиск по ключевому слову».
+Вложенные спаны (span) — его стадии: sql, adapt_results, dataframe, resize,
+log_search, ... Для каждой стадии считается собственное время (без вложенных
+спанов), так что сумма стадий равна длительности действия.
+
+Все завершённые спаны (в том числе вне действий и из других потоков) попадают
+в кольцевой буфер и выгружаются в формате Chrome trace (chrome://tracing, Perfetto).
+"""
+import os
+import json
+import time
+import threading
+import functools
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+MAX_EVENTS = 20000   # спанов в буфере для экспорта
+KEEP_ACTIONS = 50    # последних действий с разбивкой по стадиям
+
+
+class _Span:
+    __slots__ = ("name", "args", "start", "child_time", "parent", "action", "stages")
+
+    def __init__(self, name: str, args: Dict[str, Any], parent: Optional["_Span"], is_action: bool):
+        self.name = name
+        self.args = args
+        self.parent = parent
+        self.child_time = 0.0
+        # Действие внутри другого действия ведёт себя как обычная стадия
+        is_action = is_action and parent is None
+        self.action = self if is_action else (parent.action if parent else None)
+        self.stages: Optional[Dict[str, float]] = {} if is_action else None
+        self.start = time.perf_counter()
+
+
+class Tracer:
+    """Сборщик спанов; стек спанов свой у каждого потока"""
+
+    def __init__(self, max_events: int = MAX_EVENTS, keep_actions: int = KEEP_ACTIONS):
+        self.enabled = True
+        self.events = deque(maxlen=max_events)     # события Chrome trace ("ph": "X")
+        self.actions = deque(maxlen=keep_actions)  # итоги действий (см. _finish_action)
+        self.listeners: List[Callable[[Dict[str, Any]], None]] = []
+        # Объекты с action_started(name) / action_finished(name) — вызываются вокруг
+        # корневого действия в его потоке (например, профилировщик)
+        self.hooks: List[Any] = []
+        self._tls = threading.local()
+        self._stacks: Dict[int, List[_Span]] = {}  # поток -> его стек (для чтения из других потоков)
+        self._t0 = time.perf_counter()
+        self._pid = os.getpid()
+
+    def _stack(self) -> List[_Span]:
+        stack = getattr(self._tls, "stack", None)
+        if stack is None:
+            stack = self._tls.stack = []
+            self._stacks[threading.get_ident()] = stack
+        return stack
+
+    def current_path(self, thread_id: int) -> Optional[str]:
+        """Открытые спаны потока: «search.keyword > sql» (None — вне спанов)"""
+        names = [sp.name for sp in list(self._stacks.get(thread_id, ()))]
+        return " > ".join(names) if names else None
+
+    @contextmanager
+    def _run(self, name: str, args: Dict[str, Any], is_action: bool):
+        if not self.enabled:
+            yield None
+            return
+        stack = self._stack()
+        sp = _Span(name, args, stack[-1] if stack else None, is_action)
+        is_root = sp.action is sp
+        if is_root and self.hooks:
+            self._call_hooks("action_started", name)
+            sp.start = time.perf_counter()  # время хуков в действие не входит
+        stack.append(sp)
+        try:
+            yield sp
+        finally:
+            end = time.perf_counter()
+            stack.pop()
+            if is_root and self.hooks:
+                self._call_hooks("action_finished", name)
+            self._finish(sp, end)
+
+    def _call_hooks(self, method: str, name: str):
+        for hook in list(self.hooks):
+            try:
+                getattr(hook, method)(name)
+            except Exception:
+                pass
+
+    def span(self, name: str, **args):
+        """Стадия текущего действия (или самостоятельный спан, если действия нет)"""
+        return self._run(name, args, is_action=False)
+
+    def action(self, name: str, **args):
+        """Корневой спан действия пользователя"""
+        return self._run(name, args, is_action=True)
+
+    def traced(self, name: str):
+        """Декоратор: весь вызов функции — одно действие"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*a, **kw):
+                with self.action(name):
+                    return func(*a, **kw)
+            return wrapper
+        return decorator
+
+    def _finish(self, sp: _Span, end: float):
+        duration = end - sp.start
+        if sp.parent is not None:
+            sp.parent.child_time += duration
+        own = duration - sp.child_time
+        if sp.action is not None:
+            key = "other" if sp.action is sp else sp.name
+            sp.action.stages[key] = sp.action.stages.get(key, 0.0) + own
+
+        self.events.append({
+            "name": sp.name,
+            "cat": sp.action.name if sp.action is not None else "background",
+            "ph": "X",
+            "ts": round((sp.start - self._t0) * 1e6, 1),
+            "dur": round(duration * 1e6, 1),
+            "pid": self._pid,
+            "tid": threading.get_ident(),
+            "args": {k: str(v) for k, v in sp.args.items()},
+        })
+        if sp.action is sp:
+            self._finish_action(sp, duration)
+
+    def _finish_action(self, sp: _Span, duration: float):
+        stages = sorted(sp.stages.items(), key=lambda kv: kv[1], reverse=True)
+        result = {
+            "name": sp.name,
+            "total_ms": duration * 1000,
+            "stages": [(name, t * 1000) for name, t in stages],
+            "args": dict(sp.args),
+            "at": time.time(),
+        }
+        self.actions.append(result)
+        for listener in list(self.listeners):
+            try:
+                listener(result)
+            except Exception:
+                pass
+
+    # ---------- Отчёты ----------
+    def last_action(self) -> Optional[Dict[str, Any]]:
+        return self.actions[-1] if self.actions else None
+
+    def export_chrome(self, path: str) -> int:
+        """Пишет буфер спанов в JSON для chrome://tracing / Perfetto; возвращает число событий"""
+        events = list(self.events)
+        meta = [{"name": "thread_name", "ph": "M", "pid": self._pid, "tid": threading.main_thread().ident,
+                 "args": {"name": "main"}}]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": meta + events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+        return len(events)
+
+    def clear(self):
+        self.events.clear()
+        self.actions.clear()
+
+
+def format_breakdown(result: Dict[str, Any], limit: int = 6) -> str:
+    """«search.keyword 420 ms: sql 300 · dataframe 50 · resize 30 · …»"""
+    parts = [f"{name} {ms:.0f}" for name, ms in result["stages"][:limit] if ms >= 0.5]
+    return f"{result['name']} {result['total_ms']:.0f} ms: " + " · ".join(parts)
+
+
+TRACER = Tracer()
+span = TRACER.span
+action = TRACER.action
+traced = TRACER.traced